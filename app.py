@@ -12,7 +12,11 @@ import logging
 import threading
 import os
 
-from config import APP_TITLE, APP_DESCRIPTION, MAP_CENTER, MAP_ZOOM
+from config import APP_TITLE, APP_DESCRIPTION, MAP_CENTER, MAP_ZOOM, TOPOJSON_PATH, TILES_DIR, TILES_ENABLED
+from geo_processor import FeatureIndex
+from topojson_export import TOPOJSON_OBJECT
+from lod_layer import LevelOfDetailLayer, load_lod_levels
+from vector_tile_layer import VectorTileLayer, load_tile_metadata
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -36,6 +40,12 @@ def create_gig_tooltip(gigs: list, municipality_name: str) -> str:
     
     return f'<div style="{style}">{content}</div>'
 
+def create_canton_tooltip(gigs: list, canton: str) -> str:
+    """Create simple HTML tooltip for a canton on the zoomed-out map"""
+    style = "font-size: 14px;"
+    content = f"<b>{canton}</b><br>{len(gigs)} upcoming gig{'s' if len(gigs) > 1 else ''}<br>Zoom in for details"
+    return f'<div style="{style}">{content}</div>'
+
 def create_gig_popup(gigs: list, municipality_name: str) -> str:
     """Create detailed HTML popup with clickable band links"""
     if not gigs:
@@ -73,6 +83,9 @@ def create_gig_popup(gigs: list, municipality_name: str) -> str:
         else:
             html += f"<b>{band_name}</b><br>"
         
+        band_city = (gig.get("band_details") or {}).get("city")
+        if band_city:
+            html += f"<span style='font-size: 13px; color: #666;'>from {band_city}</span><br>"
         if venue:
             html += f"📍 {venue}<br>"
         if date_str:
@@ -83,8 +96,104 @@ def create_gig_popup(gigs: list, municipality_name: str) -> str:
     return html
 
 
-def create_interactive_map(municipality_gigs: dict, geo_data: dict) -> folium.Map:
-    """Create interactive folium map with gig data"""
+def gig_count_style(gig_count: int, max_gigs: int) -> dict:
+    """Leaflet path style for a municipality, redder with more gigs"""
+    intensity = min(gig_count / max_gigs, 1.0)
+    red = int(255 * intensity)
+    return {
+        "fillColor": f"#{red:02x}4444",
+        "color": f"#{red:02x}3333",
+        "weight": 2,
+        "fillOpacity": 0.8,
+    }
+
+
+def add_topology_layer(m: folium.Map, municipality_gigs: dict, topology: dict, max_gigs: int) -> None:
+    """
+    Add the municipalities with gigs as one TopoJSON layer: the browser decodes the shared,
+    quantized arcs (topojson.feature) instead of receiving every polygon's full coordinates.
+    Gig count, tooltip and popup HTML travel in each geometry's properties.
+    """
+    geometries = []
+    for geometry in topology["objects"][TOPOJSON_OBJECT]["geometries"]:
+        municipality_name = geometry.get("properties", {}).get("name")
+        gigs = municipality_gigs.get(municipality_name)
+        if not gigs or not geometry.get("type"):
+            continue
+        
+        geometries.append({
+            **geometry,
+            "properties": {
+                "name": municipality_name,
+                "gig_count": len(gigs),
+                "tooltip": create_gig_tooltip(gigs, municipality_name),
+                "popup": create_gig_popup(gigs, municipality_name)
+            }
+        })
+    if not geometries:
+        return
+    
+    # A copy: folium writes each geometry's style into its properties
+    layer_topology = {
+        **topology,
+        "objects": {TOPOJSON_OBJECT: {"type": "GeometryCollection", "geometries": geometries}}
+    }
+    layer = folium.TopoJson(
+        layer_topology,
+        f"objects.{TOPOJSON_OBJECT}",
+        style_function=lambda geometry: gig_count_style(geometry["properties"]["gig_count"], max_gigs),
+        tooltip=folium.GeoJsonTooltip(fields=["tooltip"], labels=False)
+    )
+    folium.GeoJsonPopup(fields=["popup"], labels=False, max_width=250).add_to(layer)
+    layer.add_to(m)
+
+
+def municipality_details(municipality_gigs: dict, max_gigs: int) -> dict:
+    """Style, tooltip and popup per municipality with gigs"""
+    return {
+        municipality_name: {
+            "style": gig_count_style(len(gigs), max_gigs),
+            "tooltip": create_gig_tooltip(gigs, municipality_name),
+            "popup": create_gig_popup(gigs, municipality_name)
+        }
+        for municipality_name, gigs in municipality_gigs.items()
+    }
+
+
+def lod_details(municipality_gigs: dict, max_gigs: int) -> dict:
+    """
+    Style, tooltip and popup per drawn feature for LevelOfDetailLayer: municipalities with gigs,
+    and cantons by the gigs listed in them
+    """
+    canton_gigs = {}
+    for gigs in municipality_gigs.values():
+        for gig in gigs:
+            if gig.get("canton"):
+                canton_gigs.setdefault(gig["canton"], []).append(gig)
+    max_canton_gigs = max([len(gigs) for gigs in canton_gigs.values()]) if canton_gigs else 1
+    
+    return {
+        "municipalities": municipality_details(municipality_gigs, max_gigs),
+        "cantons": {
+            canton: {
+                "style": gig_count_style(len(gigs), max_canton_gigs),
+                "tooltip": create_canton_tooltip(gigs, canton)
+            }
+            for canton, gigs in canton_gigs.items()
+        }
+    }
+
+
+def create_interactive_map(municipality_gigs: dict, geo_data: dict, feature_index: FeatureIndex = None,
+                           topology: dict = None, lod_levels: list = None,
+                           tile_metadata: dict = None) -> folium.Map:
+    """
+    Create interactive folium map with gig data (feature_index: a prebuilt FeatureIndex of geo_data).
+    With vector tiles (tile_metadata, see vector_tile_layer.load_tile_metadata) the browser fetches
+    the tiles in view from Streamlit's static file serving; else with LOD levels (see lod_layer.load_lod_levels)
+    the map shows the one matching its zoom; else with a topology (see topojson_export) the
+    municipalities are drawn from it, else from geo_data.
+    """
     logger.info("Creating interactive map...")
     
     # Create base map
@@ -97,20 +206,29 @@ def create_interactive_map(municipality_gigs: dict, geo_data: dict) -> folium.Ma
     # Calculate gig counts for heatmap coloring
     max_gigs = max([len(gigs) for gigs in municipality_gigs.values()]) if municipality_gigs else 1
     
+    if tile_metadata:
+        VectorTileLayer(
+            tile_metadata, municipality_details(municipality_gigs, max_gigs), create_gig_tooltip([], "{name}")
+        ).add_to(m)
+        return m
+    
+    if lod_levels:
+        LevelOfDetailLayer(lod_levels, lod_details(municipality_gigs, max_gigs)).add_to(m)
+        return m
+    
+    if topology:
+        add_topology_layer(m, municipality_gigs, topology, max_gigs)
+        return m
+    
+    feature_index = feature_index or FeatureIndex(geo_data)
+    
     # Add only municipalities with gigs to map (for performance)
     for municipality_name, gigs in municipality_gigs.items():
         # Find the corresponding feature in geo_data
-        municipality_feature = None
-        for feature in geo_data.get("features", []):
-            props = feature.get("properties", {})
-            feature_name = props.get("gemeinde.NAME") or props.get("NAME") or props.get("name")
-            if feature_name == municipality_name:
-                municipality_feature = feature
-                break
-        
+        municipality_feature = feature_index.get(municipality_name)
         if not municipality_feature:
             continue
-            
+        
         # Clean up properties for folium - ensure no dots in keys
         props = municipality_feature.get("properties", {})
         clean_props = {}
@@ -124,15 +242,9 @@ def create_interactive_map(municipality_gigs: dict, geo_data: dict) -> folium.Ma
             "properties": clean_props,
             "geometry": municipality_feature.get("geometry")
         }
-            
-        gig_count = len(gigs)
         
         # Color intensity based on gig count
-        intensity = min(gig_count / max_gigs, 1.0)
-        red = int(255 * intensity)
-        color = f"#{red:02x}3333"
-        fill_color = f"#{red:02x}4444"
-        fill_opacity = 0.8
+        style = gig_count_style(len(gigs), max_gigs)
         
         # Create tooltip and popup
         tooltip_html = create_gig_tooltip(gigs, municipality_name)
@@ -141,12 +253,7 @@ def create_interactive_map(municipality_gigs: dict, geo_data: dict) -> folium.Ma
         # Add municipality to map
         folium.GeoJson(
             clean_feature,
-            style_function=lambda x, color=color, fill_color=fill_color, fill_opacity=fill_opacity: {
-                "fillColor": fill_color,
-                "color": color,
-                "weight": 2,
-                "fillOpacity": fill_opacity,
-            },
+            style_function=lambda x, style=style: style,
             tooltip=folium.Tooltip(tooltip_html, max_width=250),
             popup=folium.Popup(popup_html, max_width=250)
         ).add_to(m)
@@ -177,7 +284,7 @@ def create_gigs_table(gigs_data: list) -> pd.DataFrame:
         # Create band info with thumbnail and clickable link
         band_name = gig.get("band_name", "Unknown Band")
         band_id = gig.get("band", {}).get("id") if isinstance(gig.get("band"), dict) else gig.get("band_id")
-        thumbnail_url = gig.get("band_image_thumb", "")
+        thumbnail_url = gig.get("band_image_thumb") or (gig.get("band_details") or {}).get("url_for_image_thumb", "")
         
         # Create combined band cell with thumbnail + name + link
         band_html = ""
@@ -216,7 +323,7 @@ def is_data_stale() -> bool:
         hours_since_update = (datetime.now() - last_updated).total_seconds() / 3600
         
         return hours_since_update > 24
-        
+    
     except (FileNotFoundError, json.JSONDecodeError, KeyError, ValueError):
         return True
 
@@ -228,15 +335,16 @@ def refresh_data_background():
         
         # Import here to avoid issues if modules not available
         from preprocess_data import preprocess_all_data
+        from streamlit_adapters import clear_caches
         
-        # Run data preprocessing
+        # Run data preprocessing (headless: no Streamlit calls from this thread)
         preprocess_all_data()
         
-        # Clear streamlit cache to use fresh data on next requests
-        st.cache_data.clear()
+        # Clear cached data to use fresh data on next requests
+        clear_caches()
         
         logger.info("Background data refresh completed successfully")
-        
+    
     except Exception as e:
         logger.error(f"Background refresh failed: {e}")
 
@@ -267,17 +375,24 @@ def load_preprocessed_data():
         with open('data/municipality_gigs.json', 'r') as f:
             municipality_gigs = json.load(f)
         
-        # Load simplified geo data (only municipalities with gigs)
+        # Load simplified geo data (only municipalities with gigs), indexed once for map building
         with open('data/simplified_geo.json', 'r') as f:
             geo_data = json.load(f)
+        feature_index = FeatureIndex(geo_data)
+        
+        # Shared-arc TopoJSON of the same municipalities, drawn instead of geo_data when present
+        topology = None
+        if os.path.exists(TOPOJSON_PATH):
+            with open(TOPOJSON_PATH, 'r') as f:
+                topology = json.load(f)
         
         # Load metadata
         with open('data/metadata.json', 'r') as f:
             metadata = json.load(f)
         
         logger.info(f"Loaded {metadata['total_gigs']} gigs from {metadata['municipalities_with_gigs']} municipalities")
-        return processed_gigs, geo_data, municipality_gigs, metadata
-        
+        return processed_gigs, geo_data, feature_index, topology, municipality_gigs, metadata
+    
     except FileNotFoundError:
         st.error("Pre-processed data not found. Please run: python preprocess_data.py")
         st.stop()
@@ -286,6 +401,21 @@ def load_preprocessed_data():
         st.stop()
 
 
+@st.cache_data(ttl=3600)
+def load_map_levels():
+    """Level-of-detail topologies for the map, the one for MAP_ZOOM loaded (None until preprocessed)"""
+    return load_lod_levels(MAP_ZOOM)
+
+
+@st.cache_data(ttl=3600)
+def load_map_tiles():
+    """Metadata of the vector tiles for the map, None when disabled or not preprocessed"""
+    if not TILES_ENABLED:
+        return None
+    
+    return load_tile_metadata(TILES_DIR)
+
+
 def main():
     """Main Streamlit application"""
     st.title(APP_TITLE)
@@ -296,7 +426,7 @@ def main():
     
     # Load data
     try:
-        processed_gigs, geo_data, municipality_gigs, metadata = load_preprocessed_data()
+        processed_gigs, geo_data, feature_index, topology, municipality_gigs, metadata = load_preprocessed_data()
     except Exception as e:
         st.error(f"Failed to load data: {e}")
         st.stop()
@@ -311,7 +441,9 @@ def main():
     
     # Create and display map
     try:
-        map_obj = create_interactive_map(municipality_gigs, geo_data)
+        map_obj = create_interactive_map(
+            municipality_gigs, geo_data, feature_index, topology, load_map_levels(), load_map_tiles()
+        )
         folium_static(map_obj, height=500, width=None)
     except Exception as e:
         import traceback
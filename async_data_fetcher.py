@@ -0,0 +1,211 @@
+"""
+Asyncio client for the MX3 API, for fanning out canton and band requests in one event loop
+"""
+import asyncio
+import os
+import time
+import logging
+from typing import List, Dict, Optional, Iterable
+from datetime import datetime
+
+import aiohttp
+from dotenv import load_dotenv
+
+from config import (
+    API_BASE_URL, OAUTH_URL, SWISS_CANTONS, MAX_CONCURRENT_REQUESTS, MAX_GIGS_PER_REQUEST, REQUEST_TIMEOUT
+)
+from data_fetcher import MX3APIError, oauth_headers, token_expiry, is_ok_response
+from rate_limiter import RequestMetrics
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncMX3APIClient:
+    """
+    Async counterpart of MX3APIClient.
+    All requests share one aiohttp connection pool and a semaphore bounding requests in flight.
+    Use as `async with AsyncMX3APIClient() as client: ...` so the pool is closed afterwards.
+    """
+    
+    def __init__(self, max_concurrency: int = MAX_CONCURRENT_REQUESTS):
+        self.consumer_key = os.getenv("CONSUMER_KEY")
+        self.consumer_secret = os.getenv("CONSUMER_SECRET")
+        self.access_token = None
+        self.token_expires_at = None
+        self.max_concurrency = max(1, max_concurrency)
+        
+        if not self.consumer_key or not self.consumer_secret:
+            raise ValueError("CONSUMER_KEY and CONSUMER_SECRET must be set in environment variables")
+        
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._token_lock = asyncio.Lock()
+        self.metrics = RequestMetrics()
+    
+    async def __aenter__(self) -> "AsyncMX3APIClient":
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+    
+    async def close(self) -> None:
+        """Close the shared connection pool"""
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+    
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+            )
+        return self._session
+    
+    def _has_valid_token(self) -> bool:
+        return bool(self.access_token and self.token_expires_at and datetime.now() < self.token_expires_at)
+    
+    async def _get_access_token(self) -> str:
+        """Get OAuth access token, requesting it at most once across concurrent tasks"""
+        if self._has_valid_token():
+            return self.access_token
+        
+        async with self._token_lock:
+            if self._has_valid_token():
+                return self.access_token
+            
+            try:
+                async with self._get_session().post(
+                    OAUTH_URL,
+                    params={"grant_type": "client_credentials"},
+                    headers=oauth_headers(self.consumer_key, self.consumer_secret)
+                ) as response:
+                    response.raise_for_status()
+                    token_data = await response.json(content_type=None)
+                
+                self.access_token = token_data["access_token"]
+                self.token_expires_at = token_expiry(token_data)
+                
+                logger.info("Successfully obtained access token")
+                return self.access_token
+            
+            except Exception as e:
+                logger.error(f"Failed to get access token: {e}")
+                raise
+    
+    async def _make_api_request(self, endpoint: str, params: Dict = None) -> Optional[Dict]:
+        """Make authenticated API request, bounded by the client's semaphore"""
+        token = await self._get_access_token()
+        
+        headers = {
+            "Authorization": f"Bearer {token}",
+            "Accept": "application/json"
+        }
+        
+        url = f"{API_BASE_URL}/{endpoint}"
+        
+        async with self._semaphore:
+            start = time.perf_counter()
+            try:
+                async with self._get_session().get(url, headers=headers, params=params) as response:
+                    response.raise_for_status()
+                    data = await response.json(content_type=None)
+                self.metrics.record(time.perf_counter() - start)
+                return data
+            
+            except Exception as e:
+                self.metrics.record(time.perf_counter() - start, error=True)
+                logger.error(f"API request failed for {url}: {e}")
+                return None
+    
+    async def get_gigs_by_canton(self, canton_code: str) -> List[Dict]:
+        """Get all gigs for a specific canton"""
+        logger.info(f"Fetching gigs for canton: {canton_code}")
+        
+        # Same paging rules as MX3APIClient.iter_gig_pages
+        performances = []
+        page = 1
+        previous_first = None
+        while True:
+            data = await self._make_api_request(
+                "gigs", {"state_code": canton_code, "page": page, "per_page": MAX_GIGS_PER_REQUEST}
+            )
+            if not is_ok_response(data):
+                if page > 1:
+                    raise MX3APIError(f"Page {page} of {canton_code} failed after a full page")
+                break
+            
+            page_gigs = data["response"].get("performances", [])
+            if not page_gigs or page_gigs[0] == previous_first:
+                break
+            
+            performances.extend(page_gigs)
+            if len(page_gigs) != MAX_GIGS_PER_REQUEST:
+                break
+            previous_first = page_gigs[0]
+            page += 1
+        
+        if performances:
+            logger.info(f"Found {len(performances)} gigs in {canton_code}")
+        else:
+            logger.warning(f"No gigs found for canton {canton_code}")
+        return performances
+    
+    async def get_band_details(self, band_id: int) -> Optional[Dict]:
+        """Get detailed information about a specific band"""
+        data = await self._make_api_request(f"bands/{band_id}")
+        
+        if is_ok_response(data):
+            return data["response"]["band"]
+        return None
+    
+    async def fetch_all_gigs(self, cantons: Iterable[str] = SWISS_CANTONS) -> List[Dict]:
+        """
+        Fetch gigs for all cantons concurrently.
+        Like fetch_all_swiss_gigs, results are merged in canton order and failed cantons are skipped.
+        """
+        cantons = list(cantons)
+        results = await asyncio.gather(
+            *(self.get_gigs_by_canton(canton) for canton in cantons),
+            return_exceptions=True
+        )
+        
+        all_gigs = []
+        for canton, gigs in zip(cantons, results):
+            if isinstance(gigs, BaseException):
+                logger.error(f"Failed to fetch gigs for {canton}: {gigs}")
+                continue
+            
+            # Add canton info to each gig
+            for gig in gigs:
+                gig["canton"] = canton
+            all_gigs.extend(gigs)
+        
+        logger.info(f"Fetched total of {len(all_gigs)} gigs across Switzerland")
+        return all_gigs
+    
+    async def get_band_details_many(self, band_ids: Iterable[int]) -> Dict[int, Optional[Dict]]:
+        """Fetch details for many bands concurrently, keyed by band id"""
+        unique_ids = list(dict.fromkeys(band_id for band_id in band_ids if band_id is not None))
+        details = await asyncio.gather(*(self.get_band_details(band_id) for band_id in unique_ids))
+        return dict(zip(unique_ids, details))
+
+
+async def fetch_gigs_and_bands(max_concurrency: int = MAX_CONCURRENT_REQUESTS) -> List[Dict]:
+    """Fetch all gigs and enrich each with its band details in a single event loop"""
+    async with AsyncMX3APIClient(max_concurrency=max_concurrency) as client:
+        gigs = await client.fetch_all_gigs()
+        band_details = await client.get_band_details_many(
+            gig.get("band", {}).get("id") for gig in gigs
+        )
+    
+    for gig in gigs:
+        details = band_details.get(gig.get("band", {}).get("id"))
+        if details:
+            gig["band_details"] = details
+    
+    return gigs
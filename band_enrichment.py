@@ -0,0 +1,149 @@
+"""
+Band-details enrichment for processed gigs, backed by a persistent LRU/TTL cache
+"""
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional
+
+from config import (
+    BAND_CACHE_PATH, BAND_CACHE_TTL, BAND_CACHE_NEGATIVE_TTL, BAND_CACHE_MAX_ENTRIES, BAND_DETAIL_FIELDS,
+    MAX_CONCURRENT_REQUESTS
+)
+
+logger = logging.getLogger(__name__)
+
+
+class BandCache:
+    """
+    Band details keyed by band id, stored in one JSON file.
+    Entries expire after ttl seconds; beyond max_entries the least recently used are evicted.
+    Failed lookups are cached too (as None) with a shorter TTL, so they are retried soon
+    but not on every run.
+    """
+    
+    def __init__(self, path: str = BAND_CACHE_PATH, ttl: int = BAND_CACHE_TTL,
+                 max_entries: int = BAND_CACHE_MAX_ENTRIES, negative_ttl: int = BAND_CACHE_NEGATIVE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.entries: Dict[str, Dict] = {}
+        self._load()
+    
+    def _load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+        except FileNotFoundError:
+            self.entries = {}
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable band cache {self.path}: {e}")
+            self.entries = {}
+    
+    def lookup(self, band_id: int, now: Optional[float] = None) -> Optional[Dict]:
+        """Return the cache entry for band_id if present and not expired"""
+        now = now or time.time()
+        entry = self.entries.get(str(band_id))
+        if not entry or self._expired(entry, now):
+            return None
+        
+        entry["last_used"] = now
+        return entry
+    
+    def _expired(self, entry: Dict, now: float) -> bool:
+        ttl = self.ttl if entry["details"] is not None else self.negative_ttl
+        return now - entry["fetched_at"] > ttl
+    
+    def put(self, band_id: int, details: Optional[Dict], now: Optional[float] = None) -> None:
+        now = now or time.time()
+        self.entries[str(band_id)] = {"fetched_at": now, "last_used": now, "details": details}
+    
+    def evict(self, now: Optional[float] = None) -> int:
+        """Drop expired entries, then least recently used ones beyond max_entries"""
+        now = now or time.time()
+        before = len(self.entries)
+        
+        live = {band_id: entry for band_id, entry in self.entries.items() if not self._expired(entry, now)}
+        if len(live) > self.max_entries:
+            by_recency = sorted(live.items(), key=lambda item: item[1]["last_used"], reverse=True)
+            live = dict(by_recency[:self.max_entries])
+        
+        self.entries = live
+        return before - len(self.entries)
+    
+    def save(self) -> None:
+        """Evict, then write the cache atomically"""
+        self.evict()
+        
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_path, self.path)
+
+
+def summarize_band_details(band: Dict) -> Dict:
+    """Keep only the band fields the app displays"""
+    return {field: band[field] for field in BAND_DETAIL_FIELDS if band.get(field)}
+
+
+def enrich_gigs_with_band_details(gigs: List[Dict], client, cache: BandCache,
+                                  max_workers: int = MAX_CONCURRENT_REQUESTS) -> Dict:
+    """
+    Attach band details to each gig as gig["band_details"], removing it where a band has none.
+    Unique band ids are resolved from the cache first; the rest are fetched with at
+    most max_workers requests in flight. Returns per-run stats.
+    """
+    start = time.perf_counter()
+    
+    band_ids = list(dict.fromkeys(gig["band_id"] for gig in gigs if gig.get("band_id") is not None))
+    details: Dict[int, Optional[Dict]] = {}
+    to_fetch = []
+    
+    for band_id in band_ids:
+        entry = cache.lookup(band_id)
+        if entry:
+            details[band_id] = entry["details"]
+        else:
+            to_fetch.append(band_id)
+    
+    failed = 0
+    if to_fetch:
+        logger.info(f"Fetching details for {len(to_fetch)} bands...")
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            results = executor.map(client.get_band_details, to_fetch)
+            for band_id, band in zip(to_fetch, results):
+                summary = summarize_band_details(band) if band else None
+                if summary is None:
+                    failed += 1
+                details[band_id] = summary
+                cache.put(band_id, summary)
+    
+    # Set or cleared on every run, so details a band no longer has do not linger
+    for gig in gigs:
+        band_details = details.get(gig.get("band_id"))
+        if band_details:
+            gig["band_details"] = band_details
+        else:
+            gig.pop("band_details", None)
+    
+    cache.save()
+    
+    hits = len(band_ids) - len(to_fetch)
+    stats = {
+        "unique_bands": len(band_ids),
+        "cache_hits": hits,
+        "fetched": len(to_fetch),
+        "not_found": failed,
+        "hit_rate": round(hits / len(band_ids), 3) if band_ids else 0.0,
+        "seconds": round(time.perf_counter() - start, 3)
+    }
+    logger.info(f"Band enrichment: {hits}/{len(band_ids)} from cache, {len(to_fetch)} fetched "
+                f"in {stats['seconds']}s")
+    return stats
@@ -0,0 +1,4 @@
+"""
+Offline benchmarks and load-test tooling for Swiss Bandmap.
+Run modules from the repository root, e.g. `python -m benchmarks.fetcher`.
+"""
@@ -0,0 +1,106 @@
+"""
+Show that map building and the preprocessing geometry step scale linearly with the number of
+municipalities with gigs, now that features are looked up in a FeatureIndex instead of a scan.
+    
+    python -m benchmarks.feature_index --sizes 250 500 1000 2175
+
+Municipalities are synthetic polygons on a grid, every one of them with a gig. For each size the
+benchmark times the lookups alone (index vs. the former scan over all features), then the whole
+create_interactive_map and simplify_municipality_features. Linear scaling shows as a constant
+time per municipality.
+"""
+import argparse
+import logging
+import math
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+from geo_processor import FeatureIndex
+from refresh_state import RefreshState
+
+SAMPLE_GIG = {
+    "band_name": "Sample Band", "band_url": "https://mx3.ch/sampleband", "date": "2025-09-04T18:00:00Z",
+    "venue": "Sample Venue", "location": "Sample", "event_name": "Sample Event"
+}
+
+
+def synthetic_geo_data(count: int, vertices: int = 60) -> Dict:
+    """count municipalities as near-circular polygons with `vertices` points each, on a grid over Switzerland"""
+    columns = math.ceil(math.sqrt(count))
+    features = []
+    for i in range(count):
+        lon, lat = 6.0 + 0.1 * (i % columns), 45.8 + 0.05 * (i // columns)
+        ring = [
+            [lon + 0.04 * math.cos(2 * math.pi * k / vertices) * (1 + 0.1 * (k % 3)),
+             lat + 0.02 * math.sin(2 * math.pi * k / vertices) * (1 + 0.1 * (k % 3))]
+            for k in range(vertices)
+        ]
+        features.append({
+            "type": "Feature",
+            "properties": {"gemeinde.NAME": f"Gemeinde {i}", "gemeinde.BFS_NUMMER": i + 1, "kanton.KUERZEL": "ZH"},
+            "geometry": {"type": "Polygon", "coordinates": [ring + [ring[0]]]}
+        })
+    return {"type": "FeatureCollection", "features": features}
+
+
+def scan_feature(geo_data: Dict, municipality_name: str) -> Optional[Dict]:
+    """The lookup create_interactive_map and preprocess_all_data used before the index"""
+    for feature in geo_data.get("features", []):
+        props = feature.get("properties", {})
+        feature_name = props.get("gemeinde.NAME") or props.get("NAME") or props.get("name")
+        if feature_name == municipality_name:
+            return feature
+    return None
+
+
+def timed(func, repeat: int = 3) -> float:
+    """Best of `repeat` runs"""
+    best = math.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[250, 500, 1000, 2175])
+    args = parser.parse_args()
+    
+    logging.disable(logging.WARNING)
+    # Imported late: app configures the Streamlit page and logging on import
+    from app import create_interactive_map
+    from preprocess_data import simplify_municipality_features
+    
+    print(f"{'municipalities':>14} {'scan lookups':>14} {'index build+lookups':>20} "
+          f"{'map build':>16} {'simplify':>16}")
+    for size in args.sizes:
+        geo_data = synthetic_geo_data(size)
+        municipality_gigs: Dict[str, List[Dict]] = {
+            feature["properties"]["gemeinde.NAME"]: [SAMPLE_GIG] for feature in geo_data["features"]
+        }
+        
+        def index_lookups():
+            feature_index = FeatureIndex(geo_data)
+            return [feature_index.get(name) for name in municipality_gigs]
+        
+        scan = timed(lambda: [scan_feature(geo_data, name) for name in municipality_gigs])
+        index = timed(index_lookups)
+        feature_index = FeatureIndex(geo_data)
+        map_build = timed(lambda: create_interactive_map(municipality_gigs, geo_data, feature_index))
+        with tempfile.TemporaryDirectory() as directory:
+            state = RefreshState(f"{directory}/refresh_state.json", "benchmark")
+            # One run: later runs would reuse the geometries cached in the state
+            simplify = timed(lambda: simplify_municipality_features(municipality_gigs, feature_index, state), repeat=1)
+        
+        def per_item(seconds: float) -> str:
+            return f"{seconds * 1000:7.1f} ms ({seconds / size * 1e6:5.0f} us/m)"
+        
+        print(f"{size:>14} {scan * 1000:>11.1f} ms {index * 1000:>17.2f} ms "
+              f"{per_item(map_build):>16} {per_item(simplify):>16}")
+
+
+if __name__ == "__main__":
+    main()
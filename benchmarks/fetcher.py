@@ -0,0 +1,112 @@
+"""
+Load-test the MX3 fetchers against the local mock API and report wall time, throughput
+and request latency percentiles.
+    
+    python -m benchmarks.fetcher --latency-ms 80 --gigs-per-canton 250 --workers 8
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+from typing import Callable, Dict, List
+from unittest.mock import patch
+
+from benchmarks.mock_mx3_server import MockMX3Server
+from rate_limiter import RequestMetrics
+
+
+def run_scenario(name: str, server: MockMX3Server, fetch: Callable[[], int]) -> Dict:
+    """Run one fetch variant against a freshly reset server"""
+    server.reset_stats()
+    start = time.perf_counter()
+    gigs = fetch()
+    wall = time.perf_counter() - start
+    
+    latencies = list(server.latencies)
+    return {
+        "scenario": name,
+        "wall_s": wall,
+        "gigs": gigs,
+        "requests": server.requests,
+        "req_per_s": server.requests / wall if wall else 0.0,
+        "gigs_per_s": gigs / wall if wall else 0.0,
+        "p50_ms": RequestMetrics.percentile(latencies, 50) * 1000,
+        "p95_ms": RequestMetrics.percentile(latencies, 95) * 1000,
+        "p99_ms": RequestMetrics.percentile(latencies, 99) * 1000,
+        "peak_in_flight": server.peak_in_flight,
+        "injected_failures": server.errors_injected + server.throttles_injected
+    }
+
+
+def print_report(results: List[Dict]) -> None:
+    header = (f"{'scenario':<22}{'wall s':>8}{'gigs':>8}{'reqs':>6}{'req/s':>8}{'gigs/s':>9}"
+              f"{'p50 ms':>8}{'p95 ms':>8}{'p99 ms':>8}{'peak':>6}{'fail':>6}")
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(f"{r['scenario']:<22}{r['wall_s']:>8.2f}{r['gigs']:>8}{r['requests']:>6}{r['req_per_s']:>8.1f}"
+              f"{r['gigs_per_s']:>9.0f}{r['p50_ms']:>8.1f}{r['p95_ms']:>8.1f}{r['p99_ms']:>8.1f}"
+              f"{r['peak_in_flight']:>6}{r['injected_failures']:>6}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--gigs-per-canton", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--latency-jitter-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--rate-limit", type=float, default=None,
+                        help="Override RATE_LIMIT_PER_SECOND (default: use config)")
+    parser.add_argument("--scenarios", default="sequential,threaded,streaming,async")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.ERROR)
+    logging.getLogger().setLevel(logging.ERROR)
+    
+    server = MockMX3Server(
+        gigs_per_canton=args.gigs_per_canton, latency_ms=args.latency_ms,
+        latency_jitter_ms=args.latency_jitter_ms, error_rate=args.error_rate, throttle_rate=args.throttle_rate
+    ).start()
+    
+    os.environ.setdefault("CONSUMER_KEY", "benchmark")
+    os.environ.setdefault("CONSUMER_SECRET", "benchmark")
+    
+    import data_fetcher
+    import async_data_fetcher
+    
+    # Point both clients at the mock; cold runs, with no response cache or shared token between scenarios
+    endpoints = {"API_BASE_URL": server.url, "OAUTH_URL": server.oauth_url}
+    overrides = dict(endpoints, HTTP_CACHE_ENABLED=False, TOKEN_STORE_ENABLED=False)
+    if args.rate_limit:
+        overrides.update(RATE_LIMIT_PER_SECOND=args.rate_limit, RATE_LIMIT_BURST=args.rate_limit)
+    
+    def fetch_all(max_workers: int) -> int:
+        data_fetcher.fetch_all_swiss_gigs.clear()
+        return len(data_fetcher.fetch_all_swiss_gigs(max_workers=max_workers))
+    
+    async def fetch_async() -> int:
+        async with async_data_fetcher.AsyncMX3APIClient(max_concurrency=args.workers) as client:
+            return len(await client.fetch_all_gigs())
+    
+    scenarios = {
+        "sequential": lambda: fetch_all(1),
+        "threaded": lambda: fetch_all(args.workers),
+        "streaming": lambda: sum(1 for _ in data_fetcher.iter_swiss_gigs(max_workers=args.workers)),
+        "async": lambda: asyncio.run(fetch_async())
+    }
+    
+    results = []
+    with patch.multiple(data_fetcher, **overrides), patch.multiple(async_data_fetcher, **endpoints):
+        for name in args.scenarios.split(","):
+            results.append(run_scenario(f"{name} (x{args.workers})" if name != "sequential" else name,
+                                        server, scenarios[name]))
+    
+    server.stop()
+    print_report(results)
+
+
+if __name__ == "__main__":
+    main()
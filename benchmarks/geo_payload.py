@@ -0,0 +1,82 @@
+"""
+Measure what the simplified GeoJSON format costs: bytes on disk, json.load time, and bytes sent
+to the browser (the rendered map page, raw and gzipped), for the former format (3D coordinates
+at full double precision, indent=2) against compact JSON with 2D coordinates rounded to a few
+decimals (GEOJSON_PRECISION).
+    
+    python -m benchmarks.geo_payload --geo data/simplified_geo.json --precisions 6 5 4
+
+Run it on a file written before the change (like the one in the repository) to compare.
+"""
+import argparse
+import gzip
+import json
+import logging
+import os
+import tempfile
+import time
+from typing import Dict, List
+
+import numpy as np
+import shapely
+
+from geometry_simplifier import parse_geometry, reduce_precision
+
+
+def rounded_features(features: List[Dict], precision: int) -> List[Dict]:
+    """The features with 2D geometries rounded to `precision` decimals"""
+    geometries = np.array([parse_geometry(feature["geometry"]) for feature in features], dtype=object)
+    rounded = shapely.to_geojson(reduce_precision(geometries, precision))
+    return [{**feature, "geometry": json.loads(geometry)} for feature, geometry in zip(features, rounded)]
+
+
+def load_seconds(path: str, repeat: int = 20) -> float:
+    """Best of `repeat` json.load runs"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with open(path, "r") as f:
+            json.load(f)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--geo", default="data/simplified_geo.json")
+    parser.add_argument("--gigs", default="data/municipality_gigs.json")
+    parser.add_argument("--precisions", type=int, nargs="+", default=[6, 5, 4])
+    args = parser.parse_args()
+    
+    logging.disable(logging.WARNING)
+    # Imported late: app configures the Streamlit page and logging on import
+    from app import create_interactive_map
+    
+    with open(args.geo, "r") as f:
+        geo_data = json.load(f)
+    with open(args.gigs, "r") as f:
+        municipality_gigs = json.load(f)
+    features = geo_data["features"]
+    
+    variants = [("indent=2, as loaded", geo_data, {"indent": 2})]
+    variants.append(("compact, as loaded", geo_data, {"separators": (",", ":")}))
+    for precision in args.precisions:
+        variants.append((f"compact, 2D, {precision} decimals",
+                         {**geo_data, "features": rounded_features(features, precision)},
+                         {"separators": (",", ":")}))
+    
+    print(f"{len(features)} features from {args.geo}")
+    print(f"{'format':>26} {'disk bytes':>11} {'json.load':>10} {'page bytes':>11} {'gzipped':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        for name, data, dump_options in variants:
+            path = os.path.join(directory, "geo.json")
+            with open(path, "w") as f:
+                json.dump(data, f, **dump_options)
+            
+            page = create_interactive_map(municipality_gigs, data).get_root().render().encode("utf-8")
+            print(f"{name:>26} {os.path.getsize(path):>11} {load_seconds(path) * 1000:>7.2f} ms "
+                  f"{len(page):>11} {len(gzip.compress(page)):>9}")
+
+
+if __name__ == "__main__":
+    main()
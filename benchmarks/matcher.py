@@ -0,0 +1,152 @@
+"""
+Compare the Aho-Corasick municipality matcher with the original linear scan, time the
+fuzzy fallback on the locations it leaves unmatched, and compare canton-first resolution
+with national-only resolution.
+    
+    python -m benchmarks.matcher --gigs 100000 --municipalities 2175
+
+Locations (with their canton) are sampled from data/processed_gigs.json; if the local GeoJSON has fewer
+municipalities than requested, the list is padded with synthetic names (spread over the cantons at random).
+The linear scan is timed on a sample and extrapolated, since it takes minutes at 100k gigs.
+"""
+import argparse
+import json
+import random
+import time
+from typing import Dict, List, Optional
+
+from benchmarks.mock_mx3_server import SAMPLE_GIGS_PATH, load_sample_gigs
+from config import SWISS_CANTONS
+from geo_processor import get_municipality_names, get_municipality_cantons
+from fuzzy_matcher import FuzzyMatcher
+from location_matchers import LocationMatchers, location_keys
+from municipality_matcher import MunicipalityMatcher
+from normalizer import normalize_municipality_name, normalize_many
+
+SYLLABLES = ["ber", "wil", "dorf", "au", "ried", "bach", "lin", "gen", "ach", "mont", "ville", "hof", "stein"]
+
+
+def linear_match(location_text: str, municipality_names: List[str]) -> Optional[str]:
+    """find_municipality_match as it was before the automaton: one substring test per name"""
+    if not location_text or not municipality_names:
+        return None
+    
+    normalized_location = normalize_municipality_name(location_text)
+    best_match = None
+    longest_match_length = 0
+    for municipality in municipality_names:
+        normalized_municipality = normalize_municipality_name(municipality)
+        if normalized_municipality and normalized_municipality in normalized_location:
+            if len(normalized_municipality) > longest_match_length:
+                longest_match_length = len(normalized_municipality)
+                best_match = municipality
+    return best_match
+
+
+def sample_locations() -> List[Dict]:
+    """Sample (location, canton) pairs; the raw sample payloads do not carry the canton"""
+    try:
+        with open(SAMPLE_GIGS_PATH, "r", encoding="utf-8") as f:
+            gigs = json.load(f)
+    except FileNotFoundError:
+        gigs = load_sample_gigs()
+    return [{"location": gig["location"], "canton": gig.get("canton")} for gig in gigs if gig.get("location")]
+
+
+def municipality_list(count: int, rng: random.Random) -> List[str]:
+    names = list(get_municipality_names())
+    seen = {normalize_municipality_name(name) for name in names}
+    while len(names) < count:
+        name = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+        if normalize_municipality_name(name) not in seen:
+            seen.add(normalize_municipality_name(name))
+            names.append(name)
+    return sorted(names[:count])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--gigs", type=int, default=100_000)
+    parser.add_argument("--municipalities", type=int, default=2175)
+    parser.add_argument("--linear-sample", type=int, default=2000,
+                        help="Locations to time the linear scan on (and to cross-check results)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    
+    rng = random.Random(args.seed)
+    names = municipality_list(args.municipalities, rng)
+    sample_gigs = sample_locations()
+    gigs = [rng.choice(sample_gigs) for _ in range(args.gigs)]
+    locations = [gig["location"] for gig in gigs]
+    
+    start = time.perf_counter()
+    matcher = MunicipalityMatcher(names)
+    build = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    matches = [matcher.match(location) for location in locations]
+    automaton = time.perf_counter() - start
+    
+    sample = locations[:args.linear_sample]
+    start = time.perf_counter()
+    linear_matches = [linear_match(location, names) for location in sample]
+    linear = (time.perf_counter() - start) * len(locations) / max(1, len(sample))
+    
+    mismatches = sum(1 for a, b in zip(matches, linear_matches) if a != b)
+    matched = sum(1 for match in matches if match)
+    
+    print(f"{len(locations)} gigs, {len(names)} municipalities, {matched} matched")
+    print(f"automaton build:   {build * 1000:8.1f} ms")
+    print(f"automaton match:   {automaton:8.2f} s  ({automaton / len(locations) * 1e6:.1f} us/gig)")
+    print(f"linear scan (est): {linear:8.2f} s  ({linear / len(locations) * 1e6:.1f} us/gig, "
+          f"timed on {len(sample)} gigs)")
+    print(f"speedup:           {linear / automaton:8.0f}x")
+    print(f"mismatches on sample: {mismatches}")
+    
+    # Fuzzy fallback: only distinct locations without an exact match reach it
+    unmatched = sorted({location for location, match in zip(locations, matches) if location and not match})
+    start = time.perf_counter()
+    fuzzy = FuzzyMatcher(names)
+    fuzzy_build = time.perf_counter() - start
+    start = time.perf_counter()
+    fuzzy_matches = [fuzzy.match(location) for location in unmatched]
+    fuzzy_seconds = time.perf_counter() - start
+    
+    print(f"\nfuzzy index build: {fuzzy_build * 1000:8.1f} ms ({len(fuzzy.index)} trigrams)")
+    print(f"fuzzy fallback:    {fuzzy_seconds * 1000:8.1f} ms for {len(unmatched)} unmatched locations "
+          f"({fuzzy_seconds / max(1, len(unmatched)) * 1e6:.0f} us/location), "
+          f"{sum(1 for match in fuzzy_matches if match)} resolved")
+    
+    # Canton-first: each distinct (canton, location) against its canton's matchers, then nationally
+    known_cantons = get_municipality_cantons()
+    names_by_canton = {}
+    for name in names:
+        canton = known_cantons.get(name) or rng.choice(SWISS_CANTONS)
+        names_by_canton.setdefault(canton, []).append(name)
+    national = LocationMatchers(matcher, fuzzy)
+    canton_first = LocationMatchers(matcher, fuzzy, {
+        canton: (MunicipalityMatcher(canton_names), FuzzyMatcher(canton_names))
+        for canton, canton_names in names_by_canton.items()
+    })
+    keys = sorted({key for key in location_keys(gigs, normalize_many(locations)) if key})
+    raw_locations = dict(zip(location_keys(gigs, normalize_many(locations)), locations))
+    
+    results = {}
+    for label, matchers in (("national only", national), ("canton first", canton_first)):
+        start = time.perf_counter()
+        results[label] = [
+            matchers.resolve(raw_locations[key], key.split("|", 1)[1], key.split("|", 1)[0] or None)
+            for key in keys
+        ]
+        seconds = time.perf_counter() - start
+        print(f"{label + ':':18} {seconds * 1000:8.1f} ms for {len(keys)} (canton, location) pairs "
+              f"({seconds / max(1, len(keys)) * 1e6:.1f} us/pair)")
+    
+    scopes = [scope for _, scope in results["canton first"]]
+    changed = sum(1 for a, b in zip(results["national only"], results["canton first"]) if a[0] != b[0])
+    print(f"canton fallbacks:  {scopes.count('fallback'):8} of {len(keys)} pairs "
+          f"({scopes.count('canton')} matched in their canton); {changed} results differ from national-only")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+Local stand-in for the SRG SSR MX3 API, serving synthetic gigs in the real payload shape.
+    
+    python -m benchmarks.mock_mx3_server --port 8765 --latency-ms 80 --error-rate 0.02
+
+Then point the fetcher at it with MX3_API_BASE_URL=http://127.0.0.1:8765 and
+MX3_OAUTH_URL=http://127.0.0.1:8765/oauth/v1/accesstoken.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Dict, Optional
+from urllib.parse import urlparse, parse_qs
+
+from config import SWISS_CANTONS
+
+SAMPLE_GIGS_PATH = "data/processed_gigs.json"
+
+
+def raw_gig_from_processed(gig: Dict) -> Dict:
+    """Turn a processed gig back into the shape of an MX3 /gigs performance"""
+    return {
+        "date": gig.get("date"),
+        "name": gig.get("event_name"),
+        "band_name": gig.get("band_name"),
+        "stage_name": gig.get("venue"),
+        "location": gig.get("location"),
+        "location_url": gig.get("venue_url"),
+        "band": {
+            "id": gig.get("band_id"),
+            "url_for_image_thumb": gig.get("band_image_thumb"),
+            "categories": [{"name": name} for name in gig.get("band_categories", [])]
+        }
+    }
+
+
+def load_sample_gigs(path: str = SAMPLE_GIGS_PATH) -> List[Dict]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return [raw_gig_from_processed(gig) for gig in json.load(f)]
+    except FileNotFoundError:
+        return [{
+            "date": "2025-09-04T18:00:00.000Z", "name": "Sample Event", "band_name": "Sample Band",
+            "stage_name": "Sample Venue", "location": "Zürich", "location_url": None,
+            "band": {"id": 1, "url_for_image_thumb": None, "categories": [{"name": "Rock"}]}
+        }]
+
+
+def synthesize_gigs(sample: List[Dict], canton: str, count: int, seed: int = 0) -> List[Dict]:
+    """Deterministic synthetic gigs for a canton, drawn from the sample payloads"""
+    rng = random.Random(f"{seed}:{canton}")
+    gigs = []
+    for i in range(count):
+        gig = json.loads(json.dumps(rng.choice(sample)))
+        gig["band"]["id"] = rng.randint(1, 200000)
+        gig["band_name"] = f"{gig['band_name']} #{i}"
+        gigs.append(gig)
+    return gigs
+
+
+class MockMX3Server(ThreadingHTTPServer):
+    """
+    Threaded HTTP server with per-canton gig payloads, artificial latency and failure injection.
+    Records request counts, server-side latencies and peak concurrency.
+    """
+    daemon_threads = True
+    
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, gigs_per_canton: int = 20,
+                 latency_ms: float = 0.0, latency_jitter_ms: float = 0.0, error_rate: float = 0.0,
+                 throttle_rate: float = 0.0, retry_after: float = 0.1, seed: int = 0,
+                 sample: Optional[List[Dict]] = None):
+        super().__init__((host, port), MockMX3Handler)
+        self.latency_ms = latency_ms
+        self.latency_jitter_ms = latency_jitter_ms
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        
+        sample = sample or load_sample_gigs()
+        self.gigs = {canton: synthesize_gigs(sample, canton, gigs_per_canton, seed) for canton in SWISS_CANTONS}
+        
+        self.lock = threading.Lock()
+        self.reset_stats()
+    
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    @property
+    def oauth_url(self) -> str:
+        return f"{self.url}/oauth/v1/accesstoken"
+    
+    def reset_stats(self) -> None:
+        with self.lock:
+            self.requests = 0
+            self.token_requests = 0
+            self.errors_injected = 0
+            self.throttles_injected = 0
+            self.in_flight = 0
+            self.peak_in_flight = 0
+            self.latencies: List[float] = []
+    
+    def start(self) -> "MockMX3Server":
+        """Serve on a background thread"""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+    
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+    
+    def draw(self, rate: float) -> bool:
+        with self.lock:
+            return self.rng.random() < rate
+    
+    def delay(self) -> float:
+        with self.lock:
+            jitter = self.rng.uniform(-self.latency_jitter_ms, self.latency_jitter_ms)
+        return max(0.0, self.latency_ms + jitter) / 1000
+
+
+class MockMX3Handler(BaseHTTPRequestHandler):
+    """Routes /oauth/v1/accesstoken, /gigs and /bands/{id} (optionally under /mx3/v2)"""
+    
+    def log_message(self, format, *args):
+        pass
+    
+    def _send_json(self, payload: Dict, status: int = 200, headers: Optional[Dict] = None) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def do_POST(self):
+        with self.server.lock:
+            self.server.token_requests += 1
+        self._send_json({"access_token": "mock_token", "token_type": "BearerToken", "expires_in": 604800})
+    
+    def do_GET(self):
+        server = self.server
+        start = time.perf_counter()
+        with server.lock:
+            server.requests += 1
+            server.in_flight += 1
+            server.peak_in_flight = max(server.peak_in_flight, server.in_flight)
+        
+        try:
+            time.sleep(server.delay())
+            self._route()
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+                server.latencies.append(time.perf_counter() - start)
+    
+    def _route(self):
+        server = self.server
+        parsed = urlparse(self.path)
+        path = parsed.path[len("/mx3/v2"):] if parsed.path.startswith("/mx3/v2") else parsed.path
+        query = parse_qs(parsed.query)
+        
+        if server.throttle_rate and server.draw(server.throttle_rate):
+            with server.lock:
+                server.throttles_injected += 1
+            self._send_json({"error": "rate limited"}, status=429, headers={"Retry-After": str(server.retry_after)})
+            return
+        if server.error_rate and server.draw(server.error_rate):
+            with server.lock:
+                server.errors_injected += 1
+            self._send_json({"error": "unavailable"}, status=503)
+            return
+        
+        if path == "/gigs":
+            gigs = server.gigs.get(query.get("state_code", [""])[0], [])
+            if "per_page" in query:
+                per_page = int(query["per_page"][0])
+                page = int(query.get("page", ["1"])[0])
+                gigs = gigs[(page - 1) * per_page:page * per_page]
+            self._send_json({"response": {"status": "Ok", "performances": gigs}})
+        elif path.startswith("/bands/") and path.rsplit("/", 1)[1].isdigit():
+            band_id = int(path.rsplit("/", 1)[1])
+            band = {"id": band_id, "name": f"Band {band_id}", "city": "Bern", "website": f"https://example.ch/{band_id}"}
+            self._send_json({"response": {"status": "Ok", "band": band}})
+        else:
+            self._send_json({"response": {"status": "Error"}}, status=404)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--gigs-per-canton", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--latency-jitter-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    
+    server = MockMX3Server(
+        args.host, args.port, gigs_per_canton=args.gigs_per_canton, latency_ms=args.latency_ms,
+        latency_jitter_ms=args.latency_jitter_ms, error_rate=args.error_rate, throttle_rate=args.throttle_rate
+    )
+    print(f"Mock MX3 API listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Compare the Unicode-folding normalizer with the original two-regex version.
+    
+    python -m benchmarks.normalizer --names 100000
+
+Reports throughput on gig locations sampled from data/processed_gigs.json, and how many
+municipality names each version maps onto the same key as another name (false collisions).
+"""
+import argparse
+import random
+import re
+import time
+from collections import Counter
+
+from benchmarks.mock_mx3_server import load_sample_gigs
+from geo_processor import get_municipality_names
+from normalizer import normalize_municipality_name, normalize_many
+
+
+def regex_normalize(name: str) -> str:
+    """normalize_municipality_name as it was: ASCII-only character class, two regex passes"""
+    if not name:
+        return ""
+    normalized = re.sub(r'[^a-zA-Z0-9\s]', '', name.lower())
+    return re.sub(r'\s+', '', normalized)
+
+
+def collisions(normalize, names) -> int:
+    counts = Counter(normalize(name) for name in set(names))
+    return sum(count for count in counts.values() if count > 1)
+
+
+def timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--names", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    
+    rng = random.Random(args.seed)
+    sample = [gig["location"] for gig in load_sample_gigs() if gig.get("location")]
+    locations = [rng.choice(sample) for _ in range(args.names)]
+    
+    results = {
+        "regex (old)": timed(lambda: [regex_normalize(name) for name in locations]),
+        "unicode fold": timed(lambda: [normalize_municipality_name(name) for name in locations]),
+        "normalize_many": timed(lambda: normalize_many(locations))
+    }
+    
+    baseline = results["regex (old)"]
+    print(f"{len(locations)} locations ({len(set(locations))} distinct)")
+    for name, seconds in results.items():
+        print(f"{name:<16}{seconds:8.3f} s  {seconds / len(locations) * 1e6:6.2f} us/name  "
+              f"{baseline / seconds:5.1f}x")
+    
+    names = get_municipality_names()
+    changed = sum(1 for name in names if regex_normalize(name) != normalize_municipality_name(name))
+    print(f"\n{len(names)} municipality names: {changed} now keep their accented letters")
+    print(f"names sharing a key: regex {collisions(regex_normalize, names)}, "
+          f"unicode fold {collisions(normalize_municipality_name, names)}")
+
+
+if __name__ == "__main__":
+    main()
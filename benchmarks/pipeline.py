@@ -0,0 +1,52 @@
+"""
+Time process_gigs_data + matching in-process vs. sharded across a process pool.
+    
+    python -m benchmarks.pipeline --gigs 200000 --workers 4
+
+Gigs are synthesized from data/processed_gigs.json. The speedup depends on the CPU count.
+"""
+import argparse
+import os
+import random
+import time
+
+from benchmarks.mock_mx3_server import load_sample_gigs, synthesize_gigs
+from config import PARALLEL_SHARD_SIZE
+from geo_processor import get_location_matchers
+from parallel_processing import process_and_match_gigs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--gigs", type=int, default=200_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--shard-size", type=int, default=PARALLEL_SHARD_SIZE)
+    parser.add_argument("--street-numbers", type=int, default=500,
+                        help="Append up to this many street numbers to locations, as in archive data with "
+                             "many distinct spellings (0: only the sample's locations)")
+    args = parser.parse_args()
+    
+    raw_gigs = synthesize_gigs(load_sample_gigs(), "ZH", args.gigs)
+    rng = random.Random(0)
+    for gig in raw_gigs:
+        if args.street_numbers and gig.get("location"):
+            gig["location"] = f"{gig['location']} {rng.randint(1, args.street_numbers)}"
+    get_location_matchers()  # build the matchers up front, as a long-running process would
+    
+    start = time.perf_counter()
+    expected = process_and_match_gigs(raw_gigs, max_workers=1)
+    sequential = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    result = process_and_match_gigs(raw_gigs, max_workers=args.workers, min_parallel_gigs=0,
+                                    shard_size=args.shard_size)
+    pooled = time.perf_counter() - start
+    
+    print(f"{args.gigs} gigs, {args.workers} workers ({os.cpu_count()} CPUs), shards of {args.shard_size}")
+    print(f"in-process:   {sequential:7.2f} s")
+    print(f"process pool: {pooled:7.2f} s  ({sequential / pooled:.1f}x)")
+    print(f"identical result: {result == expected}")
+
+
+if __name__ == "__main__":
+    main()
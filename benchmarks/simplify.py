@@ -0,0 +1,63 @@
+"""
+Compare the former per-feature Shapely simplification with the batched simplifier, for both
+Douglas-Peucker and Visvalingam, reporting time and vertex/byte reduction.
+    
+    python -m benchmarks.simplify --municipalities 2175 --vertices 400 --tolerances 0.001 0.003 0.007
+
+Municipalities are synthetic, detailed polygons (3D coordinates, like the source GeoJSON) on a grid.
+"""
+import argparse
+import math
+import time
+from typing import Dict, List
+
+from shapely.geometry import shape
+
+from geometry_simplifier import DOUGLAS_PEUCKER, VISVALINGAM, simplify_geometries
+
+
+def detailed_geometries(count: int, vertices: int) -> List[Dict]:
+    """Valid star-shaped polygons with borders wiggling at several frequencies"""
+    columns = math.ceil(math.sqrt(count))
+    geometries = []
+    for i in range(count):
+        lon, lat = 6.0 + 0.1 * (i % columns), 45.8 + 0.05 * (i // columns)
+        ring = []
+        for k in range(vertices):
+            angle = 2 * math.pi * k / vertices
+            radius = 1 + 0.06 * math.sin(37 * angle + i) + 0.03 * math.sin(113 * angle) + 0.01 * math.sin(301 * angle)
+            ring.append([lon + 0.04 * radius * math.cos(angle), lat + 0.02 * radius * math.sin(angle), 400.0 + k % 7])
+        geometries.append({"type": "Polygon", "coordinates": [ring + [ring[0]]]})
+    return geometries
+
+
+def per_feature(geometries: List[Dict], tolerance: float) -> List[Dict]:
+    """What preprocess_all_data did before: one Shapely parse and simplify call per feature"""
+    return [shape(geometry).simplify(tolerance, preserve_topology=True).__geo_interface__ for geometry in geometries]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--municipalities", type=int, default=2175)
+    parser.add_argument("--vertices", type=int, default=400)
+    parser.add_argument("--tolerances", type=float, nargs="+", default=[0.001, 0.003, 0.007])
+    args = parser.parse_args()
+    
+    geometries = detailed_geometries(args.municipalities, args.vertices)
+    print(f"{args.municipalities} municipalities, {args.municipalities * (args.vertices + 1)} vertices")
+    print(f"{'tolerance':>9} {'method':>16} {'seconds':>8} {'vertices':>10} {'bytes':>12} {'fallbacks':>9}")
+    for tolerance in args.tolerances:
+        start = time.perf_counter()
+        per_feature(geometries, tolerance)
+        print(f"{tolerance:>9} {'per feature (DP)':>16} {time.perf_counter() - start:>8.2f}")
+        
+        for method in (DOUGLAS_PEUCKER, VISVALINGAM):
+            start = time.perf_counter()
+            _, stats = simplify_geometries(geometries, tolerance, method)
+            seconds = time.perf_counter() - start
+            print(f"{tolerance:>9} {method:>16} {seconds:>8.2f} {-stats['vertices_reduction']:>10.1%} "
+                  f"{-stats['bytes_reduction']:>12.1%} {stats['fallbacks']:>9}")
+
+
+if __name__ == "__main__":
+    main()
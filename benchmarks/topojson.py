@@ -0,0 +1,101 @@
+"""
+Compare the simplified GeoJSON (every polygon simplified on its own) with the TopoJSON export
+(shared borders simplified once) for municipalities that border each other: payload bytes,
+time, and the slivers (overlaps) and gaps along borders after simplification.
+    
+    python -m benchmarks.topojson --municipalities 2175 --vertices 100 --tolerances 0.001 0.003 0.007
+
+Municipalities are cells of a grid over Switzerland whose borders are detailed wiggly lines,
+each shared by the two cells on either side.
+"""
+import argparse
+import json
+import math
+import time
+from typing import Dict, List
+
+import shapely
+from shapely.geometry import shape
+
+from geometry_simplifier import simplify_geometries
+from topojson_export import build_topology, topology_features
+
+CELL_WIDTH, CELL_HEIGHT = 0.08, 0.05
+
+
+def border(start: List[float], end: List[float], vertices: int, seed: int) -> List[List[float]]:
+    """Wiggly line from start to end (both included), the same for both cells it separates"""
+    points = []
+    for k in range(vertices + 1):
+        t = k / vertices
+        offset = (0.008 * math.sin(7 * math.pi * t + seed) + 0.003 * math.sin(23 * math.pi * t)) * math.sin(math.pi * t)
+        x = start[0] + t * (end[0] - start[0]) + offset * (end[1] != start[1])
+        y = start[1] + t * (end[1] - start[1]) + offset * (end[0] != start[0])
+        points.append([x, y])
+    return points
+
+
+def grid_features(count: int, vertices: int) -> List[Dict]:
+    """count adjacent grid cells whose sides have `vertices` segments each"""
+    columns = math.ceil(math.sqrt(count))
+    rows = math.ceil(count / columns)
+    corner = lambda column, row: [6.0 + column * CELL_WIDTH, 45.8 + row * CELL_HEIGHT]
+    horizontal = {(c, r): border(corner(c, r), corner(c + 1, r), vertices, c * 31 + r)
+                  for c in range(columns) for r in range(rows + 1)}
+    vertical = {(c, r): border(corner(c, r), corner(c, r + 1), vertices, c * 17 + r * 7)
+                for c in range(columns + 1) for r in range(rows)}
+    
+    features = []
+    for i in range(count):
+        c, r = i % columns, i // columns
+        ring = (horizontal[c, r][:-1] + vertical[c + 1, r][:-1]
+                + horizontal[c, r + 1][::-1][:-1] + vertical[c, r][::-1][:-1])
+        # Like real rings, start somewhere along a border rather than at a corner
+        start = (i * 37) % len(ring)
+        ring = ring[start:] + ring[:start + 1]
+        features.append({"type": "Feature", "properties": {"name": f"Gemeinde {i}"},
+                         "geometry": {"type": "Polygon", "coordinates": [ring]}})
+    return features
+
+
+def border_errors(geometries: List[Dict]) -> Dict[str, float]:
+    """Overlap and gap area between the cells, relative to their total area"""
+    polygons = [shape(geometry) for geometry in geometries]
+    total = sum(polygon.area for polygon in polygons)
+    union = shapely.union_all(polygons)
+    overlap = max(total - union.area, 0.0)
+    gaps = shapely.Polygon(union.exterior).area - union.area if union.geom_type == "Polygon" else float("nan")
+    return {"overlap": overlap / total, "gaps": gaps / total}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--municipalities", type=int, default=2175)
+    parser.add_argument("--vertices", type=int, default=100)
+    parser.add_argument("--tolerances", type=float, nargs="+", default=[0.001, 0.003, 0.007])
+    args = parser.parse_args()
+    
+    features = grid_features(args.municipalities, args.vertices)
+    print(f"{args.municipalities} adjacent municipalities, "
+          f"{len(json.dumps(features, separators=(',', ':')))} bytes of GeoJSON")
+    print(f"{'tolerance':>9} {'format':>8} {'seconds':>8} {'bytes':>10} {'overlap':>9} {'gaps':>9}")
+    for tolerance in args.tolerances:
+        start = time.perf_counter()
+        geometries, _ = simplify_geometries([feature["geometry"] for feature in features], tolerance)
+        seconds = time.perf_counter() - start
+        payload = len(json.dumps([{**feature, "geometry": geometry} for feature, geometry in zip(features, geometries)],
+                                 separators=(",", ":")))
+        errors = border_errors(geometries)
+        print(f"{tolerance:>9} {'geojson':>8} {seconds:>8.2f} {payload:>10} "
+              f"{errors['overlap']:>9.4%} {errors['gaps']:>9.4%}")
+        
+        start = time.perf_counter()
+        topology, stats = build_topology(features, tolerance=tolerance)
+        seconds = time.perf_counter() - start
+        errors = border_errors([feature["geometry"] for feature in topology_features(topology)])
+        print(f"{tolerance:>9} {'topojson':>8} {seconds:>8.2f} {stats['bytes']:>10} "
+              f"{errors['overlap']:>9.4%} {errors['gaps']:>9.4%}")
+
+
+if __name__ == "__main__":
+    main()
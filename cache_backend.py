@@ -0,0 +1,91 @@
+"""
+Pluggable memoization for the fetch/process core, so it runs without Streamlit
+"""
+import functools
+import inspect
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+MISSING = object()
+
+
+class MemoryCache:
+    """In-process cache of function results, grouped by namespace, with optional per-entry TTL"""
+    
+    def __init__(self):
+        self._entries: Dict[str, Dict[Tuple, Tuple[Optional[float], Any]]] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, namespace: str, key: Tuple) -> Any:
+        """Return the cached value, or MISSING if absent or expired"""
+        with self._lock:
+            entry = self._entries.get(namespace, {}).get(key)
+            if entry is None:
+                return MISSING
+            expires_at, value = entry
+            if expires_at is not None and time.monotonic() >= expires_at:
+                del self._entries[namespace][key]
+                return MISSING
+            return value
+    
+    def set(self, namespace: str, key: Tuple, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._entries.setdefault(namespace, {})[key] = (expires_at, value)
+    
+    def clear(self, namespace: Optional[str] = None) -> None:
+        """Drop one namespace, or everything"""
+        with self._lock:
+            if namespace is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(namespace, None)
+
+
+_backend = MemoryCache()
+
+
+def get_cache_backend():
+    return _backend
+
+
+def set_cache_backend(backend) -> None:
+    """
+    Replace the backend used by every @cached function.
+    Any object with get(namespace, key) (returning MISSING when absent), set(namespace, key, value, ttl)
+    and clear(namespace) works.
+    """
+    global _backend
+    _backend = backend
+
+
+def cached(ttl: Optional[float] = None, ignore: Iterable[str] = ()):
+    """
+    Memoize a function on its (hashable) arguments in the current cache backend.
+    Arguments named in `ignore` (e.g. callbacks) are not part of the key.
+    Cached values are shared, not copied: callers must not mutate them.
+    The undecorated function stays available as `.__wrapped__`; `.clear()` drops its entries.
+    """
+    ignored = set(ignore)
+    
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+        namespace = f"{func.__module__}.{func.__qualname__}"
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = tuple((name, value) for name, value in bound.arguments.items() if name not in ignored)
+            
+            value = _backend.get(namespace, key)
+            if value is MISSING:
+                value = func(*args, **kwargs)
+                _backend.set(namespace, key, value, ttl)
+            return value
+        
+        wrapper.clear = lambda: _backend.clear(namespace)
+        return wrapper
+    
+    return decorator
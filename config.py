@@ -5,8 +5,8 @@ import os
 from typing import List
 
 # API Configuration
-API_BASE_URL = "https://api.srgssr.ch/mx3/v2"
-OAUTH_URL = "https://api.srgssr.ch/oauth/v1/accesstoken"
+API_BASE_URL = os.getenv("MX3_API_BASE_URL", "https://api.srgssr.ch/mx3/v2")
+OAUTH_URL = os.getenv("MX3_OAUTH_URL", "https://api.srgssr.ch/oauth/v1/accesstoken")
 
 # Swiss Canton Codes
 SWISS_CANTONS: List[str] = [
@@ -23,4 +23,91 @@ MAP_ZOOM = 8
 
 # Data Configuration
 CACHE_TTL = 3600  # 1 hour cache for data
-MAX_GIGS_PER_REQUEST = 100
\ No newline at end of file
+MAX_GIGS_PER_REQUEST = 100
+
+# Geometry simplification for the map (preprocess_data)
+SIMPLIFY_METHOD = "douglas-peucker"  # or "visvalingam"
+SIMPLIFY_TOLERANCE = 0.007  # Degrees; aggressive simplification for web performance (Visvalingam: area tolerance ** 2)
+GEOJSON_PRECISION = 5  # Decimals kept in the simplified GeoJSON (about 1 m); Z is dropped as well
+
+# TopoJSON export for the map: shared borders stored and simplified once, quantized and delta-encoded
+TOPOJSON_PATH = "data/simplified_topo.json"
+TOPOJSON_QUANTIZATION = 100000  # Grid steps per axis over the exported extent (a few metres for Switzerland)
+
+# Level-of-detail map geometry: one TopoJSON file per zoom range (up to max_zoom, None: beyond).
+# The map embeds the level of its initial zoom and fetches the others from LOD_URL, where
+# Streamlit serves LOD_DIR (server.enableStaticServing)
+LOD_DIR = "static/lod"
+LOD_URL = "app/static/lod"
+LOD_LEVELS = [
+    {"name": "cantons", "object": "cantons", "max_zoom": 7, "tolerance": 0.01},  # Dissolved cantons
+    {"name": "coarse", "object": "municipalities", "max_zoom": 9, "tolerance": SIMPLIFY_TOLERANCE},
+    {"name": "fine", "object": "municipalities", "max_zoom": None, "tolerance": 0.001}
+]
+
+# Vector tiles: every municipality with its gig count, cut into Mapbox Vector Tiles per zoom level
+# (preprocess_data) under the static dir, so Streamlit serves them next to the LOD levels;
+# the map draws them instead of the polygon layers. Only built from the full boundary file
+# (data/gemeinden.geojson), which the image does not ship; without it the map uses the LOD levels
+TILES_ENABLED = True
+TILES_DIR = "static/tiles"
+TILE_LAYER = "municipalities"
+TILE_MIN_ZOOM = 6
+TILE_MAX_ZOOM = 12  # Deeper zooms scale up these tiles
+TILE_EXTENT = 4096
+TILE_BUFFER = 64  # Tile units drawn beyond each tile edge, so outlines do not show the tile grid
+TILE_URL = os.getenv("TILE_URL", "app/static/tiles/{z}/{x}/{y}.pbf")  # Relative to the app, like LOD_URL
+
+# Fetch Configuration
+MAX_CONCURRENT_REQUESTS = 8  # Max canton requests in flight at once (1 = sequential)
+REQUEST_TIMEOUT = 30  # Seconds per HTTP request
+# Optional cap on average API requests per second per client (None: no cap; 429s and
+# Retry-After still throttle through the adaptive concurrency limit)
+RATE_LIMIT_PER_SECOND = float(os.getenv("RATE_LIMIT_PER_SECOND", "0")) or None
+RATE_LIMIT_BURST = 10
+MAX_RETRIES = 4  # Retries for 429, 5xx, timeouts and connection errors
+RETRY_BACKOFF_BASE = 0.5  # Seconds; doubled per attempt, with full jitter
+RETRY_BACKOFF_MAX = 30
+
+# Local caches (kept out of git, survive between refreshes)
+CACHE_DIR = "data/cache"
+HTTP_CACHE_ENABLED = True
+HTTP_CACHE_DIR = os.path.join(CACHE_DIR, "http")
+REFRESH_STATE_PATH = os.path.join(CACHE_DIR, "refresh_state.json")
+LOCATION_CACHE_PATH = os.path.join(CACHE_DIR, "locations.json")
+TOKEN_STORE_ENABLED = True
+TOKEN_STORE_PATH = os.path.join(CACHE_DIR, "oauth_token.json")
+# Refresh tokens proactively once less than TOKEN_REFRESH_FRACTION of their lifetime is left,
+# but never more than TOKEN_REFRESH_MARGIN seconds (a day) before they expire
+TOKEN_REFRESH_FRACTION = 0.1
+TOKEN_REFRESH_MARGIN = 24 * 3600
+
+# Process-pool processing for backfills (cantons with at least PARALLEL_MIN_GIGS gigs)
+PARALLEL_MIN_GIGS = 50000
+PARALLEL_SHARD_SIZE = 20000
+PARALLEL_MAX_WORKERS = None  # None: one per CPU
+
+# Alias table: exonyms, abbreviations and former names -> gemeinde.BFS_NUMMER
+MUNICIPALITY_ALIASES_PATH = "data/municipality_aliases.json"
+
+# Venue coordinates: gigs at these venues are assigned by point-in-polygon instead of by name
+VENUE_COORDINATES_PATH = "data/venue_coordinates.json"
+
+# Match each gig within its own canton (kanton.KUERZEL) first, nationwide only as a fallback
+CANTON_MATCHING_ENABLED = True
+
+# Match-quality report, written next to data/metadata.json by each preprocessing run
+MATCH_REPORT_PATH = "data/match_report.json"
+
+# Fuzzy Matching Configuration (fallback for locations without an exact municipality match)
+FUZZY_MATCH_ENABLED = True
+FUZZY_MATCH_THRESHOLD = 0.85  # Minimum 1 - edit distance / name length; one typo needs a 7+ letter name
+FUZZY_MATCH_MIN_NAME_LENGTH = 5
+FUZZY_MATCH_CANDIDATES = 8  # Names with the most shared trigrams that get an edit-distance check
+
+# Band Enrichment Configuration
+BAND_CACHE_PATH = os.path.join(CACHE_DIR, "bands.json")
+BAND_CACHE_TTL = 7 * 24 * 3600  # Band profiles change rarely
+BAND_CACHE_NEGATIVE_TTL = 24 * 3600  # Retry bands that could not be fetched after a day
+BAND_CACHE_MAX_ENTRIES = 20000
+BAND_DETAIL_FIELDS = ["city", "canton", "description", "url_for_image_thumb", "website"]  # Kept per gig when present
\ No newline at end of file
@@ -0,0 +1,14 @@
+"""
+Shared pytest fixtures
+"""
+import pytest
+
+from cache_backend import get_cache_backend
+
+
+@pytest.fixture(autouse=True)
+def clear_cached_functions():
+    """Start and end every test without @cached results, e.g. matchers built from patched municipalities"""
+    get_cache_backend().clear()
+    yield
+    get_cache_backend().clear()
@@ -2,16 +2,29 @@
 Data fetcher for MX3 API to retrieve live music gigs across Swiss cantons
 """
 import requests
+from requests.adapters import HTTPAdapter
 import base64
 import os
-import re
-from typing import List, Dict, Optional
+import threading
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Optional, Iterable, Iterator, Callable, Set
 from datetime import datetime, timedelta
 import logging
 from dotenv import load_dotenv
-import streamlit as st
 
-from config import API_BASE_URL, OAUTH_URL, SWISS_CANTONS
+from cache_backend import cached
+from config import (
+    API_BASE_URL, OAUTH_URL, SWISS_CANTONS, MAX_CONCURRENT_REQUESTS, MAX_GIGS_PER_REQUEST, REQUEST_TIMEOUT,
+    HTTP_CACHE_ENABLED, HTTP_CACHE_DIR, TOKEN_STORE_ENABLED, TOKEN_STORE_PATH, TOKEN_REFRESH_FRACTION, TOKEN_REFRESH_MARGIN,
+    RATE_LIMIT_PER_SECOND, RATE_LIMIT_BURST, MAX_RETRIES, RETRY_BACKOFF_BASE, RETRY_BACKOFF_MAX
+)
+from http_cache import ResponseCache
+from municipality_matcher import get_matcher
+from normalizer import normalize_municipality_name, normalize_many
+from rate_limiter import TokenBucket, AIMDConcurrencyLimiter, RequestMetrics, backoff_delay, parse_retry_after
+from token_store import TokenStore
 
 # Load environment variables
 load_dotenv()
@@ -19,54 +32,222 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# progress(completed, total, canton, error): called once per canton, from the calling thread
+ProgressCallback = Callable[[int, int, str, Optional[Exception]], None]
+
+
+def oauth_headers(consumer_key: str, consumer_secret: str) -> Dict[str, str]:
+    """Build headers for the OAuth client-credentials token request"""
+    # Create base64 encoded credentials
+    credentials = f"{consumer_key}:{consumer_secret}"
+    encoded_credentials = base64.b64encode(credentials.encode()).decode()
+    
+    return {
+        "Authorization": f"Basic {encoded_credentials}",
+        "Cache-Control": "no-cache",
+        "Content-Length": "0"
+    }
+
+
+def token_expiry(token_data: Dict) -> datetime:
+    """Calculate when a freshly issued token should be considered expired"""
+    # expires_in is in seconds, token valid for 7 days
+    expires_in = token_data.get("expires_in", 604800)  # Default to 7 days if not specified
+    return datetime.now() + timedelta(seconds=expires_in - min(3600, expires_in * 0.1))  # 1 hour buffer at most
+
+
+def token_refresh_time(token_data: Dict) -> datetime:
+    """
+    When a freshly issued token should be refreshed proactively: once TOKEN_REFRESH_FRACTION
+    of its lifetime is left, or TOKEN_REFRESH_MARGIN before it expires if that comes later
+    """
+    expires_in = token_data.get("expires_in", 604800)
+    return token_expiry(token_data) - timedelta(seconds=min(TOKEN_REFRESH_MARGIN, expires_in * TOKEN_REFRESH_FRACTION))
+
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class MX3APIError(Exception):
+    """Raised when an API request still fails after all retries"""
+
+
+def is_transient_error(error: Exception) -> bool:
+    """Whether a request failure is worth retrying or papering over with cached data"""
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return error.response.status_code in RETRYABLE_STATUS_CODES
+    return False
+
+
+def is_ok_response(data: Optional[Dict]) -> bool:
+    """Check whether an MX3 API payload reports success"""
+    return bool(data and data.get("response", {}).get("status") == "Ok")
+
 
 class MX3APIClient:
     """Client for interacting with SRG SSR MX3 API"""
     
-    def __init__(self):
+    def __init__(self, pool_size: int = MAX_CONCURRENT_REQUESTS, cache: Optional[ResponseCache] = None,
+                 token_store: Optional[TokenStore] = None, max_retries: int = MAX_RETRIES):
         self.consumer_key = os.getenv("CONSUMER_KEY")
         self.consumer_secret = os.getenv("CONSUMER_SECRET")
         self.access_token = None
         self.token_expires_at = None
+        self.token_refresh_at = None
+        self._token_lock = threading.Lock()
         
         if not self.consumer_key or not self.consumer_secret:
             raise ValueError("CONSUMER_KEY and CONSUMER_SECRET must be set in environment variables")
+        
+        # One pooled session per client so canton requests reuse TCP/TLS connections
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_size))
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        
+        # Conditional-request response cache shared across refreshes
+        if cache is None and HTTP_CACHE_ENABLED:
+            cache = ResponseCache(HTTP_CACHE_DIR)
+        self.cache = cache
+        
+        # Tokens live for days, so share them between processes and refreshes
+        if token_store is None and TOKEN_STORE_ENABLED:
+            token_store = TokenStore(TOKEN_STORE_PATH)
+        self.token_store = token_store
+        
+        # Throttling: average request rate, adaptive requests in flight, and retries
+        # Concurrency starts at half the pool and grows to all of it while requests succeed
+        self.rate_limiter = TokenBucket(RATE_LIMIT_PER_SECOND, RATE_LIMIT_BURST) if RATE_LIMIT_PER_SECOND else None
+        self.concurrency = AIMDConcurrencyLimiter(initial=max(1, pool_size // 2), maximum=max(1, pool_size))
+        self.max_retries = max_retries
+        self.metrics = RequestMetrics()
+    
+    def _has_valid_token(self) -> bool:
+        return bool(self.access_token and self.token_expires_at and datetime.now() < self.token_expires_at)
+    
+    def _has_fresh_token(self) -> bool:
+        """Valid and not yet inside the proactive refresh window"""
+        return self._has_valid_token() and datetime.now() < (self.token_refresh_at or self.token_expires_at)
     
     def _get_access_token(self) -> str:
-        """Get OAuth access token for API authentication"""
-        if self.access_token and self.token_expires_at and datetime.now() < self.token_expires_at:
+        """
+        Get OAuth access token for API authentication.
+        Tokens are shared with other processes through the token store; a token close to
+        expiry is refreshed proactively, and kept in use if that refresh fails.
+        """
+        if self._has_fresh_token():
             return self.access_token
-            
-        # Create base64 encoded credentials
-        credentials = f"{self.consumer_key}:{self.consumer_secret}"
-        encoded_credentials = base64.b64encode(credentials.encode()).decode()
-        
-        headers = {
-            "Authorization": f"Basic {encoded_credentials}",
-            "Cache-Control": "no-cache",
-            "Content-Length": "0"
-        }
         
+        # Serialize token refresh so concurrent workers don't each request a token
+        with self._token_lock:
+            if self._has_fresh_token():
+                return self.access_token
+            
+            if not self.token_store:
+                return self._refresh_access_token()
+            
+            # Another process may already have stored a fresh token
+            with self.token_store.locked():
+                stored = self.token_store.load(self.consumer_key)
+                if stored:
+                    self.access_token, self.token_expires_at, self.token_refresh_at = stored
+                    if self._has_fresh_token():
+                        logger.info("Reusing stored access token")
+                        return self.access_token
+                
+                token = self._refresh_access_token()
+                if (not stored or token != stored[0]) and self._has_valid_token():
+                    self.token_store.save(
+                        self.consumer_key, self.access_token, self.token_expires_at, self.token_refresh_at
+                    )
+                return token
+    
+    def _refresh_access_token(self) -> str:
+        """Request a new token, falling back to the current one while it is still valid"""
         try:
-            response = requests.post(f"{OAUTH_URL}?grant_type=client_credentials", headers=headers)
+            return self._request_access_token()
+        except Exception:
+            if self._has_valid_token():
+                logger.warning("Proactive token refresh failed, using current token until it expires")
+                return self.access_token
+            raise
+    
+    def _request_access_token(self) -> str:
+        """Request a new OAuth access token from the API"""
+        try:
+            response = self.session.post(
+                f"{OAUTH_URL}?grant_type=client_credentials",
+                headers=oauth_headers(self.consumer_key, self.consumer_secret),
+                timeout=REQUEST_TIMEOUT
+            )
             response.raise_for_status()
             
             token_data = response.json()
             self.access_token = token_data["access_token"]
-            
-            # Calculate expiration time (expires_in is in seconds, token valid for 7 days)
-            expires_in = token_data.get("expires_in", 604800)  # Default to 7 days if not specified
-            self.token_expires_at = datetime.now() + timedelta(seconds=expires_in - 3600)  # 1 hour buffer
+            self.token_expires_at = token_expiry(token_data)
+            self.token_refresh_at = token_refresh_time(token_data)
             
             logger.info("Successfully obtained access token")
             return self.access_token
-            
+        
         except Exception as e:
             logger.error(f"Failed to get access token: {e}")
             raise
     
+    def _send_with_retries(self, url: str, headers: Dict, params: Optional[Dict]) -> requests.Response:
+        """
+        GET url through the rate limiter (if RATE_LIMIT_PER_SECOND is set) and adaptive concurrency limiter.
+        429s, 5xx responses, timeouts and connection errors are retried with jittered
+        exponential backoff (or the server's Retry-After, capped at RETRY_BACKOFF_MAX); the last outcome is returned or raised.
+        """
+        for attempt in range(self.max_retries + 1):
+            if self.rate_limiter:
+                self.metrics.record_wait(self.rate_limiter.acquire())
+            
+            response = error = None
+            with self.concurrency.slot():
+                start = time.perf_counter()
+                try:
+                    response = self.session.get(url, headers=headers, params=params, timeout=REQUEST_TIMEOUT)
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    error = e
+                latency = time.perf_counter() - start
+            
+            throttled = response is not None and response.status_code == 429
+            retryable = error is not None or response.status_code in RETRYABLE_STATUS_CODES
+            self.metrics.record(latency, throttled=throttled, error=retryable)
+            
+            if throttled:
+                self.concurrency.on_throttle()
+            elif not retryable:
+                self.concurrency.on_success()
+                return response
+            
+            if attempt == self.max_retries:
+                break
+            
+            retry_after = None
+            if response is not None:
+                retry_after = parse_retry_after(response.headers.get("Retry-After"), RETRY_BACKOFF_MAX)
+            delay = retry_after if retry_after is not None else backoff_delay(attempt, RETRY_BACKOFF_BASE, RETRY_BACKOFF_MAX)
+            logger.warning(f"Retrying {url} in {delay:.1f}s ({error or response.status_code})")
+            self.metrics.record_retry()
+            time.sleep(delay)
+        
+        if error is not None:
+            raise error
+        return response
+    
     def _make_api_request(self, endpoint: str, params: Dict = None) -> Optional[Dict]:
-        """Make authenticated API request"""
+        """
+        Make authenticated API request.
+        With a response cache, the request is conditional on the cached validators and
+        the cached body is returned on 304 or when the request fails transiently.
+        Raises MX3APIError if a transient failure persists through all retries and there is
+        no cached body, so callers can report the failure instead of treating it as "no data".
+        """
         token = self._get_access_token()
         
         headers = {
@@ -76,123 +257,257 @@ class MX3APIClient:
         
         url = f"{API_BASE_URL}/{endpoint}"
         
+        cache_key = cached = None
+        if self.cache:
+            cache_key = self.cache.make_key(endpoint, params)
+            cached = self.cache.get(cache_key)
+            headers.update(self.cache.conditional_headers(cached))
+        
         try:
-            response = requests.get(url, headers=headers, params=params)
+            response = self._send_with_retries(url, headers, params)
+            
+            if cached and response.status_code == 304:
+                self.cache.record_hit(cached)
+                return cached["body"]
+            
             response.raise_for_status()
-            return response.json()
+            data = response.json()
             
+            if self.cache:
+                self._cache_response(cache_key, data, response)
+            return data
+        
         except Exception as e:
+            if is_transient_error(e):
+                if cached:
+                    logger.warning(f"API request failed for {url}: {e}; serving cached response")
+                    self.cache.record_stale_hit(cached)
+                    return cached["body"]
+                
+                logger.error(f"API request failed for {url} after {self.max_retries} retries: {e}")
+                raise MX3APIError(f"API request failed for {url}: {e}") from e
+            
             logger.error(f"API request failed for {url}: {e}")
             return None
     
-    def get_gigs_by_canton(self, canton_code: str) -> List[Dict]:
-        """Get all gigs for a specific canton"""
+    def _cache_response(self, cache_key: str, data: Dict, response: requests.Response) -> None:
+        """Store a downloaded response; a cache failure never fails the request"""
+        try:
+            self.cache.store(
+                cache_key, data, len(response.content),
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified")
+            )
+        except Exception as e:
+            logger.warning(f"Could not cache response: {e}")
+    
+    def iter_gig_pages(self, canton_code: str, per_page: int = MAX_GIGS_PER_REQUEST) -> Iterator[List[Dict]]:
+        """
+        Yield the gigs for a canton one page at a time.
+        Stops at the first short page, or as soon as the API ignores paging
+        (oversized page, or the same page served again). A failed first page means no gigs;
+        a page failing after a full one raises MX3APIError, as the canton would be incomplete.
+        """
+        page = 1
+        previous_first = None
+        
+        while True:
+            data = self._make_api_request("gigs", {"state_code": canton_code, "page": page, "per_page": per_page})
+            if not is_ok_response(data):
+                if page > 1:
+                    raise MX3APIError(f"Page {page} of {canton_code} failed after a full page")
+                break
+            
+            performances = data["response"].get("performances", [])
+            if not performances or performances[0] == previous_first:
+                break
+            
+            yield performances
+            
+            if len(performances) != per_page:
+                break
+            previous_first = performances[0]
+            page += 1
+    
+    def iter_gigs(self, canton_code: str, per_page: int = MAX_GIGS_PER_REQUEST) -> Iterator[Dict]:
+        """Yield gigs for a canton as each page arrives, keeping at most one page in memory"""
         logger.info(f"Fetching gigs for canton: {canton_code}")
         
-        data = self._make_api_request("gigs", {"state_code": canton_code})
+        count = 0
+        for performances in self.iter_gig_pages(canton_code, per_page):
+            count += len(performances)
+            yield from performances
         
-        if data and data.get("response", {}).get("status") == "Ok":
-            performances = data["response"].get("performances", [])
-            logger.info(f"Found {len(performances)} gigs in {canton_code}")
-            return performances
+        if count:
+            logger.info(f"Found {count} gigs in {canton_code}")
         else:
             logger.warning(f"No gigs found for canton {canton_code}")
-            return []
+    
+    def get_gigs_by_canton(self, canton_code: str) -> List[Dict]:
+        """Get all gigs for a specific canton"""
+        return list(self.iter_gigs(canton_code))
     
     def get_band_details(self, band_id: int) -> Optional[Dict]:
         """Get detailed information about a specific band"""
-        data = self._make_api_request(f"bands/{band_id}")
+        try:
+            data = self._make_api_request(f"bands/{band_id}")
+        except MX3APIError:
+            return None
         
-        if data and data.get("response", {}).get("status") == "Ok":
+        if is_ok_response(data):
             return data["response"]["band"]
         return None
 
 
-@st.cache_data(ttl=3600)  # Cache for 1 hour
-def fetch_all_swiss_gigs() -> List[Dict]:
-    """Fetch all current gigs across all Swiss cantons"""
+@cached(ttl=3600, ignore=("progress",))  # Cache for 1 hour
+def fetch_all_swiss_gigs(max_workers: int = MAX_CONCURRENT_REQUESTS,
+                         progress: Optional[ProgressCallback] = None) -> List[Dict]:
+    """
+    Fetch all current gigs across all Swiss cantons.
+    With max_workers > 1 cantons are fetched concurrently on a bounded thread pool;
+    results are always merged in SWISS_CANTONS order.
+    progress, if given, is called after each canton from the calling thread (never from a worker).
+    """
     logger.info("Starting to fetch all Swiss gigs...")
     
-    client = MX3APIClient()
-    all_gigs = []
-    
-    # Progress bar for user feedback
-    progress_bar = st.progress(0)
-    status_text = st.empty()
+    client = MX3APIClient(pool_size=max_workers)
+    gigs_by_canton: Dict[str, List[Dict]] = {}
     
-    for i, canton in enumerate(SWISS_CANTONS):
-        status_text.text(f"Fetching gigs for {canton}...")
-        
+    def record_result(i: int, canton: str, fetch) -> None:
+        error = None
         try:
-            gigs = client.get_gigs_by_canton(canton)
-            
-            # Add canton info to each gig
-            for gig in gigs:
-                gig["canton"] = canton
-                
-            all_gigs.extend(gigs)
-            
+            gigs_by_canton[canton] = fetch()
         except Exception as e:
             logger.error(f"Failed to fetch gigs for {canton}: {e}")
-            st.warning(f"Could not load gigs for canton {canton}")
+            error = e
         
-        # Update progress
-        progress_bar.progress((i + 1) / len(SWISS_CANTONS))
+        if progress:
+            progress(i + 1, len(SWISS_CANTONS), canton, error)
     
-    progress_bar.empty()
-    status_text.empty()
+    if max_workers > 1:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(client.get_gigs_by_canton, canton): canton for canton in SWISS_CANTONS}
+            for i, future in enumerate(as_completed(futures)):
+                record_result(i, futures[future], future.result)
+    else:
+        for i, canton in enumerate(SWISS_CANTONS):
+            record_result(i, canton, lambda: client.get_gigs_by_canton(canton))
+    
+    # Merge deterministically in canton order, regardless of completion order
+    all_gigs = []
+    for canton in SWISS_CANTONS:
+        gigs = gigs_by_canton.get(canton, [])
+        
+        # Add canton info to each gig
+        for gig in gigs:
+            gig["canton"] = canton
+        
+        all_gigs.extend(gigs)
     
     logger.info(f"Fetched total of {len(all_gigs)} gigs across Switzerland")
     return all_gigs
 
 
-def normalize_municipality_name(name: str) -> str:
+def iter_swiss_gigs(
+    client: Optional[MX3APIClient] = None,
+    max_workers: int = MAX_CONCURRENT_REQUESTS,
+    cantons: Iterable[str] = SWISS_CANTONS,
+    max_buffered_pages: int = 4,
+    failed_cantons: Optional[Set[str]] = None
+) -> Iterator[Dict]:
     """
-    Normalize municipality name for matching:
-    - Convert to lowercase
-    - Remove whitespaces 
-    - Remove special characters like dots, dashes, etc.
+    Stream canton-tagged gigs for all cantons, in canton order.
+    Up to max_workers cantons are paged through concurrently in the background; each
+    canton buffers at most max_buffered_pages pages, so memory stays bounded and the
+    consumer (e.g. process_gigs_data) overlaps with network I/O.
+    A canton whose fetch fails, on its first page or a later one, is logged and added to
+    failed_cantons before the stream moves on to the next canton: any of its gigs already
+    yielded are incomplete, and callers should not take them for the canton's full listing.
     """
-    if not name:
-        return ""
+    client = client or MX3APIClient(pool_size=max_workers)
+    cantons = list(cantons)
+    pages: Dict[str, queue.Queue] = {canton: queue.Queue(maxsize=max_buffered_pages) for canton in cantons}
+    stop = threading.Event()
+    end_of_canton = object()
     
-    # Convert to lowercase and remove special characters, keep only alphanumeric
-    normalized = re.sub(r'[^a-zA-Z0-9\s]', '', name.lower())
-    # Remove all whitespace
-    normalized = re.sub(r'\s+', '', normalized)
+    def put(canton: str, item) -> bool:
+        # Block while the consumer catches up, but give up once it has gone away
+        while not stop.is_set():
+            try:
+                pages[canton].put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
     
-    return normalized
+    def produce(canton: str) -> None:
+        try:
+            for performances in client.iter_gig_pages(canton):
+                if not put(canton, performances):
+                    return
+        except Exception as e:
+            put(canton, e)
+        put(canton, end_of_canton)
+    
+    # Cantons are submitted in order, so the one being consumed always has a worker
+    executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+    try:
+        for canton in cantons:
+            executor.submit(produce, canton)
+        
+        total = 0
+        for canton in cantons:
+            count = 0
+            while True:
+                item = pages[canton].get()
+                if item is end_of_canton:
+                    break
+                if isinstance(item, Exception):
+                    logger.error(f"Failed to fetch gigs for {canton} after {count} gigs: {item}")
+                    if failed_cantons is not None:
+                        failed_cantons.add(canton)
+                    continue
+                
+                for gig in item:
+                    # Add canton info to each gig
+                    gig["canton"] = canton
+                    yield gig
+                count += len(item)
+            
+            logger.info(f"Found {count} gigs in {canton}")
+            total += count
+        
+        logger.info(f"Streamed total of {total} gigs across Switzerland")
+    finally:
+        stop.set()
+        executor.shutdown(wait=False, cancel_futures=True)
 
 
 def find_municipality_match(location_text: str, municipality_names: List[str]) -> Optional[str]:
     """
     Find municipality match in location text (e.g., 'zürich roxy bar' should match 'Zürich')
-    Returns the original municipality name from the GeoJSON data if found
+    Returns the original municipality name from the GeoJSON data if found.
+    The longest contained name wins; see municipality_matcher for the prebuilt automaton.
     """
     if not location_text or not municipality_names:
         return None
     
-    # Normalize the location text for comparison
-    normalized_location = normalize_municipality_name(location_text)
-    
-    # Try to find municipality names within the location text
-    best_match = None
-    longest_match_length = 0
-    
-    for municipality in municipality_names:
-        normalized_municipality = normalize_municipality_name(municipality)
-        
-        if normalized_municipality and normalized_municipality in normalized_location:
-            # Prefer longer matches (e.g., "sanktgallen" over "gallen")
-            if len(normalized_municipality) > longest_match_length:
-                longest_match_length = len(normalized_municipality)
-                best_match = municipality
-    
-    return best_match
+    return get_matcher(municipality_names).match(location_text)
+
+
+def gig_sort_key(gig: Dict):
+    """Sort key for processed gigs: by date (oldest first), then by band name"""
+    return (
+        gig["parsed_date"] or datetime.min,
+        gig["band_name"] or ""
+    )
 
 
-def process_gigs_data(raw_gigs: List[Dict]) -> List[Dict]:
-    """Process and normalize gigs data for display"""
+def process_gigs_data(raw_gigs: Iterable[Dict]) -> List[Dict]:
+    """
+    Process and normalize gigs data for display.
+    raw_gigs may be any iterable, e.g. the iter_swiss_gigs stream.
+    """
     processed_gigs = []
     
     for gig in raw_gigs:
@@ -205,7 +520,7 @@ def process_gigs_data(raw_gigs: List[Dict]) -> List[Dict]:
                 "band_id": gig.get("band", {}).get("id"),
                 "venue": gig.get("stage_name"),
                 "location": location,
-                "location_normalized": normalize_municipality_name(location),
+                "location_normalized": None,  # filled in one batch below
                 "canton": gig.get("canton"),
                 "band_image_thumb": gig.get("band", {}).get("url_for_image_thumb"),
                 "band_categories": [cat.get("name") for cat in gig.get("band", {}).get("categories", [])],
@@ -224,17 +539,15 @@ def process_gigs_data(raw_gigs: List[Dict]) -> List[Dict]:
                 processed_gig["parsed_date"] = None
             
             processed_gigs.append(processed_gig)
-            
+        
         except Exception as e:
             logger.warning(f"Failed to process gig: {e}")
     
+    locations = normalize_many(gig["location"] for gig in processed_gigs)
+    for processed_gig, location_normalized in zip(processed_gigs, locations):
+        processed_gig["location_normalized"] = location_normalized
+    
     # Sort by date (oldest first), then by band name alphabetically
-    processed_gigs.sort(
-        key=lambda x: (
-            x["parsed_date"] or datetime.min,
-            x["band_name"] or ""
-        ),
-        reverse=False  # oldest first
-    )
+    processed_gigs.sort(key=gig_sort_key, reverse=False)  # oldest first
     
     return processed_gigs
\ No newline at end of file
@@ -0,0 +1,129 @@
+"""
+Trigram-indexed fuzzy municipality lookup, the fallback for locations without an exact match
+"""
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import List, Dict, Optional, Set, Tuple
+
+from config import FUZZY_MATCH_THRESHOLD, FUZZY_MATCH_MIN_NAME_LENGTH, FUZZY_MATCH_CANDIDATES
+from normalizer import normalize_municipality_name, normalize_many
+
+WORD_PATTERN = re.compile(r"[^\W_]+")
+MAX_SPAN_WORDS = 4  # Longest municipality names, e.g. 'Chavannes-près-Renens', are 3 words
+
+
+def trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> Optional[int]:
+    """Levenshtein distance between a and b, or None as soon as it is certain to exceed max_distance"""
+    if abs(len(a) - len(b)) > max_distance:
+        return None
+    
+    previous = list(range(len(b) + 1))
+    for i, a_char in enumerate(a, 1):
+        current = [i]
+        for j, b_char in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (a_char != b_char)
+            ))
+        if min(current) > max_distance:
+            return None
+        previous = current
+    
+    return previous[-1] if previous[-1] <= max_distance else None
+
+
+def word_spans(location_text: str, max_words: int = MAX_SPAN_WORDS) -> Set[str]:
+    """
+    Normalized runs of up to max_words consecutive words:
+    'Rapperswil-Jona' gives rapperswil, jona and rapperswiljona
+    """
+    words = [word for word in normalize_many(WORD_PATTERN.findall(location_text)) if word]
+    return {
+        "".join(words[start:end])
+        for start in range(len(words))
+        for end in range(start + 1, min(len(words), start + max_words) + 1)
+    }
+
+
+class FuzzyMatcher:
+    """
+    Resolves misspelled or variant locations (e.g. 'Winterhur' for Winterthur) to a municipality.
+    Candidates are the names sharing the most trigrams with the location; each is then scored
+    as 1 - d / len(name), where d is its edit distance to the closest run of whole words in the
+    location, so names are never matched from inside a longer word.
+    Names shorter than min_name_length are never fuzzy-matched: one typo away, they collide too often.
+    """
+    
+    def __init__(self, municipality_names: List[str], threshold: float = FUZZY_MATCH_THRESHOLD,
+                 min_name_length: int = FUZZY_MATCH_MIN_NAME_LENGTH, candidates: int = FUZZY_MATCH_CANDIDATES,
+                 aliases: Optional[Dict[str, str]] = None):
+        self.municipality_names = list(municipality_names)
+        aliases = aliases or {}
+        # As in MunicipalityMatcher: names resolve to themselves, aliases to their municipality
+        self.targets = self.municipality_names + list(aliases.values())
+        self.threshold = threshold
+        self.candidates = candidates
+        self.patterns: List[str] = []
+        self.pattern_names: List[int] = []
+        self.index: Dict[str, List[int]] = {}
+        
+        seen = set()
+        for name_index, pattern in enumerate(normalize_many(self.municipality_names + list(aliases))):
+            if len(pattern) < min_name_length or pattern in seen:
+                continue
+            seen.add(pattern)
+            
+            pattern_id = len(self.patterns)
+            self.patterns.append(pattern)
+            self.pattern_names.append(name_index)
+            for trigram in trigrams(pattern):
+                self.index.setdefault(trigram, []).append(pattern_id)
+    
+    def match(self, location_text: str) -> Optional[Tuple[str, float]]:
+        """Best (municipality name, score) for a location, or None below the threshold"""
+        if not location_text:
+            return None
+        
+        shared = Counter()
+        for trigram in trigrams(normalize_municipality_name(location_text)):
+            shared.update(self.index.get(trigram, ()))
+        if not shared:
+            return None
+        
+        spans = word_spans(location_text)
+        best = None
+        for pattern_id, _ in shared.most_common(self.candidates):
+            pattern = self.patterns[pattern_id]
+            max_distance = int(len(pattern) * (1 - self.threshold) + 1e-9)
+            distances = [d for d in (edit_distance(pattern, span, max_distance) for span in spans) if d is not None]
+            if not distances:
+                continue
+            
+            score = 1 - min(distances) / len(pattern)
+            # Prefer higher scores, then longer names, then names listed first
+            rank = (score, len(pattern), -self.pattern_names[pattern_id])
+            if best is None or rank > best[0]:
+                best = (rank, pattern_id)
+        
+        if best is None:
+            return None
+        rank, pattern_id = best
+        return self.targets[self.pattern_names[pattern_id]], round(rank[0], 3)
+
+
+@lru_cache(maxsize=64)
+def _fuzzy_matcher_for(municipality_names: Tuple[str, ...], aliases: Tuple[Tuple[str, str], ...],
+                       threshold: float) -> FuzzyMatcher:
+    return FuzzyMatcher(municipality_names, threshold=threshold, aliases=dict(aliases))
+
+
+def get_fuzzy_matcher(municipality_names: List[str], aliases: Optional[Dict[str, str]] = None,
+                      threshold: float = FUZZY_MATCH_THRESHOLD) -> FuzzyMatcher:
+    """Shared fuzzy matcher for a municipality list and alias table, built once per distinct combination"""
+    return _fuzzy_matcher_for(tuple(municipality_names), tuple((aliases or {}).items()), threshold)
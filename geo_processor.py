@@ -3,24 +3,46 @@ GeoJSON processor for Swiss municipalities data
 """
 import json
 import logging
-from typing import List, Dict, Set
-import streamlit as st
+import time
+from collections import Counter
+from typing import List, Dict, Set, Optional, Tuple
 
-from data_fetcher import normalize_municipality_name, find_municipality_match
+import numpy as np
+import shapely
+
+from cache_backend import cached
+from config import (
+    MUNICIPALITY_ALIASES_PATH, CANTON_MATCHING_ENABLED,
+    FUZZY_MATCH_ENABLED, FUZZY_MATCH_THRESHOLD, FUZZY_MATCH_MIN_NAME_LENGTH, FUZZY_MATCH_CANDIDATES
+)
+from fuzzy_matcher import get_fuzzy_matcher
+from geometry_simplifier import DOUGLAS_PEUCKER, parse_geometry, simplify_geometries
+from location_cache import LocationCache
+from location_matchers import LocationMatchers, Matchers, location_keys
+from match_report import StageTimer, build_match_report, save_match_report
+from municipality_matcher import get_matcher
+from normalizer import normalize_municipality_name, normalize_many
 
 logger = logging.getLogger(__name__)
 
 
-@st.cache_data
+# Processed output of an earlier run: only the municipalities that had gigs then
+FALLBACK_GEOJSON_PATH = "data/simplified_geo.json"
+
+
+@cached()
 def load_swiss_municipalities() -> Dict:
-    """Load and process Swiss municipalities GeoJSON data"""
+    """
+    Load and process Swiss municipalities GeoJSON data (an empty collection if none is found).
+    The path it was loaded from is kept as geo_data["source"].
+    """
     logger.info("Loading Swiss municipalities GeoJSON...")
     
     # Try multiple potential paths for GeoJSON file
     possible_paths = [
         "data/gemeinden.geojson",
         "/Users/pmuww/swiss-bandmap/data/gemeinden.geojson",
-        "data/simplified_geo.json"  # Fallback to existing processed data
+        FALLBACK_GEOJSON_PATH  # Fallback to existing processed data
     ]
     
     for path in possible_paths:
@@ -29,8 +51,9 @@ def load_swiss_municipalities() -> Dict:
                 geo_data = json.load(f)
             
             logger.info(f"Loaded {len(geo_data['features'])} municipalities from {path}")
+            geo_data["source"] = path
             return geo_data
-            
+        
         except FileNotFoundError:
             continue
         except Exception as e:
@@ -38,11 +61,15 @@ def load_swiss_municipalities() -> Dict:
             continue
     
     logger.error("Could not load any GeoJSON data")
-    st.error("Could not load Swiss municipalities data")
     return {"type": "FeatureCollection", "features": []}
 
 
-@st.cache_data
+def has_full_boundaries(geo_data: Dict) -> bool:
+    """Whether geo_data came from a full boundary file (every municipality), not from FALLBACK_GEOJSON_PATH"""
+    return geo_data.get("source") not in (None, FALLBACK_GEOJSON_PATH)
+
+
+@cached()
 def get_municipality_names() -> List[str]:
     """Extract all municipality names from GeoJSON"""
     geo_data = load_swiss_municipalities()
@@ -57,63 +84,307 @@ def get_municipality_names() -> List[str]:
     return sorted(municipality_names)
 
 
-def simplify_geojson(geo_data: Dict, tolerance: float = 0.01) -> Dict:
+@cached()
+def get_municipalities_by_bfs() -> Dict[int, str]:
+    """Municipality name per BFS number (gemeinde.BFS_NUMMER)"""
+    by_bfs = {}
+    for feature in load_swiss_municipalities().get("features", []):
+        props = feature.get("properties", {})
+        bfs_number = props.get("gemeinde.BFS_NUMMER") or props.get("BFS_NUMMER")
+        name = props.get("gemeinde.NAME") or props.get("NAME") or props.get("name")
+        if bfs_number is not None and name:
+            by_bfs[int(bfs_number)] = name
+    
+    return by_bfs
+
+
+@cached()
+def get_municipality_cantons() -> Dict[str, str]:
+    """Canton code (kanton.KUERZEL) per municipality name"""
+    cantons = {}
+    for feature in load_swiss_municipalities().get("features", []):
+        props = feature.get("properties", {})
+        name = props.get("gemeinde.NAME") or props.get("NAME") or props.get("name")
+        canton = props.get("kanton.KUERZEL") or props.get("KANTON")
+        if name and canton:
+            cantons[name] = canton
+    
+    return cantons
+
+
+class FeatureIndex:
     """
-    Simplify GeoJSON geometries for better performance
+    GeoJSON features by municipality name and by BFS number, built in one pass over the collection,
+    so finding the features of M municipalities costs O(M) instead of O(M x F)
     """
-    logger.info(f"Simplifying GeoJSON with tolerance {tolerance}")
+    
+    def __init__(self, geo_data: Dict):
+        self.by_name: Dict[str, Dict] = {}
+        self.by_bfs: Dict[int, Dict] = {}
+        for feature in geo_data.get("features", []):
+            props = feature.get("properties", {})
+            name = props.get("gemeinde.NAME") or props.get("NAME") or props.get("name")
+            bfs_number = props.get("gemeinde.BFS_NUMMER") or props.get("BFS_NUMMER")
+            # Like a scan that stops at the first hit, the first feature per key wins
+            if name:
+                self.by_name.setdefault(name, feature)
+            if bfs_number is not None:
+                self.by_bfs.setdefault(int(bfs_number), feature)
+    
+    def __len__(self) -> int:
+        return len(self.by_name)
+    
+    def get(self, name: str) -> Optional[Dict]:
+        return self.by_name.get(name)
+    
+    def get_bfs(self, bfs_number: int) -> Optional[Dict]:
+        return self.by_bfs.get(int(bfs_number))
+
+
+@cached()
+def get_feature_index() -> FeatureIndex:
+    """FeatureIndex over load_swiss_municipalities()"""
+    return FeatureIndex(load_swiss_municipalities())
+
+
+def load_municipality_aliases(path: str = MUNICIPALITY_ALIASES_PATH) -> Dict[str, int]:
+    """Alias table as alias -> BFS number, e.g. {"Genf": 6621, "Bienne": 371}"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return {alias: int(bfs_number) for alias, bfs_number in json.load(f).items()}
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        logger.error(f"Failed to load municipality aliases from {path}: {e}")
+        return {}
+
+
+@cached()
+def get_municipality_aliases() -> Dict[str, str]:
+    """
+    Alias -> current municipality name, resolved through the BFS number.
+    Aliases of municipalities missing from the loaded GeoJSON are skipped.
+    """
+    by_bfs = get_municipalities_by_bfs()
+    aliases = {}
+    for alias, bfs_number in load_municipality_aliases().items():
+        if bfs_number in by_bfs:
+            aliases[alias] = by_bfs[bfs_number]
+    
+    logger.info(f"Loaded {len(aliases)} municipality aliases")
+    return aliases
+
+
+def dissolve_cantons(geo_data: Dict, cantons: Optional[Set[str]] = None) -> List[Dict]:
+    """
+    One feature per canton (kanton.KUERZEL), the union of its municipalities' geometries, with
+    properties {"name": canton code}; only the given cantons, if any
+    """
+    geometries: Dict[str, List] = {}
+    for feature in geo_data.get("features", []):
+        props = feature.get("properties", {})
+        canton = props.get("kanton.KUERZEL") or props.get("KANTON")
+        if not canton or not feature.get("geometry") or (cantons is not None and canton not in cantons):
+            continue
+        try:
+            geometries.setdefault(canton, []).append(parse_geometry(feature["geometry"]))
+        except Exception as e:
+            logger.warning(f"Skipping a {canton} geometry that cannot be parsed: {e}")
+    
+    features = []
+    for canton, canton_geometries in sorted(geometries.items()):
+        union = shapely.union_all(shapely.make_valid(np.array(canton_geometries, dtype=object)))
+        if union.geom_type == "GeometryCollection":
+            # make_valid can leave lines and points behind; only the area is drawn
+            union = shapely.union_all([part for part in shapely.get_parts(union)
+                                       if part.geom_type in ("Polygon", "MultiPolygon")])
+        features.append({
+            "type": "Feature",
+            "properties": {"name": canton},
+            "geometry": json.loads(shapely.to_geojson(union))
+        })
+    
+    logger.info(f"Dissolved municipalities into {len(features)} cantons")
+    return features
+
+
+def simplify_geojson(geo_data: Dict, tolerance: float = 0.01, method: str = DOUGLAS_PEUCKER) -> Dict:
+    """
+    Simplify GeoJSON geometries for better performance: all features in one batch, each kept
+    valid, with Douglas-Peucker or Visvalingam (see geometry_simplifier.simplify_geometries)
+    """
+    logger.info(f"Simplifying GeoJSON with tolerance {tolerance} ({method})")
+    
+    features = geo_data.get("features", [])
+    geometries, stats = simplify_geometries([feature.get("geometry") for feature in features], tolerance, method)
+    logger.info(f"Simplified {stats['geometries']} geometries: {stats['vertices_before']} -> "
+                f"{stats['vertices_after']} vertices, {stats['bytes_before']} -> {stats['bytes_after']} bytes")
     
     simplified = {
         "type": "FeatureCollection",
         "features": []
     }
     
-    for feature in geo_data.get("features", []):
-        # Keep the feature but potentially simplify geometry
-        simplified_feature = {
+    for feature, geometry in zip(features, geometries):
+        simplified["features"].append({
             "type": "Feature",
             "properties": feature["properties"],
-            "geometry": feature["geometry"]  # For now, keep original geometry
-        }
-        simplified["features"].append(simplified_feature)
+            "geometry": geometry
+        })
     
     return simplified
 
 
-def match_gigs_to_municipalities(gigs_data: List[Dict]) -> Dict:
+def matching_settings() -> Dict:
+    """Settings that change match results, for versioning cached matches"""
+    return {
+        "aliases": get_municipality_aliases(),
+        "canton_matching": CANTON_MATCHING_ENABLED,
+        "fuzzy_enabled": FUZZY_MATCH_ENABLED,
+        "fuzzy_threshold": FUZZY_MATCH_THRESHOLD,
+        "fuzzy_min_name_length": FUZZY_MATCH_MIN_NAME_LENGTH,
+        "fuzzy_candidates": FUZZY_MATCH_CANDIDATES
+    }
+
+
+@cached()
+def get_location_matchers() -> LocationMatchers:
     """
-    Match gigs to municipalities using fuzzy matching
-    Returns dict with municipality names as keys and gig lists as values
+    The shared matchers over all municipality names and aliases, and (with CANTON_MATCHING_ENABLED)
+    per canton over its own municipalities and their aliases. Built once: callers get the same
+    object instead of looking the matchers up by name list each time.
     """
-    logger.info("Matching gigs to municipalities...")
-    
     municipality_names = get_municipality_names()
-    municipality_gigs = {}
-    matched_count = 0
-    unmatched_locations = set()
+    aliases = get_municipality_aliases()
     
-    for gig in gigs_data:
-        location = gig.get("location", "")
-        
-        if not location:
-            continue
-            
-        # Try to find municipality match in the location string
-        matched_municipality = find_municipality_match(location, municipality_names)
+    def build(names: List[str], name_aliases: Dict[str, str]) -> Matchers:
+        fuzzy_matcher = get_fuzzy_matcher(names, name_aliases) if FUZZY_MATCH_ENABLED else None
+        return get_matcher(names, name_aliases), fuzzy_matcher
+    
+    canton_matchers = {}
+    if CANTON_MATCHING_ENABLED:
+        cantons = get_municipality_cantons()
+        names_by_canton: Dict[str, List[str]] = {}
+        for name in municipality_names:
+            if name in cantons:
+                names_by_canton.setdefault(cantons[name], []).append(name)
         
+        for canton, names in names_by_canton.items():
+            canton_aliases = {alias: name for alias, name in aliases.items() if cantons.get(name) == canton}
+            canton_matchers[canton] = build(names, canton_aliases)
+    
+    return LocationMatchers(*build(municipality_names, aliases), canton_matchers)
+
+
+def _distinct_locations(gigs_data: List[Dict]) -> Tuple[List[str], Dict[str, str]]:
+    """Per gig, its location key; and per key, the first raw spelling seen, which stands in for the rest"""
+    locations = [gig.get("location") or "" for gig in gigs_data]
+    keys = location_keys(gigs_data, normalize_many(locations))
+    raw_locations = {}
+    for location, key in zip(locations, keys):
+        raw_locations.setdefault(key, location)
+    return keys, raw_locations
+
+
+def _resolve_key(key: str, raw_locations: Dict[str, str], matchers: LocationMatchers) -> Dict:
+    """How one location key resolves (LocationMatchers.explain), with the seconds it took"""
+    canton, normalized_location = key.split("|", 1)
+    start = time.perf_counter()
+    resolution = matchers.explain(raw_locations[key], normalized_location, canton or None)
+    resolution["seconds"] = round(time.perf_counter() - start, 6)
+    return resolution
+
+
+def match_gig_locations(gigs_data: List[Dict], location_cache: Optional[LocationCache] = None,
+                        matchers: Optional[LocationMatchers] = None,
+                        resolutions: Optional[Dict[str, Dict]] = None) -> List[Optional[str]]:
+    """
+    Resolve each gig's location to a municipality name, within the gig's canton first.
+    Returns one entry per gig, None where the location is empty or has no match.
+    With a location_cache, only (canton, location) pairs it has not seen yet are resolved.
+    matchers replaces get_location_matchers(), e.g. with matchers shipped to a worker process.
+    resolutions, if given, receives how each distinct location key was resolved (method, scope,
+    candidates, seconds), for the match report.
+    """
+    matchers = matchers or get_location_matchers()
+    keys, raw_locations = _distinct_locations(gigs_data)
+    
+    scopes = Counter()
+    
+    def resolve_key(key: str) -> Dict:
+        resolution = _resolve_key(key, raw_locations, matchers)
+        scopes[resolution["scope"]] += 1
+        return resolution
+    
+    if location_cache is not None:
+        key_resolutions = location_cache.resolve_many(keys, resolve_key)
+    else:
+        resolved: Dict[str, Dict] = {}
+        key_resolutions = []
+        for key in keys:
+            if key and key not in resolved:
+                resolved[key] = resolve_key(key)
+            key_resolutions.append(resolved.get(key))
+    
+    if resolutions is not None:
+        resolutions.update((key, resolution) for key, resolution in zip(keys, key_resolutions) if key)
+    
+    if scopes["fallback"]:
+        logger.info(f"{scopes['fallback']} of {sum(scopes.values())} newly resolved locations "
+                    f"matched outside their canton")
+    return [resolution["match"] if resolution else None for resolution in key_resolutions]
+
+
+def location_resolutions(gigs_data: List[Dict], location_cache: LocationCache,
+                         matchers: Optional[LocationMatchers] = None) -> Dict[str, Dict]:
+    """
+    How each distinct location key of gigs_data was resolved, as recorded in location_cache.
+    Keys it lacks (e.g. of cantons reused from a refresh state whose location cache was lost)
+    are resolved now and stored.
+    """
+    keys, raw_locations = _distinct_locations(gigs_data)
+    missing = [key for key in raw_locations if key and key not in location_cache.entries]
+    if missing:
+        matchers = matchers or get_location_matchers()
+        location_cache.store_many({key: _resolve_key(key, raw_locations, matchers) for key in missing})
+    return {key: location_cache.entries[key] for key in raw_locations if key}
+
+
+def group_gigs_by_municipality(gigs_data: List[Dict], matches: List[Optional[str]]) -> Dict:
+    """Group gigs under their matched municipality, keeping gig order; unmatched gigs are dropped"""
+    municipality_gigs = {}
+    for gig, matched_municipality in zip(gigs_data, matches):
         if matched_municipality:
             if matched_municipality not in municipality_gigs:
                 municipality_gigs[matched_municipality] = []
             municipality_gigs[matched_municipality].append(gig)
-            matched_count += 1
-        else:
-            unmatched_locations.add(location)
     
-    logger.info(f"Matched {matched_count} gigs to municipalities")
-    logger.info(f"Could not match {len(unmatched_locations)} unique locations")
+    return municipality_gigs
+
+
+def match_gigs_to_municipalities(gigs_data: List[Dict], report_path: Optional[str] = None) -> Dict:
+    """
+    Match gigs to municipalities using fuzzy matching
+    Returns dict with municipality names as keys and gig lists as values
+    Writes the match report (see match_report.build_match_report) to report_path, if given
+    """
+    logger.info("Matching gigs to municipalities...")
+    
+    timer = StageTimer()
+    resolutions: Dict[str, Dict] = {}
+    with timer.stage("match"):
+        matches = match_gig_locations(gigs_data, resolutions=resolutions)
+    with timer.stage("group"):
+        municipality_gigs = group_gigs_by_municipality(gigs_data, matches)
+    
+    report = build_match_report(gigs_data, matches, resolutions, timer.seconds)
+    totals = report["totals"]
+    logger.info(f"Matched {totals['matched']} of {totals['gigs']} gigs to municipalities "
+                f"({totals['canton_fallbacks']} outside their canton); "
+                f"{totals['unmatched_locations']} unique locations unmatched, {len(report['ambiguous'])} ambiguous")
     
-    if unmatched_locations:
-        logger.debug(f"Unmatched locations: {list(unmatched_locations)[:10]}")  # Show first 10
+    if report_path:
+        save_match_report(report, report_path)
     
     return municipality_gigs
 
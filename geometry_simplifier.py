@@ -0,0 +1,216 @@
+"""
+Batched geometry simplification for GeoJSON features: Douglas-Peucker or Visvalingam-Whyatt,
+vectorized over all geometries of a run
+"""
+import json
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import shapely
+from shapely.geometry import shape
+
+logger = logging.getLogger(__name__)
+
+DOUGLAS_PEUCKER = "douglas-peucker"
+VISVALINGAM = "visvalingam"
+SIMPLIFY_METHODS = (DOUGLAS_PEUCKER, VISVALINGAM)
+
+MIN_RING_VERTICES = 3  # Distinct vertices a ring keeps, so it still encloses an area
+
+
+def _polygon(rings: List) -> shapely.Polygon:
+    if not rings:
+        return shapely.Polygon()
+    linear_rings = [shapely.linearrings(np.asarray(ring, dtype=float)) for ring in rings]
+    return shapely.Polygon(linear_rings[0], linear_rings[1:])
+
+
+def parse_geometry(geometry: Dict) -> shapely.Geometry:
+    """shapely.geometry.shape, minus its per-vertex Python loop for (Multi)Polygons"""
+    geometry_type = geometry.get("type")
+    if geometry_type == "Polygon":
+        return _polygon(geometry["coordinates"])
+    if geometry_type == "MultiPolygon":
+        return shapely.MultiPolygon([_polygon(polygon) for polygon in geometry["coordinates"]])
+    return shape(geometry)
+
+
+def _ring_neighbours(ring_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Previous and next vertex of each vertex within its (open, cyclic) ring"""
+    index = np.arange(len(ring_ids))
+    starts = np.flatnonzero(np.r_[True, ring_ids[1:] != ring_ids[:-1]])
+    ends = np.r_[starts[1:], len(ring_ids)] - 1
+    first = np.repeat(starts, ends - starts + 1)
+    last = np.repeat(ends, ends - starts + 1)
+    prev = np.where(index == first, last, index - 1)
+    next_ = np.where(index == last, first, index + 1)
+    return prev, next_
+
+
+def visvalingam_keep(coords: np.ndarray, ring_ids: np.ndarray, min_area: float,
+                     seed: int = 0) -> np.ndarray:
+    """
+    Visvalingam-Whyatt over many open rings at once: mask of the vertices to keep.
+    A vertex's effective area is the triangle it forms with its current neighbours. Each round
+    removes every vertex below min_area whose area is the smallest among its neighbours, then
+    recomputes the areas around it; rings never drop below MIN_RING_VERTICES vertices.
+    Removing local minima in batches instead of one global minimum at a time keeps every round
+    a handful of array operations over all rings.
+    Ties are broken by a fixed random priority, so runs of equal areas (e.g. collinear
+    points) shrink by a constant fraction per round instead of one vertex.
+    """
+    count = len(coords)
+    keep = np.ones(count, dtype=bool)
+    if not count:
+        return keep
+    
+    prev, next_ = _ring_neighbours(ring_ids)
+    _, ring_index = np.unique(ring_ids, return_inverse=True)
+    remaining = np.bincount(ring_index)
+    priority = np.random.default_rng(seed).permutation(count)
+    x, y = coords[:, 0], coords[:, 1]
+    
+    def areas(vertices: np.ndarray) -> np.ndarray:
+        p, n = prev[vertices], next_[vertices]
+        dx_prev, dy_prev = x[p] - x[vertices], y[p] - y[vertices]
+        dx_next, dy_next = x[n] - x[vertices], y[n] - y[vertices]
+        return 0.5 * np.abs(dx_prev * dy_next - dx_next * dy_prev)
+    
+    def smaller(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        return (area[a] < area[b]) | ((area[a] == area[b]) & (priority[a] < priority[b]))
+    
+    area = areas(np.arange(count))
+    
+    while True:
+        candidates = np.flatnonzero(keep & (area < min_area) & (remaining[ring_index] > MIN_RING_VERTICES))
+        if not len(candidates):
+            break
+        
+        selected = candidates[smaller(candidates, prev[candidates]) & smaller(candidates, next_[candidates])]
+        
+        # Never take a ring below its minimum, even when several of its vertices go in one round
+        order = np.argsort(ring_index[selected], kind="stable")
+        selected = selected[order]
+        rings = ring_index[selected]
+        rank = np.arange(len(selected)) - np.searchsorted(rings, rings)
+        selected = selected[rank < remaining[rings] - MIN_RING_VERTICES]
+        
+        # Selected vertices are never adjacent (each is smaller than both neighbours), so unlinking is independent
+        keep[selected] = False
+        p, n = prev[selected], next_[selected]
+        next_[p] = n
+        prev[n] = p
+        np.subtract.at(remaining, ring_index[selected], 1)
+        
+        neighbours = np.unique(np.r_[p, n])
+        area[neighbours] = areas(neighbours)
+        area[selected] = np.inf
+    
+    return keep
+
+
+def _visvalingam_geometries(geometries: np.ndarray, min_area: float) -> np.ndarray:
+    """Visvalingam-Whyatt for an array of Polygons and MultiPolygons"""
+    if not len(geometries):
+        return geometries
+    
+    parts, part_geometry = shapely.get_parts(geometries, return_index=True)
+    rings, ring_part = shapely.get_rings(parts, return_index=True)
+    # Z (elevation) is carried along but ignored for the triangle areas
+    include_z = bool(shapely.has_z(rings).any())
+    coords, coord_ring = shapely.get_coordinates(rings, include_z=include_z, return_index=True)
+    
+    # Rings are closed: simplify them open, linearrings closes them again
+    closing = np.r_[coord_ring[1:] != coord_ring[:-1], True]
+    coords, coord_ring = coords[~closing], coord_ring[~closing]
+    keep = visvalingam_keep(coords, coord_ring, min_area)
+    simplified_rings = shapely.linearrings(coords[keep], indices=coord_ring[keep])
+    
+    # Rebuild polygons (shell first, then holes) and their geometries
+    polygons = []
+    ring_starts = np.r_[np.flatnonzero(np.r_[True, ring_part[1:] != ring_part[:-1]]), len(ring_part)]
+    for start, end in zip(ring_starts[:-1], ring_starts[1:]):
+        polygons.append(shapely.Polygon(simplified_rings[start], list(simplified_rings[start + 1:end])))
+    
+    simplified = np.empty(len(geometries), dtype=object)
+    part_starts = np.r_[np.flatnonzero(np.r_[True, part_geometry[1:] != part_geometry[:-1]]), len(part_geometry)]
+    for start, end in zip(part_starts[:-1], part_starts[1:]):
+        geometry_index = part_geometry[start]
+        if shapely.get_type_id(geometries[geometry_index]) == shapely.GeometryType.MULTIPOLYGON:
+            simplified[geometry_index] = shapely.MultiPolygon(polygons[start:end])
+        else:
+            simplified[geometry_index] = polygons[start]
+    return simplified
+
+
+def reduce_precision(geometries: np.ndarray, precision: int) -> np.ndarray:
+    """2D copies of the geometries with coordinates rounded to `precision` decimals"""
+    return shapely.transform(shapely.force_2d(geometries), lambda coords: np.round(coords, precision))
+
+
+def simplify_geometries(geometries: List[Optional[Dict]], tolerance: float, method: str = DOUGLAS_PEUCKER,
+                        precision: Optional[int] = None) -> Tuple[List[Optional[Dict]], Dict]:
+    """
+    Simplify GeoJSON geometries in one batch and return (simplified geometries, stats).
+    - douglas-peucker: shapely's topology-preserving simplification, tolerance in coordinate units
+    - visvalingam: drops vertices whose effective triangle area is below tolerance ** 2
+    Both keep every geometry valid: Visvalingam results that are not (e.g. a ring now crossing
+    itself) are replaced by the Douglas-Peucker result for that geometry.
+    With a precision, the results lose Z and are rounded to that many decimals (5: about 1 m).
+    Geometries that cannot be parsed, and None, are passed through unchanged.
+    Stats: vertices and GeoJSON bytes before and after, and how many geometries fell back.
+    """
+    if method not in SIMPLIFY_METHODS:
+        raise ValueError(f"Unknown simplification method {method!r}, expected one of {SIMPLIFY_METHODS}")
+    
+    parsed = np.empty(len(geometries), dtype=object)
+    for i, geometry in enumerate(geometries):
+        if not geometry:
+            continue
+        try:
+            parsed[i] = parse_geometry(geometry)
+        except Exception as e:
+            logger.warning(f"Could not parse geometry {i} for simplification: {e}")
+    
+    valid = np.flatnonzero(shapely.is_geometry(parsed))
+    source = parsed[valid]
+    simplified = np.empty(len(source), dtype=object)
+    fallbacks = 0
+    if method == VISVALINGAM:
+        polygon_types = [shapely.GeometryType.POLYGON, shapely.GeometryType.MULTIPOLYGON]
+        polygonal = np.isin(shapely.get_type_id(source), polygon_types)
+        visvalingam = _visvalingam_geometries(source[polygonal], tolerance ** 2)
+        usable = shapely.is_valid(visvalingam)
+        fallbacks = int(np.count_nonzero(~usable))
+        simplified[np.flatnonzero(polygonal)[usable]] = visvalingam[usable]
+    
+    # Douglas-Peucker for everything else: the whole batch, or what Visvalingam could not handle
+    remaining = np.flatnonzero(~shapely.is_geometry(simplified))
+    simplified[remaining] = shapely.simplify(source[remaining], tolerance, preserve_topology=True)
+    if precision is not None:
+        simplified = reduce_precision(simplified, precision)
+    
+    # Serialized once for the output and the byte counts (compact GeoJSON, as GEOS writes it)
+    source_json = shapely.to_geojson(source)
+    simplified_json = shapely.to_geojson(simplified)
+    results = list(geometries)
+    for i, geometry_json in zip(valid, simplified_json):
+        results[i] = json.loads(geometry_json)
+    
+    stats = {
+        "method": method,
+        "tolerance": tolerance,
+        "precision": precision,
+        "geometries": len(valid),
+        "vertices_before": int(shapely.get_num_coordinates(source).sum()),
+        "vertices_after": int(shapely.get_num_coordinates(simplified).sum()),
+        "bytes_before": sum(len(geometry_json) for geometry_json in source_json),
+        "bytes_after": sum(len(geometry_json) for geometry_json in simplified_json),
+        "fallbacks": fallbacks
+    }
+    for unit in ("vertices", "bytes"):
+        before = stats[f"{unit}_before"]
+        stats[f"{unit}_reduction"] = round(1 - stats[f"{unit}_after"] / before, 3) if before else 0.0
+    
+    return results, stats
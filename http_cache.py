@@ -0,0 +1,108 @@
+"""
+Persistent on-disk cache for MX3 API responses with ETag / Last-Modified revalidation
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """
+    Stores response bodies and their validators, one JSON file per (endpoint, params).
+    Cached entries are never trusted blindly: they are revalidated with a conditional
+    request, and served as-is only on 304 Not Modified or when the API is unreachable.
+    """
+    
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        self._lock = threading.Lock()
+        self._stats = {
+            "requests": 0,
+            "hits": 0,  # 304 Not Modified, cached body served
+            "misses": 0,  # Full response downloaded
+            "stale_hits": 0,  # Cached body served after a transient failure
+            "bytes_downloaded": 0,
+            "bytes_saved": 0
+        }
+    
+    @staticmethod
+    def make_key(endpoint: str, params: Optional[Dict] = None) -> str:
+        """Stable cache key for an endpoint and its query parameters"""
+        raw = json.dumps([endpoint, params or {}], sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode()).hexdigest()
+    
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+    
+    def get(self, key: str) -> Optional[Dict]:
+        """Return the cached entry for key, or None"""
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable cache entry {key}: {e}")
+            return None
+    
+    @staticmethod
+    def conditional_headers(entry: Optional[Dict]) -> Dict[str, str]:
+        """Headers that turn a request into a revalidation of entry"""
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+    
+    def store(self, key: str, body: Dict, size: int, etag: Optional[str] = None,
+              last_modified: Optional[str] = None) -> None:
+        """Persist a freshly downloaded response body and its validators"""
+        self._count("misses", size=size, field="bytes_downloaded")
+        
+        entry = {
+            "etag": etag if isinstance(etag, str) else None,
+            "last_modified": last_modified if isinstance(last_modified, str) else None,
+            "stored_at": time.time(),
+            "size": size,
+            "body": body
+        }
+        
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Write to a temp file first so readers never see a partial entry
+            tmp_path = f"{self._path(key)}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, self._path(key))
+        except Exception as e:
+            logger.warning(f"Could not write cache entry {key}: {e}")
+    
+    def record_hit(self, entry: Dict) -> None:
+        """Record that a 304 let us reuse entry"""
+        self._count("hits", size=entry.get("size", 0), field="bytes_saved")
+    
+    def record_stale_hit(self, entry: Dict) -> None:
+        """Record that entry was served because the API could not be reached"""
+        self._count("stale_hits", size=entry.get("size", 0), field="bytes_saved")
+    
+    def _count(self, outcome: str, size: int, field: str) -> None:
+        with self._lock:
+            self._stats["requests"] += 1
+            self._stats[outcome] += 1
+            self._stats[field] += size
+    
+    def stats(self) -> Dict:
+        """Snapshot of hit/miss counters, including the hit rate"""
+        with self._lock:
+            stats = dict(self._stats)
+        served_from_cache = stats["hits"] + stats["stale_hits"]
+        stats["hit_rate"] = round(served_from_cache / stats["requests"], 3) if stats["requests"] else 0.0
+        return stats
@@ -0,0 +1,101 @@
+"""
+Persistent memo of location → municipality resolutions, shared across refreshes
+"""
+import json
+import logging
+import os
+from typing import Callable, Dict, Iterable, List, Optional
+
+from config import LOCATION_CACHE_PATH
+
+logger = logging.getLogger(__name__)
+
+
+class LocationCache:
+    """
+    Resolution per normalized location, as recorded when it was matched (see
+    LocationMatchers.explain): {"match": municipality or None, "method", "scope", "candidates", "seconds"}.
+    The version must change whenever matching could give different results, e.g. with
+    refresh_state.state_version(municipality_names); an outdated cache starts empty.
+    """
+    
+    def __init__(self, path: str, version: str):
+        self.path = path
+        self.version = version
+        self.entries: Dict[str, Dict] = {}
+        self.stats = {
+            "lookups": 0,
+            "hits": 0,
+            "newly_resolved": 0,
+            "newly_unmatched": 0
+        }
+    
+    @classmethod
+    def load(cls, version: str, path: str = LOCATION_CACHE_PATH) -> "LocationCache":
+        """Load the cache from disk, starting empty if it is missing, unreadable or outdated"""
+        cache = cls(path, version)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return cache
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable location cache {path}: {e}")
+            return cache
+        
+        if data.get("version") != version:
+            logger.info("Location cache is outdated, resolving all locations again")
+            return cache
+        
+        cache.entries = data.get("locations", {})
+        return cache
+    
+    def resolve_many(self, normalized_locations: Iterable[str],
+                     resolve: Callable[[str], Dict]) -> List[Optional[Dict]]:
+        """Resolution of each normalized location, calling resolve only for locations not seen before"""
+        resolutions = []
+        for location in normalized_locations:
+            if not location:
+                resolutions.append(None)
+                continue
+            
+            self.stats["lookups"] += 1
+            if location in self.entries:
+                self.stats["hits"] += 1
+                resolutions.append(self.entries[location])
+                continue
+            
+            resolution = self.entries[location] = resolve(location)
+            self.stats["newly_resolved" if resolution["match"] else "newly_unmatched"] += 1
+            resolutions.append(resolution)
+        
+        return resolutions
+    
+    def store_many(self, resolutions: Dict[str, Dict]) -> None:
+        """Record resolutions made elsewhere (e.g. by worker processes) for locations not seen before"""
+        for location, resolution in resolutions.items():
+            if not location or location in self.entries:
+                continue
+            
+            self.entries[location] = resolution
+            self.stats["lookups"] += 1
+            self.stats["newly_resolved" if resolution["match"] else "newly_unmatched"] += 1
+    
+    def summary(self) -> Dict:
+        lookups = self.stats["lookups"]
+        return dict(
+            self.stats,
+            entries=len(self.entries),
+            hit_rate=round(self.stats["hits"] / lookups, 3) if lookups else 0.0
+        )
+    
+    def save(self) -> None:
+        """Write the cache atomically"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": self.version, "locations": self.entries}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
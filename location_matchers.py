@@ -0,0 +1,91 @@
+"""
+Exact and fuzzy location matchers, national and per canton, and how a gig's location is resolved through them
+"""
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from fuzzy_matcher import FuzzyMatcher
+from municipality_matcher import MunicipalityMatcher
+
+logger = logging.getLogger(__name__)
+
+
+def location_keys(gigs_data: List[Dict], normalized_locations: List[str]) -> List[str]:
+    """
+    Per gig, the key its match is resolved and cached under: 'canton|normalized location',
+    since the same location text can resolve differently in different cantons ('' without a location)
+    """
+    return [
+        f"{gig.get('canton') or ''}|{location}" if location else ""
+        for gig, location in zip(gigs_data, normalized_locations)
+    ]
+
+
+Matchers = Tuple[MunicipalityMatcher, Optional[FuzzyMatcher]]
+
+
+class LocationMatchers:
+    """
+    Exact and (if enabled) fuzzy matchers over all municipalities, plus one pair per canton.
+    A gig's location is matched within its own canton first: fewer candidates, and no
+    cross-canton false positives. The national matchers are the fallback.
+    """
+    
+    def __init__(self, matcher: MunicipalityMatcher, fuzzy_matcher: Optional[FuzzyMatcher] = None,
+                 canton_matchers: Optional[Dict[str, Matchers]] = None):
+        self.matcher = matcher
+        self.fuzzy_matcher = fuzzy_matcher
+        self.canton_matchers = canton_matchers or {}
+    
+    def _stages(self, canton: Optional[str]) -> List[Tuple[Matchers, str]]:
+        """Matchers to try in order, with the scope reported for a match: canton, fallback or national"""
+        national = (self.matcher, self.fuzzy_matcher)
+        if canton in self.canton_matchers:
+            return [(self.canton_matchers[canton], "canton"), (national, "fallback")]
+        return [(national, "national")]
+    
+    def resolve(self, location_text: str, normalized_location: str, canton: Optional[str] = None
+                ) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Resolve a location (raw text and its normalized form) to (municipality name, scope):
+        the longest exact name or alias match, else the best fuzzy match above the fuzzy matcher's
+        threshold; (None, None) without a match.
+        Exact matching falls back to the national index, fuzzy matching does not: a misspelled
+        name is only trusted within the gig's own canton (or nationally for gigs without one).
+        """
+        stages = self._stages(canton)
+        for (matcher, _), scope in stages:
+            match = matcher.match_normalized(normalized_location)
+            if match:
+                return match, scope
+        return self._fuzzy_match(location_text, stages)
+    
+    def _fuzzy_match(self, location_text: str, stages: List[Tuple[Matchers, str]]
+                     ) -> Tuple[Optional[str], Optional[str]]:
+        """Best fuzzy match within the first stage only, as (municipality name, scope)"""
+        (_, fuzzy_matcher), scope = stages[0]
+        fuzzy_match = fuzzy_matcher.match(location_text) if fuzzy_matcher else None
+        if not fuzzy_match:
+            return None, None
+        municipality, score = fuzzy_match
+        logger.debug(f"Fuzzy matched '{location_text}' to {municipality} (score {score}, {scope})")
+        return municipality, scope
+    
+    def explain(self, location_text: str, normalized_location: str, canton: Optional[str] = None) -> Dict:
+        """
+        Same result as resolve, with how it was reached: method (exact, alias, fuzzy or None), scope,
+        and the candidates, i.e. every municipality tied for the longest exact match
+        """
+        stages = self._stages(canton)
+        for (matcher, _), scope in stages:
+            indices = matcher.longest_patterns(normalized_location)
+            if indices:
+                return {
+                    "match": matcher.targets[indices[0]],
+                    "method": "alias" if indices[0] >= len(matcher.municipality_names) else "exact",
+                    "scope": scope,
+                    "candidates": list(dict.fromkeys(matcher.targets[index] for index in indices))
+                }
+        
+        match, scope = self._fuzzy_match(location_text, stages)
+        return {"match": match, "method": "fuzzy" if match else None, "scope": scope, "candidates": []}
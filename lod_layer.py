@@ -0,0 +1,138 @@
+"""
+Level-of-detail map layer: one TopoJSON topology per zoom range, switched as the map zooms
+"""
+import json
+import logging
+import os
+from typing import Dict, List, Optional
+
+from branca.element import MacroElement
+from folium.elements import JSCSSMixin
+from folium.template import Template
+
+from config import LOD_DIR, LOD_LEVELS, LOD_URL
+
+logger = logging.getLogger(__name__)
+
+
+def level_for_zoom(levels: List[Dict], zoom: int) -> Dict:
+    """The first level whose max_zoom covers zoom (None: any zoom), else the most detailed one"""
+    for level in levels:
+        if level["max_zoom"] is None or zoom <= level["max_zoom"]:
+            return level
+    return levels[-1]
+
+
+def lod_path(level: Dict) -> str:
+    return os.path.join(LOD_DIR, f"{level['name']}.json")
+
+
+def load_lod_levels(zoom: int, levels: List[Dict] = LOD_LEVELS) -> Optional[List[Dict]]:
+    """
+    The levels as the map layer needs them: each with the URL it is served at, and the level
+    for the initial zoom with its topology loaded, to be embedded in the page.
+    None unless preprocessing wrote every level.
+    """
+    if not all(os.path.exists(lod_path(level)) for level in levels):
+        return None
+    
+    initial = level_for_zoom(levels, zoom)
+    map_levels = []
+    for level in levels:
+        map_level = {
+            "name": level["name"],
+            "object": level["object"],
+            "max_zoom": level["max_zoom"],
+            "url": f"{LOD_URL}/{level['name']}.json"
+        }
+        if level is initial:
+            with open(lod_path(level), "r") as f:
+                map_level["data"] = json.load(f)
+        map_levels.append(map_level)
+    return map_levels
+
+
+class LevelOfDetailLayer(JSCSSMixin, MacroElement):
+    """
+    Shows the topology of the level that matches the map's zoom. The initial level comes
+    embedded; others are fetched once from their URL when the zoom first reaches them (if that
+    fails, the embedded level is shown). Only features listed in details are drawn, each with its style,
+    tooltip and optional popup: details maps topology object -> feature name -> {"style",
+    "tooltip", "popup"}.
+    """
+    
+    _template = Template(
+        """
+        {% macro script(this, kwargs) %}
+        (function() {
+            var map = {{ this._parent.get_name() }};
+            var levels = {{ this.levels|tojson }};
+            var details = {{ this.details|tojson }};
+            var current = null, layer = null, loading = {};
+            var embedded = levels.filter(function(level) { return level.data; })[0];
+            
+            function levelFor(zoom) {
+                for (var i = 0; i < levels.length; i++) {
+                    if (levels[i].max_zoom === null || zoom <= levels[i].max_zoom) return levels[i];
+                }
+                return levels[levels.length - 1];
+            }
+            
+            function load(level) {
+                if (!loading[level.name]) {
+                    loading[level.name] = level.data ? Promise.resolve(level.data) : fetch(level.url).then(
+                        function(response) {
+                            if (!response.ok) throw new Error(response.status + " " + level.url);
+                            return response.json();
+                        }
+                    );
+                }
+                return loading[level.name];
+            }
+            
+            function draw(level, topology) {
+                if (current === level) return;
+                var info = details[level.object] || {};
+                var next = L.geoJson(topojson.feature(topology, topology.objects[level.object]), {
+                    filter: function(feature) {
+                        return Object.prototype.hasOwnProperty.call(info, feature.properties.name);
+                    },
+                    style: function(feature) { return info[feature.properties.name].style; },
+                    onEachFeature: function(feature, featureLayer) {
+                        var detail = info[feature.properties.name];
+                        featureLayer.bindTooltip(detail.tooltip, {sticky: true});
+                        if (detail.popup) featureLayer.bindPopup(detail.popup, {maxWidth: 250});
+                    }
+                });
+                if (layer) map.removeLayer(layer);
+                layer = next.addTo(map);
+                current = level;
+            }
+            
+            function show(level) {
+                load(level).then(function(topology) {
+                    // The zoom may have moved on while the level was loading
+                    if (levelFor(map.getZoom()) === level) draw(level, topology);
+                }).catch(function(error) {
+                    delete loading[level.name];
+                    console.warn("Level " + level.name + " unavailable, showing the embedded one", error);
+                    if (embedded) draw(embedded, embedded.data);
+                });
+            }
+            
+            map.on("zoomend", function() { show(levelFor(map.getZoom())); });
+            show(levelFor(map.getZoom()));
+        })();
+        {% endmacro %}
+        """
+    )
+    
+    default_js = [
+        ("topojson", "https://cdnjs.cloudflare.com/ajax/libs/topojson/1.6.9/topojson.min.js"),
+    ]
+    
+    def __init__(self, levels: List[Dict], details: Dict[str, Dict[str, Dict]]):
+        super().__init__()
+        self._name = "LevelOfDetailLayer"
+        self.levels = levels
+        self.details = details
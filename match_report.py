@@ -0,0 +1,149 @@
+"""
+Match-quality and matcher-performance report: coverage per canton, how each location was matched,
+ambiguous matches, unmatched locations and stage timings
+"""
+import json
+import os
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from config import MATCH_REPORT_PATH
+from location_matchers import location_keys
+from normalizer import normalize_many
+
+# Stands in for a location key without a recorded resolution
+UNRESOLVED = {"match": None, "method": None, "scope": None, "candidates": [], "seconds": 0.0}
+
+
+class StageTimer:
+    """Wall-clock seconds per named pipeline stage; repeated stages add up"""
+    
+    def __init__(self):
+        self.seconds: Dict[str, float] = {}
+    
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] = self.seconds.get(name, 0.0) + time.perf_counter() - start
+    
+    def summary(self) -> Dict[str, float]:
+        return {name: round(seconds, 3) for name, seconds in self.seconds.items()}
+
+
+def _timed_pass(count: int, seconds: float) -> Dict:
+    return {
+        "locations": count,
+        "seconds": round(seconds, 4),
+        "us_per_location": round(seconds * 1e6 / count, 2) if count else 0.0
+    }
+
+
+def build_match_report(gigs: List[Dict], matches: List[Optional[str]], resolutions: Dict[str, Dict],
+                       stage_seconds: Optional[Dict[str, float]] = None) -> Dict:
+    """
+    Report on the final per-gig matches (after every stage, venue assignment included).
+    resolutions maps each distinct location key to how it was resolved during matching
+    (see geo_processor.match_gig_locations): method, scope, candidates and seconds. By method:
+    - exact / alias: longest municipality name or alias contained in the location
+    - fuzzy: no exact match, resolved by a fuzzy matcher
+    - venue: the gig's match differs from what its location resolves to (placed by coordinates)
+    and by scope: within the gig's canton, by the national fallback, or nationally for gigs
+    without a known canton. A location is ambiguous when names of different municipalities
+    tie for the longest match.
+    """
+    locations = [gig.get("location") or "" for gig in gigs]
+    keys = location_keys(gigs, normalize_many(locations))
+    raw_locations: Dict[str, str] = {}
+    for location, key in zip(locations, keys):
+        raw_locations.setdefault(key, location)
+    
+    # Exact pass: keys resolved by an exact matcher; fuzzy pass: the rest, which every fuzzy matcher saw
+    resolutions = {key: resolutions.get(key, UNRESOLVED) for key in raw_locations if key}
+    passes = {"exact": [0, 0.0], "fuzzy": [0, 0.0]}
+    for resolution in resolutions.values():
+        timed_pass = passes["exact" if resolution["method"] in ("exact", "alias") else "fuzzy"]
+        timed_pass[0] += 1
+        timed_pass[1] += resolution.get("seconds", 0.0)
+    
+    methods = Counter()
+    scopes = Counter()
+    per_canton: Dict[str, Dict[str, int]] = {}
+    gigs_per_key = Counter()
+    unmatched = Counter()
+    for gig, key, match in zip(gigs, keys, matches):
+        canton = per_canton.setdefault(gig.get("canton") or "unknown", {"matched": 0, "unmatched": 0, "fallback": 0})
+        canton["matched" if match else "unmatched"] += 1
+        gigs_per_key[key] += 1
+        
+        resolution = resolutions.get(key, UNRESOLVED)
+        if not match:
+            methods["unmatched"] += 1
+            unmatched[raw_locations[key]] += 1
+            continue
+        
+        if match != resolution["match"]:
+            methods["venue"] += 1
+            continue
+        methods[resolution["method"]] += 1
+        scopes[resolution["scope"]] += 1
+        canton["fallback"] += int(resolution["scope"] == "fallback")
+    
+    ambiguous = [
+        {
+            "location": raw_locations[key],
+            "canton": key.split("|", 1)[0],
+            "chosen": resolution["candidates"][0],
+            "candidates": resolution["candidates"],
+            "gigs": gigs_per_key[key]
+        }
+        for key, resolution in resolutions.items() if len(resolution["candidates"]) > 1
+    ]
+    ambiguous.sort(key=lambda entry: (-entry["gigs"], entry["location"]))
+    
+    matched_count = sum(1 for match in matches if match)
+    return {
+        "generated": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "totals": {
+            "gigs": len(gigs),
+            "matched": matched_count,
+            "unmatched": len(gigs) - matched_count,
+            "coverage": round(matched_count / len(gigs), 4) if gigs else 0.0,
+            "distinct_locations": len(resolutions),
+            "unmatched_locations": len(unmatched),
+            "canton_fallbacks": scopes["fallback"]
+        },
+        "per_canton": dict(sorted(per_canton.items())),
+        "methods": {
+            method: methods[method] for method in ("exact", "alias", "fuzzy", "venue", "unmatched")
+        },
+        # Gigs matched by name, by where the match was found
+        "scopes": {scope: scopes[scope] for scope in ("canton", "fallback", "national")},
+        "timing": {
+            "stages": {name: round(seconds, 3) for name, seconds in (stage_seconds or {}).items()},
+            "exact_pass": _timed_pass(*passes["exact"]),
+            "fuzzy_pass": _timed_pass(*passes["fuzzy"])
+        },
+        "ambiguous": ambiguous,
+        # Full histogram, most frequent first ('' counts gigs without a location)
+        "unmatched_locations": [
+            {"location": location, "gigs": count}
+            for location, count in sorted(unmatched.items(), key=lambda item: (-item[1], item[0]))
+        ]
+    }
+
+
+def save_match_report(report: Dict, path: str = MATCH_REPORT_PATH) -> None:
+    """Write the report atomically"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
@@ -0,0 +1,150 @@
+"""
+Aho-Corasick automaton over normalized municipality names, for one-pass longest-match lookup
+"""
+from functools import lru_cache
+from typing import List, Dict, Iterable, Optional, Tuple
+
+from normalizer import normalize_municipality_name, normalize_many
+
+
+class MunicipalityMatcher:
+    """
+    Finds the municipality whose normalized name is the longest substring of a normalized location.
+    Ties between equally long names go to the one listed first, as in a linear scan of the list.
+    aliases (alias -> municipality name, e.g. 'Genf' -> 'Genève') are matched like names,
+    but lose ties to real names.
+    Building costs O(total name length); each lookup is O(len(location)).
+    """
+    
+    def __init__(self, municipality_names: List[str], aliases: Optional[Dict[str, str]] = None):
+        self.municipality_names = list(municipality_names)
+        aliases = aliases or {}
+        # Municipality each pattern resolves to: names resolve to themselves, then aliases follow
+        self.targets = self.municipality_names + list(aliases.values())
+        # Trie as parallel arrays: goto transitions, failure links, best (length, pattern index) ending here
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Optional[Tuple[int, int]]] = [None]
+        # Later pattern indices with the same normalized text as a pattern's first index, e.g. several 'Buchs'
+        self._same_pattern: Dict[int, List[int]] = {}
+        
+        for index, pattern in enumerate(normalize_many(self.municipality_names + list(aliases))):
+            self._add(pattern, index)
+        self._link()
+    
+    def _add(self, pattern: str, index: int) -> None:
+        if not pattern:
+            return
+        
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(None)
+            state = next_state
+        
+        # Several names can normalize to the same pattern: the first wins, the rest are remembered
+        if self._output[state] is None:
+            self._output[state] = (len(pattern), index)
+        else:
+            self._same_pattern.setdefault(self._output[state][1], []).append(index)
+    
+    def _link(self) -> None:
+        """Breadth-first failure links; each state inherits the longest output along its suffix chain"""
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for char, next_state in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                
+                # Suffix outputs are strictly shorter, so a state's own pattern always wins
+                if self._output[next_state] is None:
+                    self._output[next_state] = self._output[self._fail[next_state]]
+                queue.append(next_state)
+    
+    def match_normalized(self, normalized_location: str) -> Optional[str]:
+        """Longest municipality name contained in an already normalized location"""
+        goto, fail, output = self._goto, self._fail, self._output
+        best = None
+        state = 0
+        
+        for char in normalized_location:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            
+            found = output[state]
+            if found and (best is None or found[0] > best[0] or (found[0] == best[0] and found[1] < best[1])):
+                best = found
+        
+        return self.targets[best[1]] if best else None
+    
+    def longest_patterns(self, normalized_location: str) -> List[int]:
+        """
+        Indices of every pattern tied for the longest match, in preference order (the first one
+        is what match_normalized returns). More than one means the match is ambiguous.
+        Index i refers to self.targets[i]; indices from len(self.municipality_names) on are aliases.
+        """
+        goto, fail, output = self._goto, self._fail, self._output
+        best_length = 0
+        found = set()
+        state = 0
+        
+        for char in normalized_location:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            
+            if output[state]:
+                length, index = output[state]
+                if length > best_length:
+                    best_length, found = length, {index}
+                elif length == best_length:
+                    found.add(index)
+        
+        indices = set(found)
+        for index in found:
+            indices.update(self._same_pattern.get(index, ()))
+        return sorted(indices)
+    
+    def match(self, location_text: str) -> Optional[str]:
+        """Longest municipality name contained in location_text (e.g. 'zürich roxy bar')"""
+        if not location_text:
+            return None
+        return self.match_normalized(normalize_municipality_name(location_text))
+    
+    def match_many(self, locations: Iterable[Optional[str]]) -> List[Optional[str]]:
+        """match() for a batch of locations; repeated locations are normalized once"""
+        return [self.match_normalized(location) if location else None
+                for location in normalize_many(locations)]
+
+
+@lru_cache(maxsize=64)  # National plus per-canton matchers
+def _matcher_for(municipality_names: Tuple[str, ...], aliases: Tuple[Tuple[str, str], ...]) -> MunicipalityMatcher:
+    return MunicipalityMatcher(municipality_names, dict(aliases))
+
+
+# (names, aliases, matcher) of the last get_matcher call
+_last_matcher: Tuple[Optional[List[str]], Optional[Dict[str, str]], Optional[MunicipalityMatcher]] = (None, None, None)
+
+
+def get_matcher(municipality_names: List[str], aliases: Optional[Dict[str, str]] = None) -> MunicipalityMatcher:
+    """
+    Shared matcher for a municipality list and alias table, built once per distinct pair.
+    Called again with the very same list and table objects (e.g. once per location), it returns
+    the last matcher without hashing them; so neither may be modified after being passed in.
+    """
+    global _last_matcher
+    last_names, last_aliases, matcher = _last_matcher
+    if municipality_names is last_names and aliases is last_aliases:
+        return matcher
+    
+    matcher = _matcher_for(tuple(municipality_names), tuple((aliases or {}).items()))
+    _last_matcher = (municipality_names, aliases, matcher)
+    return matcher
@@ -0,0 +1,60 @@
+"""
+Name normalization shared by municipality matching and gig processing
+"""
+import unicodedata
+from typing import Dict, Iterable, List, Optional
+
+# Letters that have no Unicode decomposition into a base letter plus marks
+LETTER_FOLDS = {
+    "æ": "ae", "œ": "oe", "ø": "o", "ł": "l", "đ": "d", "ð": "d", "þ": "th", "ı": "i", "ŀ": "l"
+}
+
+
+class _FoldTable(dict):
+    """
+    str.translate table, filled lazily per code point: letters and digits are kept,
+    letters without a decomposition are folded, everything else (combining marks
+    left by NFKD, whitespace, punctuation) is deleted.
+    """
+    
+    def __missing__(self, code_point: int) -> Optional[str]:
+        char = chr(code_point)
+        if char in LETTER_FOLDS:
+            value = LETTER_FOLDS[char]
+        elif char.isalnum() and not unicodedata.combining(char):
+            value = char
+        else:
+            value = None
+        self[code_point] = value
+        return value
+
+
+_FOLD_TABLE = _FoldTable()
+
+
+def normalize_municipality_name(name: str) -> str:
+    """
+    Normalize municipality name for matching:
+    - Case-fold (ß becomes ss) and fold diacritics (Zürich becomes zurich)
+    - Remove whitespaces
+    - Remove special characters like dots, dashes, etc.
+    """
+    if not name:
+        return ""
+    
+    folded = name.casefold()
+    if not folded.isascii():
+        folded = unicodedata.normalize("NFKD", folded)
+    return folded.translate(_FOLD_TABLE)
+
+
+def normalize_many(names: Iterable[str]) -> List[str]:
+    """Normalize a batch of names, computing each distinct name only once"""
+    seen: Dict[str, str] = {}
+    normalized = []
+    for name in names:
+        value = seen.get(name)
+        if value is None:
+            value = seen[name] = normalize_municipality_name(name)
+        normalized.append(value)
+    return normalized
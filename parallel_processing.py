@@ -0,0 +1,81 @@
+"""
+Process-pool map-reduce over raw gigs for backfills: workers process and match shards, the parent merges
+"""
+import heapq
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from config import PARALLEL_MIN_GIGS, PARALLEL_SHARD_SIZE, PARALLEL_MAX_WORKERS
+from data_fetcher import process_gigs_data, gig_sort_key
+from geo_processor import get_location_matchers, match_gig_locations
+from location_cache import LocationCache
+
+logger = logging.getLogger(__name__)
+
+# Matchers shipped to each worker process once, by the pool initializer
+_worker_matchers = None
+
+
+def _init_worker(matchers) -> None:
+    global _worker_matchers
+    _worker_matchers = matchers
+
+
+def _process_shard(shard: List[Dict]) -> Tuple[List[Dict], List[Optional[str]], Dict[str, Dict]]:
+    """Map: normalize, parse dates and sort one shard, then match its locations (with how each resolved)"""
+    processed = process_gigs_data(shard)
+    resolutions: Dict[str, Dict] = {}
+    matches = match_gig_locations(processed, matchers=_worker_matchers, resolutions=resolutions)
+    return processed, matches, resolutions
+
+
+def _pool_context() -> multiprocessing.context.BaseContext:
+    """
+    Never fork: the pool starts while the fetch threads are still streaming, and a lock one of
+    them holds (HTTP session, rate limiter, queue, logging) would stay held in the forked child
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def process_and_match_gigs(raw_gigs: Iterable[Dict], location_cache: Optional[LocationCache] = None,
+                           max_workers: Optional[int] = PARALLEL_MAX_WORKERS,
+                           min_parallel_gigs: int = PARALLEL_MIN_GIGS,
+                           shard_size: int = PARALLEL_SHARD_SIZE) -> Tuple[List[Dict], List[Optional[str]]]:
+    """
+    process_gigs_data followed by match_gig_locations, returning (processed gigs, matches).
+    Below min_parallel_gigs (or with max_workers=1) this runs in-process and uses location_cache.
+    Larger inputs are split into shards of shard_size for a process pool; each worker gets the
+    matcher index once at startup instead of rebuilding it, and the sorted shards are merged here.
+    Workers resolve every distinct location in their shard; their resolutions are stored in
+    location_cache afterwards.
+    """
+    raw_gigs = list(raw_gigs)
+    if len(raw_gigs) < min_parallel_gigs or max_workers == 1:
+        processed = process_gigs_data(raw_gigs)
+        return processed, match_gig_locations(processed, location_cache)
+    
+    shards = [raw_gigs[start:start + shard_size] for start in range(0, len(raw_gigs), shard_size)]
+    logger.info(f"Processing {len(raw_gigs)} gigs in {len(shards)} shards on a process pool...")
+    
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=_pool_context(), initializer=_init_worker,
+                             initargs=(get_location_matchers(),)) as executor:
+        results = list(executor.map(_process_shard, shards))
+    
+    # Reduce: k-way merge of the sorted shards. On equal keys heapq.merge takes earlier shards
+    # first, so the result is identical to one stable sort over all gigs.
+    merged = heapq.merge(*(zip(processed, matches) for processed, matches, _ in results),
+                         key=lambda pair: gig_sort_key(pair[0]))
+    processed_gigs, gig_matches = [], []
+    for gig, match in merged:
+        processed_gigs.append(gig)
+        gig_matches.append(match)
+    
+    if location_cache is not None:
+        resolutions: Dict[str, Dict] = {}
+        for _, _, shard_resolutions in results:
+            resolutions.update(shard_resolutions)
+        location_cache.store_many(resolutions)
+    return processed_gigs, gig_matches
@@ -6,11 +6,31 @@ Run this script periodically to update the cached data files.
 
 import json
 import logging
+import os
+import shutil
 from datetime import datetime
-from data_fetcher import fetch_all_swiss_gigs, process_gigs_data
-from geo_processor import load_swiss_municipalities, match_gigs_to_municipalities
+from itertools import groupby
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from config import (
+    GEOJSON_PRECISION, LOD_DIR, LOD_LEVELS, MATCH_REPORT_PATH, REFRESH_STATE_PATH, SIMPLIFY_METHOD,
+    SIMPLIFY_TOLERANCE, TOPOJSON_PATH, TILES_DIR, TILES_ENABLED, TILE_MAX_ZOOM, TILE_MIN_ZOOM
+)
+from data_fetcher import MX3APIClient, iter_swiss_gigs, gig_sort_key
+from geo_processor import (
+    load_swiss_municipalities, get_municipality_names, has_full_boundaries, matching_settings,
+    location_resolutions, group_gigs_by_municipality, dissolve_cantons, FeatureIndex, get_feature_index
+)
+from match_report import StageTimer, build_match_report, save_match_report
+from parallel_processing import process_and_match_gigs
+from refresh_state import RefreshState, payload_digest, state_version
+from location_cache import LocationCache
+from venue_locator import locate_gig_venues
+from band_enrichment import BandCache, enrich_gigs_with_band_details
+from geometry_simplifier import simplify_geometries
+from topojson_export import TOPOJSON_OBJECT, build_topology, save_topology
+from lod_layer import lod_path
+from vector_tiles import write_tiles
 import geopandas as gpd
-from shapely.geometry import shape
 
 class DateTimeEncoder(json.JSONEncoder):
     def default(self, obj):
@@ -21,60 +41,287 @@ class DateTimeEncoder(json.JSONEncoder):
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def simplify_municipality_features(municipality_gigs: Dict, feature_index: FeatureIndex,
+                                   state: RefreshState) -> Tuple[List[Dict], Dict]:
+    """
+    Simplified features of the municipalities with gigs, in municipality_gigs order, and the run's stats.
+    Each municipality is one index lookup; geometries simplified from the same source geometry with the
+    current settings are reused from the refresh state, all others are simplified in one batch.
+    """
+    settings = {"method": SIMPLIFY_METHOD, "tolerance": SIMPLIFY_TOLERANCE, "precision": GEOJSON_PRECISION}
+    simplified_geo_features = []
+    pending = []  # (position, municipality name, source digest) of features still to simplify
+    
+    for municipality_name in municipality_gigs.keys():
+        feature = feature_index.get(municipality_name)
+        if not feature or not feature.get("geometry"):
+            continue
+        
+        source_digest = payload_digest(feature["geometry"])
+        simplified_geometry = state.get_geometry(municipality_name, settings, source_digest)
+        if not simplified_geometry:
+            pending.append((len(simplified_geo_features), municipality_name, source_digest))
+        simplified_geo_features.append({
+            "type": "Feature",
+            "properties": feature.get("properties", {}),
+            "geometry": simplified_geometry or feature["geometry"]
+        })
+    
+    geometries, stats = simplify_geometries(
+        [simplified_geo_features[position]["geometry"] for position, _, _ in pending],
+        SIMPLIFY_TOLERANCE, SIMPLIFY_METHOD, GEOJSON_PRECISION
+    )
+    for (position, municipality_name, source_digest), geometry in zip(pending, geometries):
+        simplified_geo_features[position]["geometry"] = geometry
+        state.put_geometry(municipality_name, settings, source_digest, geometry)
+    
+    stats["reused"] = len(simplified_geo_features) - len(pending)
+    return simplified_geo_features, stats
+
+def build_municipality_topology(municipality_gigs: Dict, feature_index: FeatureIndex,
+                                tolerance: float = SIMPLIFY_TOLERANCE,
+                                object_name: str = TOPOJSON_OBJECT) -> Tuple[Dict, Dict]:
+    """
+    TopoJSON topology of the municipalities with gigs, from their full-resolution geometries.
+    Borders between neighbours are one arc, simplified once with the tolerance (Douglas-Peucker
+    for either SIMPLIFY_METHOD), so shared borders stay identical on both sides without slivers or gaps.
+    Geometries carry only name, BFS number and canton.
+    """
+    features = []
+    for municipality_name in municipality_gigs.keys():
+        feature = feature_index.get(municipality_name)
+        if not feature or not feature.get("geometry"):
+            continue
+        
+        props = feature.get("properties", {})
+        features.append({
+            "geometry": feature["geometry"],
+            "properties": {
+                "name": municipality_name,
+                "bfs": props.get("gemeinde.BFS_NUMMER"),
+                "canton": props.get("kanton.KUERZEL")
+            }
+        })
+    
+    return build_topology(features, tolerance=tolerance, object_name=object_name)
+
+def build_lod_topologies(municipality_gigs: Dict, feature_index: FeatureIndex, geo_data: Dict,
+                         topology: Optional[Tuple[Dict, Dict]] = None) -> Dict[str, Dict]:
+    """
+    Write one topology per LOD_LEVELS entry to LOD_DIR and return each level's stats.
+    Canton levels dissolve the municipalities of every canton with gigs (the gigs' own canton);
+    municipality levels hold the municipalities with gigs, at the level's tolerance.
+    topology is the municipality topology (and its stats) already built at SIMPLIFY_TOLERANCE,
+    written as is for a TOPOJSON_OBJECT level of that tolerance instead of being built again.
+    """
+    os.makedirs(LOD_DIR, exist_ok=True)
+    cantons = {gig.get("canton") for gigs in municipality_gigs.values() for gig in gigs if gig.get("canton")}
+    canton_features = None
+    
+    lod_stats = {}
+    for level in LOD_LEVELS:
+        if level["object"] == "cantons":
+            canton_features = canton_features or dissolve_cantons(geo_data, cantons)
+            level_topology, stats = build_topology(canton_features, tolerance=level["tolerance"], object_name="cantons")
+        elif topology and level["object"] == TOPOJSON_OBJECT and level["tolerance"] == SIMPLIFY_TOLERANCE:
+            level_topology, stats = topology
+        else:
+            level_topology, stats = build_municipality_topology(
+                municipality_gigs, feature_index, level["tolerance"], level["object"]
+            )
+        save_topology(level_topology, lod_path(level))
+        lod_stats[level["name"]] = {"max_zoom": level["max_zoom"], "tolerance": level["tolerance"], **stats}
+    
+    return lod_stats
+
+def municipality_tile_features(geo_data: Dict, municipality_gigs: Dict) -> List[Dict]:
+    """
+    Every municipality of geo_data at full resolution, for the vector tiles: the tiles cover the
+    whole country, so the map can outline municipalities without gigs too. Properties are name,
+    BFS number, canton and gig count.
+    """
+    features = []
+    for feature in geo_data.get("features", []):
+        props = feature.get("properties", {})
+        name = props.get("gemeinde.NAME") or props.get("NAME") or props.get("name")
+        if not name or not feature.get("geometry"):
+            continue
+        
+        features.append({
+            "geometry": feature["geometry"],
+            "properties": {
+                "name": name,
+                "bfs": props.get("gemeinde.BFS_NUMMER") or props.get("BFS_NUMMER"),
+                "canton": props.get("kanton.KUERZEL") or props.get("KANTON"),
+                "gig_count": len(municipality_gigs.get(name, []))
+            }
+        })
+    return features
+
+def build_vector_tiles(geo_data: Dict, municipality_gigs: Dict) -> Optional[Dict]:
+    """
+    Write the vector tiles to TILES_DIR and return their stats, if TILES_ENABLED and geo_data is
+    the full boundary file. Otherwise (e.g. in the image, which ships without gemeinden.geojson)
+    tiles would only cover the municipalities with gigs: old tiles are removed instead, so the map
+    falls back to the LOD layers.
+    """
+    if not TILES_ENABLED:
+        return None
+    
+    source = geo_data.get("source")
+    if not has_full_boundaries(geo_data):
+        logger.info(f"No vector tiles: {source or 'the loaded GeoJSON'} lacks municipalities without gigs, "
+                    f"so the map uses the level-of-detail layers")
+        shutil.rmtree(TILES_DIR, ignore_errors=True)
+        return None
+    
+    tile_stats = write_tiles(
+        municipality_tile_features(geo_data, municipality_gigs), TILES_DIR, TILE_MIN_ZOOM, TILE_MAX_ZOOM
+    )
+    tile_stats["source"] = source
+    logger.info(f"Vector tiles from {source} in {TILES_DIR}: " + ", ".join(
+        f"z{zoom} {stats['tiles']} tiles" for zoom, stats in tile_stats["zooms"].items()
+    ))
+    return tile_stats
+
+def process_canton_stream(gigs: Iterable[Dict], failed_cantons: Set[str], state: RefreshState,
+                          location_cache: LocationCache, timer: StageTimer) -> Tuple[List[Dict], List[Optional[str]]]:
+    """
+    Process and match a canton-ordered gig stream (iter_swiss_gigs) one canton at a time,
+    returning (processed gigs, matches). Cantons whose payload hash is unchanged reuse their
+    results from state; cantons in failed_cantons keep their last complete results. state
+    keeps only the cantons seen in this run.
+    """
+    processed_gigs = []
+    gig_matches = []
+    fetched_cantons = set()
+    
+    canton_pages = groupby(gigs, key=lambda gig: gig["canton"])
+    while True:
+        # Fetch time is what the stream spends until the next canton's gigs are complete
+        with timer.stage("fetch"):
+            canton, canton_gigs = next(canton_pages, (None, None))
+            if canton is None:
+                break
+            raw_gigs = list(canton_gigs)
+        
+        # The stream flags a failed canton before moving past it; its gigs so far are incomplete
+        if canton in failed_cantons:
+            continue
+        
+        with timer.stage("process_and_match"):
+            digest = payload_digest(raw_gigs)
+            fetched_cantons.add(canton)
+            
+            cached = state.get_canton(canton, digest)
+            if cached:
+                canton_processed, canton_matches = cached
+            else:
+                canton_processed, canton_matches = process_and_match_gigs(raw_gigs, location_cache)
+                state.put_canton(canton, digest, canton_processed, canton_matches)
+        
+        processed_gigs.extend(canton_processed)
+        gig_matches.extend(canton_matches)
+    
+    # Failed cantons keep their results from the last complete fetch, neither replaced nor dropped
+    for canton in sorted(failed_cantons):
+        previous = state.get_failed_canton(canton)
+        if previous:
+            logger.warning(f"Fetching {canton} failed, keeping its gigs from the previous refresh")
+            processed_gigs.extend(previous[0])
+            gig_matches.extend(previous[1])
+            fetched_cantons.add(canton)
+        else:
+            logger.warning(f"Fetching {canton} failed and there are no previous gigs to keep")
+    
+    state.retain_cantons(fetched_cantons)
+    return processed_gigs, gig_matches
+
+def merge_canton_results(processed_gigs: List[Dict], gig_matches: List[Optional[str]]
+                         ) -> Tuple[List[Dict], List[Optional[str]]]:
+    """
+    The per-canton results in global date/band order. The gigs are copies: what later stages add
+    to them (e.g. band details) must not end up in the per-canton results kept in the refresh state.
+    """
+    order = sorted(range(len(processed_gigs)), key=lambda i: gig_sort_key(processed_gigs[i]))
+    return [dict(processed_gigs[i]) for i in order], [gig_matches[i] for i in order]
+
 def preprocess_all_data():
     """Fetch and pre-process all data, saving to JSON files for instant loading."""
     
     logger.info("Starting data preprocessing...")
+    timer = StageTimer()
     
-    # 1. Fetch gigs from API
-    logger.info("Fetching gigs from MX3 API...")
-    raw_gigs = fetch_all_swiss_gigs()
-    
-    # 2. Process gigs data
-    logger.info("Processing gigs data...")
-    processed_gigs = process_gigs_data(raw_gigs)
-    
-    # 3. Load geography data
+    # 1. Load geography data (the municipality list versions the refresh state)
     logger.info("Loading Swiss municipalities...")
     geo_data = load_swiss_municipalities()
+    matching_version = state_version(get_municipality_names(), matching_settings())
+    state = RefreshState.load(REFRESH_STATE_PATH, matching_version)
+    location_cache = LocationCache.load(matching_version)
     
-    # 4. Match gigs to municipalities  
+    # 2-3. Fetch gigs per canton as they stream in; only process and match cantons whose payload changed
+    logger.info("Fetching and processing gigs from MX3 API...")
+    client = MX3APIClient()
+    failed_cantons = set()
+    processed_gigs, gig_matches = process_canton_stream(
+        iter_swiss_gigs(client, failed_cantons=failed_cantons), failed_cantons, state, location_cache, timer
+    )
+    logger.info(f"Reused {state.stats['cantons_reused']} unchanged cantons, "
+                f"reprocessed {state.stats['cantons_reprocessed']}")
+    location_stats = location_cache.summary()
+    logger.info(f"Resolved {location_stats['lookups']} locations: {location_stats['hits']} from cache, "
+                f"{location_stats['newly_resolved']} newly matched, {location_stats['newly_unmatched']} without match")
+    
+    # 4. Merge: restore global date/band order, then group gigs by matched municipality
     logger.info("Matching gigs to municipalities...")
-    municipality_gigs = match_gigs_to_municipalities(processed_gigs)
+    processed_gigs, gig_matches = merge_canton_results(processed_gigs, gig_matches)
+    
+    # Venues with known coordinates are placed by point-in-polygon, overriding the name match
+    with timer.stage("venue_assignment"):
+        gig_matches, venue_stats = locate_gig_venues(processed_gigs, gig_matches)
+    with timer.stage("group"):
+        municipality_gigs = group_gigs_by_municipality(processed_gigs, gig_matches)
+    
+    # 4b. Enrich gigs with band details (cached across refreshes)
+    logger.info("Enriching gigs with band details...")
+    with timer.stage("band_enrichment"):
+        band_stats = enrich_gigs_with_band_details(processed_gigs, client, BandCache())
     
     # 5. Create highly simplified geo data (only municipalities with gigs)
     logger.info("Creating simplified geo data for municipalities with gigs...")
-    simplified_geo_features = []
-    
-    for municipality_name in municipality_gigs.keys():
-        for feature in geo_data.get("features", []):
-            props = feature.get("properties", {})
-            feature_name = props.get("gemeinde.NAME") or props.get("NAME") or props.get("name")
-            if feature_name == municipality_name:
-                # Simplify geometry more aggressively for web performance
-                geometry = feature.get("geometry")
-                if geometry:
-                    try:
-                        # Convert to shapely geometry and simplify
-                        geom = shape(geometry)
-                        simplified_geom = geom.simplify(tolerance=0.007, preserve_topology=True)
-                        
-                        simplified_feature = {
-                            "type": "Feature",
-                            "properties": props,
-                            "geometry": simplified_geom.__geo_interface__
-                        }
-                        simplified_geo_features.append(simplified_feature)
-                    except Exception as e:
-                        logger.warning(f"Could not simplify geometry for {municipality_name}: {e}")
-                        simplified_geo_features.append(feature)
-                break
+    with timer.stage("geometry"):
+        simplified_geo_features, simplify_stats = simplify_municipality_features(
+            municipality_gigs, get_feature_index(), state
+        )
+    logger.info(f"Simplified {simplify_stats['geometries']} geometries ({simplify_stats['method']}, "
+                f"reused {simplify_stats['reused']}): vertices -{simplify_stats['vertices_reduction']:.0%}, "
+                f"bytes -{simplify_stats['bytes_reduction']:.0%}")
     
     simplified_geo_data = {
         "type": "FeatureCollection",
         "features": simplified_geo_features
     }
     
+    # 5b. The same municipalities as a TopoJSON topology, which the map loads instead of the GeoJSON
+    with timer.stage("topology"):
+        topology, topology_stats = build_municipality_topology(municipality_gigs, get_feature_index())
+    # The LOD level at SIMPLIFY_TOLERANCE is this topology; 5c writes it instead of building it again
+    municipality_topology = (topology, dict(topology_stats))
+    topology_stats["geojson_bytes"] = len(json.dumps(simplified_geo_data, separators=(",", ":")))
+    logger.info(f"Built topology: {topology_stats['arcs']} arcs ({topology_stats['shared_arcs']} shared), "
+                f"{topology_stats['bytes']} bytes vs {topology_stats['geojson_bytes']} bytes of simplified GeoJSON")
+    
+    # 5c. Level-of-detail topologies, one per zoom range; the map loads the one matching its zoom
+    with timer.stage("lod"):
+        lod_stats = build_lod_topologies(municipality_gigs, get_feature_index(), geo_data, municipality_topology)
+    logger.info("Level-of-detail topologies: " + ", ".join(
+        f"{name} {stats['bytes']} bytes" for name, stats in lod_stats.items()
+    ))
+    
+    # 5d. Vector tiles of all municipalities, served from the static dir for the part of the map in view
+    with timer.stage("tiles"):
+        tile_stats = build_vector_tiles(geo_data, municipality_gigs)
+    
     # 6. Save all data to JSON files
     logger.info("Saving processed data...")
     
@@ -84,8 +331,21 @@ def preprocess_all_data():
     with open('data/municipality_gigs.json', 'w') as f:
         json.dump(municipality_gigs, f, indent=2, cls=DateTimeEncoder)
     
+    # Compact: the map embeds this as is, and Leaflet gains nothing from whitespace
     with open('data/simplified_geo.json', 'w') as f:
-        json.dump(simplified_geo_data, f, indent=2)
+        json.dump(simplified_geo_data, f, separators=(",", ":"))
+    
+    save_topology(topology, TOPOJSON_PATH)
+    
+    # Match report next to metadata.json: coverage per canton, match methods, ambiguity, timings.
+    # Built from the resolutions recorded in the location cache, so before the cache is saved.
+    match_report = build_match_report(
+        processed_gigs, gig_matches, location_resolutions(processed_gigs, location_cache), timer.seconds
+    )
+    save_match_report(match_report, MATCH_REPORT_PATH)
+    
+    state.save()
+    location_cache.save()
     
     # 7. Save metadata
     metadata = {
@@ -93,7 +353,19 @@ def preprocess_all_data():
         "total_gigs": len(processed_gigs),
         "municipalities_with_gigs": len(municipality_gigs),
         "total_municipalities": len(geo_data.get("features", [])),
-        "geo_features_saved": len(simplified_geo_features)
+        "geo_features_saved": len(simplified_geo_features),
+        "http_cache": client.cache.stats() if client.cache else None,
+        "fetch_metrics": client.metrics.summary(),
+        "delta_refresh": state.stats,
+        "location_cache": location_stats,
+        "venue_assignment": venue_stats,
+        "band_enrichment": band_stats,
+        "geometry_simplification": simplify_stats,
+        "topojson": topology_stats,
+        "lod": lod_stats,
+        "vector_tiles": tile_stats,
+        "match_report": {**match_report["totals"], "ambiguous_locations": len(match_report["ambiguous"])},
+        "stage_seconds": timer.summary()
     }
     
     with open('data/metadata.json', 'w') as f:
@@ -101,7 +373,13 @@ def preprocess_all_data():
     
     logger.info(f"Preprocessing complete!")
     logger.info(f"- {len(processed_gigs)} gigs across {len(municipality_gigs)} municipalities")
+    logger.info(f"- Matched {match_report['totals']['matched']} gigs "
+                f"({match_report['totals']['coverage']:.1%}); see data/match_report.json")
     logger.info(f"- Reduced geo features from 2175 to {len(simplified_geo_features)}")
+    if metadata["http_cache"]:
+        cache_stats = metadata["http_cache"]
+        logger.info(f"- HTTP cache: {cache_stats['hits']} not modified, {cache_stats['misses']} downloaded, "
+                    f"{cache_stats['bytes_saved']} bytes saved")
     logger.info("Data saved to data/ directory for instant loading")
 
 if __name__ == "__main__":
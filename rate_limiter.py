@@ -0,0 +1,152 @@
+"""
+Client-side rate limiting, retry backoff and adaptive concurrency for MX3 API requests
+"""
+import random
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional
+
+
+class TokenBucket:
+    """Allows `rate` requests per second on average, with bursts of up to `capacity`"""
+    
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self) -> float:
+        """Take one token, sleeping until one is available; returns the time waited"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            
+            time.sleep(delay)
+            waited += delay
+
+
+class AIMDConcurrencyLimiter:
+    """
+    Bounds requests in flight with a limit that adapts like TCP congestion control:
+    every successful request grows the limit by 1/limit (about +1 per round of requests),
+    every throttled request multiplies it by `decrease_factor`.
+    """
+    
+    def __init__(self, initial: int, minimum: int = 1, maximum: int = 16, decrease_factor: float = 0.5):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease_factor = decrease_factor
+        self.limit = float(min(max(initial, minimum), maximum))
+        self.in_flight = 0
+        self._condition = threading.Condition()
+    
+    @contextmanager
+    def slot(self):
+        """Hold one request slot for the duration of the block"""
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self.in_flight -= 1
+                self._condition.notify_all()
+    
+    def on_success(self) -> None:
+        with self._condition:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._condition.notify_all()
+    
+    def on_throttle(self) -> None:
+        with self._condition:
+            self.limit = max(self.minimum, self.limit * self.decrease_factor)
+
+
+def backoff_delay(attempt: int, base: float, maximum: float) -> float:
+    """Exponential backoff with full jitter for the given retry attempt (0-based)"""
+    return random.uniform(0, min(maximum, base * (2 ** attempt)))
+
+
+def parse_retry_after(value: Optional[str], maximum: float) -> Optional[float]:
+    """
+    Seconds to wait according to a Retry-After header (delta-seconds or HTTP date), at most
+    `maximum`, so a far-off date or huge delta cannot stall a worker indefinitely
+    """
+    if not isinstance(value, str) or not value.strip():
+        return None
+    try:
+        return min(maximum, max(0.0, float(value)))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return min(maximum, max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds()))
+
+
+class RequestMetrics:
+    """Thread-safe per-request latency and retry counters"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: List[float] = []
+        self.requests = 0
+        self.retries = 0
+        self.throttled = 0
+        self.errors = 0
+        self.rate_limit_wait = 0.0
+    
+    def record(self, latency: float, throttled: bool = False, error: bool = False) -> None:
+        with self._lock:
+            self.requests += 1
+            self.latencies.append(latency)
+            self.throttled += int(throttled)
+            self.errors += int(error)
+    
+    def record_retry(self) -> None:
+        with self._lock:
+            self.retries += 1
+    
+    def record_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.rate_limit_wait += seconds
+    
+    @staticmethod
+    def percentile(values: List[float], pct: float) -> float:
+        if not values:
+            return 0.0
+        ordered = sorted(values)
+        index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+        return ordered[index]
+    
+    def summary(self) -> Dict:
+        with self._lock:
+            latencies = list(self.latencies)
+            summary = {
+                "requests": self.requests,
+                "retries": self.retries,
+                "throttled": self.throttled,
+                "errors": self.errors,
+                "rate_limit_wait_s": round(self.rate_limit_wait, 3)
+            }
+        for pct in (50, 95, 99):
+            summary[f"latency_p{pct}_ms"] = round(self.percentile(latencies, pct) * 1000, 1)
+        return summary
@@ -0,0 +1,138 @@
+"""
+Per-canton intermediate results kept between refreshes, so unchanged cantons are not reprocessed
+"""
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+from typing import List, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Bump when processing or matching logic changes, to invalidate all cached results
+STATE_FORMAT_VERSION = 4
+
+
+def payload_digest(payload) -> str:
+    """Stable hash of a raw API payload"""
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def state_version(municipality_names: List[str], matching_settings: Optional[Dict] = None) -> str:
+    """
+    Version of the refresh state: cached matches are only valid for the same municipality list
+    and matching settings (e.g. the fuzzy match threshold)
+    """
+    return f"{STATE_FORMAT_VERSION}:{payload_digest([sorted(municipality_names), matching_settings])}"
+
+
+def _serialize(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _canton_results(entry: Dict) -> Tuple[List[Dict], List[Optional[str]]]:
+    gigs = entry["gigs"]
+    for gig in gigs:
+        if isinstance(gig.get("parsed_date"), str):
+            gig["parsed_date"] = datetime.fromisoformat(gig["parsed_date"])
+    return gigs, entry["matches"]
+
+
+class RefreshState:
+    """
+    Cached per-canton results (payload hash, processed gigs, municipality matches)
+    and simplified geometries per municipality.
+    """
+    
+    def __init__(self, path: str, version: str):
+        self.path = path
+        self.version = version
+        self.cantons: Dict[str, Dict] = {}
+        self.geometries: Dict[str, Dict] = {}
+        self.stats = {
+            "cantons_reused": 0,
+            "cantons_reprocessed": 0,
+            "cantons_failed": 0,
+            "geometries_reused": 0,
+            "geometries_simplified": 0
+        }
+    
+    @classmethod
+    def load(cls, path: str, version: str) -> "RefreshState":
+        """Load the state from disk, starting empty if it is missing, unreadable or outdated"""
+        state = cls(path, version)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return state
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable refresh state {path}: {e}")
+            return state
+        
+        if data.get("version") != version:
+            logger.info("Refresh state is outdated, reprocessing all cantons")
+            return state
+        
+        state.cantons = data.get("cantons", {})
+        state.geometries = data.get("geometries", {})
+        return state
+    
+    def get_canton(self, canton: str, digest: str) -> Optional[Tuple[List[Dict], List[Optional[str]]]]:
+        """Cached (processed gigs, matches) for a canton whose payload hash is unchanged"""
+        entry = self.cantons.get(canton)
+        if not entry or entry.get("digest") != digest:
+            self.stats["cantons_reprocessed"] += 1
+            return None
+        
+        self.stats["cantons_reused"] += 1
+        return _canton_results(entry)
+    
+    def get_failed_canton(self, canton: str) -> Optional[Tuple[List[Dict], List[Optional[str]]]]:
+        """Cached (processed gigs, matches) of the last complete fetch, for a canton whose fetch failed"""
+        self.stats["cantons_failed"] += 1
+        entry = self.cantons.get(canton)
+        if not entry:
+            return None
+        
+        return _canton_results(entry)
+    
+    def put_canton(self, canton: str, digest: str, gigs: List[Dict], matches: List[Optional[str]]) -> None:
+        self.cantons[canton] = {"digest": digest, "gigs": gigs, "matches": matches}
+    
+    def retain_cantons(self, cantons) -> None:
+        """Forget cantons that no longer returned any gigs"""
+        self.cantons = {canton: entry for canton, entry in self.cantons.items() if canton in cantons}
+    
+    def get_geometry(self, municipality_name: str, settings: Dict, source_digest: str) -> Optional[Dict]:
+        """
+        Simplified geometry, if it was simplified with the same settings (method, tolerance) from the
+        same source geometry (payload_digest of it), e.g. not before a boundary change that kept the name
+        """
+        entry = self.geometries.get(municipality_name)
+        if entry and entry.get("settings") == settings and entry.get("source") == source_digest:
+            self.stats["geometries_reused"] += 1
+            return entry["geometry"]
+        return None
+    
+    def put_geometry(self, municipality_name: str, settings: Dict, source_digest: str, geometry: Dict) -> None:
+        self.stats["geometries_simplified"] += 1
+        self.geometries[municipality_name] = {"settings": settings, "source": source_digest, "geometry": geometry}
+    
+    def save(self) -> None:
+        """Write the state atomically"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"version": self.version, "cantons": self.cantons, "geometries": self.geometries},
+                f, default=_serialize
+            )
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,16 @@
+"""
+Streamlit glue for the headless fetch/process core: clearing Streamlit's and the core's caches together
+"""
+import streamlit as st
+
+import data_fetcher
+import geo_processor
+
+
+def clear_caches() -> None:
+    """Drop both Streamlit's and the core's cached data, e.g. after a data refresh"""
+    st.cache_data.clear()
+    data_fetcher.fetch_all_swiss_gigs.clear()
+    geo_processor.load_swiss_municipalities.clear()
+    geo_processor.get_municipality_names.clear()
+    geo_processor.get_location_matchers.clear()
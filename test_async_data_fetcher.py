@@ -0,0 +1,146 @@
+"""
+Unit tests for async_data_fetcher module, run against a local stub of the MX3 API
+"""
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from config import SWISS_CANTONS, MAX_GIGS_PER_REQUEST
+from async_data_fetcher import AsyncMX3APIClient
+from data_fetcher import MX3APIError
+
+
+class StubMX3Handler(BaseHTTPRequestHandler):
+    """Minimal stand-in for the MX3 OAuth, gigs and bands endpoints"""
+    
+    def log_message(self, format, *args):
+        pass
+    
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def do_POST(self):
+        self.server.token_requests += 1
+        self._send_json({"access_token": "stub_token", "expires_in": 604800})
+    
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.in_flight += 1
+            server.peak_in_flight = max(server.peak_in_flight, server.in_flight)
+        try:
+            time.sleep(server.latency)
+            parsed = urlparse(self.path)
+            if parsed.path == "/gigs":
+                canton = parse_qs(parsed.query)["state_code"][0]
+                performances = [
+                    {"band_name": f"{canton} Band {i}", "band": {"id": i}, "location": canton}
+                    for i in range(3)
+                ]
+                self._send_json({"response": {"status": "Ok", "performances": performances}})
+            elif parsed.path.startswith("/bands/") and parsed.path.rsplit("/", 1)[1].isdigit():
+                band_id = int(parsed.path.rsplit("/", 1)[1])
+                self._send_json({"response": {"status": "Ok", "band": {"id": band_id, "name": f"Band {band_id}"}}})
+            else:
+                self._send_json({"error": "not found"}, status=404)
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+
+@pytest.fixture
+def stub_server():
+    """Run the stub API on a random local port"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubMX3Handler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.latency = 0.02
+    server.in_flight = 0
+    server.peak_in_flight = 0
+    server.token_requests = 0
+    
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    with patch.dict('os.environ', {'CONSUMER_KEY': 'test_key', 'CONSUMER_SECRET': 'test_secret'}), \
+            patch('async_data_fetcher.API_BASE_URL', base_url), \
+            patch('async_data_fetcher.OAUTH_URL', f"{base_url}/oauth/v1/accesstoken"):
+        yield server
+    
+    server.shutdown()
+    server.server_close()
+
+
+class TestAsyncMX3APIClient:
+    """Test the async MX3 API client"""
+    
+    def test_init_missing_credentials(self):
+        """Test client initialization without credentials"""
+        with patch.dict('os.environ', {}, clear=True):
+            with pytest.raises(ValueError, match="CONSUMER_KEY and CONSUMER_SECRET must be set"):
+                AsyncMX3APIClient()
+    
+    def test_get_gigs_by_canton(self, stub_server):
+        """Test fetching a single canton"""
+        async def run():
+            async with AsyncMX3APIClient() as client:
+                return await client.get_gigs_by_canton("ZH")
+        
+        gigs = asyncio.run(run())
+        
+        assert len(gigs) == 3
+        assert gigs[0]["band_name"] == "ZH Band 0"
+    
+    def test_failed_later_page_raises(self, stub_server):
+        """Test that a page failing after a full one raises instead of truncating the canton"""
+        full_page = {"response": {"status": "Ok", "performances": [{"band_name": f"Band {i}"}
+                                                                   for i in range(MAX_GIGS_PER_REQUEST)]}}
+        
+        async def run():
+            async with AsyncMX3APIClient() as client:
+                with patch.object(client, '_make_api_request', AsyncMock(side_effect=[full_page, None])):
+                    return await client.get_gigs_by_canton("ZH")
+        
+        with pytest.raises(MX3APIError, match="Page 2 of ZH"):
+            asyncio.run(run())
+    
+    def test_get_band_details_not_found(self, stub_server):
+        """Test that an unknown endpoint yields None instead of raising"""
+        async def run():
+            async with AsyncMX3APIClient() as client:
+                return await client.get_band_details("missing")
+        
+        assert asyncio.run(run()) is None
+    
+    def test_fetch_all_gigs_bounded_concurrency(self, stub_server):
+        """Test fan-out over all cantons: one token, ordered merge, semaphore respected"""
+        async def run():
+            async with AsyncMX3APIClient(max_concurrency=4) as client:
+                gigs = await client.fetch_all_gigs()
+                bands = await client.get_band_details_many(gig["band"]["id"] for gig in gigs)
+                return gigs, bands
+        
+        start = time.perf_counter()
+        gigs, bands = asyncio.run(run())
+        elapsed = time.perf_counter() - start
+        
+        # Overlapping requests must beat making them one after another at the stub's latency
+        requests_made = len(SWISS_CANTONS) + len(bands)
+        assert elapsed < requests_made * stub_server.latency
+        
+        assert [gig["canton"] for gig in gigs[::3]] == SWISS_CANTONS
+        assert sorted(bands) == [0, 1, 2]
+        assert stub_server.token_requests == 1
+        assert 1 < stub_server.peak_in_flight <= 4
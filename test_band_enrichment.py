@@ -0,0 +1,53 @@
+"""
+Unit tests for band_enrichment module
+"""
+from unittest.mock import Mock
+
+from band_enrichment import BandCache, enrich_gigs_with_band_details
+
+
+class TestBandCache:
+    """Test the persistent LRU/TTL band cache"""
+    
+    def test_ttl_and_negative_ttl(self, tmp_path):
+        """Test that found bands outlive failed lookups"""
+        cache = BandCache(str(tmp_path / "bands.json"), ttl=100, negative_ttl=10)
+        cache.put(1, {"city": "Bern"}, now=1000)
+        cache.put(2, None, now=1000)
+        
+        assert cache.lookup(1, now=1050)["details"] == {"city": "Bern"}
+        assert cache.lookup(2, now=1005) is not None
+        assert cache.lookup(2, now=1050) is None
+        assert cache.lookup(1, now=1200) is None
+    
+    def test_lru_eviction_and_persistence(self, tmp_path):
+        """Test that the least recently used entries are evicted on save"""
+        path = str(tmp_path / "bands.json")
+        cache = BandCache(path, max_entries=2)
+        for band_id in (1, 2, 3):
+            cache.put(band_id, {"city": f"City {band_id}"})
+        cache.lookup(1)  # 1 is now more recent than 2
+        cache.save()
+        
+        reloaded = BandCache(path, max_entries=2)
+        assert set(reloaded.entries) == {"1", "3"}
+
+
+class TestEnrichGigs:
+    """Test the batch enrichment stage"""
+    
+    def test_only_uncached_bands_are_fetched(self, tmp_path):
+        """Test that a second run is served entirely from the cache"""
+        gigs = [{"band_id": 1}, {"band_id": 2}, {"band_id": 1}, {"band_id": None}]
+        client = Mock()
+        client.get_band_details.side_effect = lambda band_id: {"id": band_id, "city": "Basel", "name": "x"} if band_id == 1 else None
+        path = str(tmp_path / "bands.json")
+        
+        first = enrich_gigs_with_band_details(gigs, client, BandCache(path), max_workers=2)
+        second = enrich_gigs_with_band_details(gigs, client, BandCache(path), max_workers=2)
+        
+        assert gigs[0]["band_details"] == {"city": "Basel"}
+        assert "band_details" not in gigs[1]
+        assert first["fetched"] == 2 and first["not_found"] == 1
+        assert second["cache_hits"] == 2 and second["hit_rate"] == 1.0
+        assert client.get_band_details.call_count == 2
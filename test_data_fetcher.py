@@ -5,15 +5,35 @@ import pytest
 from unittest.mock import Mock, patch, MagicMock
 from datetime import datetime, timedelta
 import json
+import subprocess
+import sys
+import time
+import requests
 
+from cache_backend import MemoryCache, MISSING
+from normalizer import normalize_many
+from config import SWISS_CANTONS, RETRY_BACKOFF_MAX
+from http_cache import ResponseCache
+from token_store import TokenStore
 from data_fetcher import (
     MX3APIClient,
+    MX3APIError,
+    fetch_all_swiss_gigs,
+    iter_swiss_gigs,
     normalize_municipality_name,
     find_municipality_match,
     process_gigs_data
 )
 
 
+@pytest.fixture(autouse=True)
+def isolated_caches(tmp_path):
+    """Keep the response cache and token store of every client under a per-test directory"""
+    with patch('data_fetcher.HTTP_CACHE_DIR', str(tmp_path / "http")), \
+            patch('data_fetcher.TOKEN_STORE_PATH', str(tmp_path / "oauth_token.json")):
+        yield
+
+
 class TestMX3APIClient:
     """Test the MX3 API client"""
     
@@ -32,7 +52,7 @@ class TestMX3APIClient:
         assert client.access_token is None
     
     @patch.dict('os.environ', {'CONSUMER_KEY': 'test_key', 'CONSUMER_SECRET': 'test_secret'})
-    @patch('requests.post')
+    @patch('requests.Session.post')
     def test_get_access_token_success(self, mock_post):
         """Test successful token retrieval"""
         mock_response = Mock()
@@ -50,7 +70,55 @@ class TestMX3APIClient:
         mock_post.assert_called_once()
     
     @patch.dict('os.environ', {'CONSUMER_KEY': 'test_key', 'CONSUMER_SECRET': 'test_secret'})
-    @patch('requests.get')
+    @patch('requests.Session.post')
+    def test_access_token_shared_through_store(self, mock_post, tmp_path):
+        """Test that a second client (e.g. another process) reuses the stored token"""
+        mock_post.return_value.json.return_value = {"access_token": "shared_token", "expires_in": 604800}
+        store_path = str(tmp_path / "shared" / "oauth_token.json")
+        
+        first = MX3APIClient(token_store=TokenStore(store_path))._get_access_token()
+        second = MX3APIClient(token_store=TokenStore(store_path))._get_access_token()
+        
+        assert first == second == "shared_token"
+        mock_post.assert_called_once()
+        with open(store_path) as f:
+            assert "test_key" not in f.read()
+    
+    @patch.dict('os.environ', {'CONSUMER_KEY': 'test_key', 'CONSUMER_SECRET': 'test_secret'})
+    @patch('requests.Session.post')
+    def test_access_token_proactive_refresh(self, mock_post):
+        """Test that a token inside the refresh window is renewed, and kept if renewal fails"""
+        client = MX3APIClient()
+        client.access_token = "old_token"
+        client.token_expires_at = datetime.now() + timedelta(hours=2)
+        client.token_refresh_at = datetime.now() - timedelta(minutes=1)
+        
+        mock_post.side_effect = requests.ConnectionError("offline")
+        assert client._get_access_token() == "old_token"
+        
+        mock_post.side_effect = None
+        mock_post.return_value.json.return_value = {"access_token": "new_token", "expires_in": 604800}
+        assert client._get_access_token() == "new_token"
+    
+    @patch.dict('os.environ', {'CONSUMER_KEY': 'test_key', 'CONSUMER_SECRET': 'test_secret'})
+    @patch('requests.Session.post')
+    def test_short_lived_token_is_reused(self, mock_post, tmp_path):
+        """Test that a one-hour token is used until its refresh window instead of refreshed on every call"""
+        mock_post.return_value.json.return_value = {"access_token": "hourly_token", "expires_in": 3600}
+        store_path = str(tmp_path / "oauth_token.json")
+        client = MX3APIClient(token_store=TokenStore(store_path))
+        
+        assert client._get_access_token() == client._get_access_token() == "hourly_token"
+        mock_post.assert_called_once()
+        assert client.token_refresh_at < client.token_expires_at
+        assert client.token_expires_at - client.token_refresh_at <= timedelta(seconds=360)
+        assert client.token_refresh_at - datetime.now() > timedelta(minutes=45)
+        
+        stored = TokenStore(store_path).load("test_key")
+        assert stored == ("hourly_token", client.token_expires_at, client.token_refresh_at)
+    
+    @patch.dict('os.environ', {'CONSUMER_KEY': 'test_key', 'CONSUMER_SECRET': 'test_secret'})
+    @patch('requests.Session.get')
     def test_get_gigs_by_canton_success(self, mock_get):
         """Test successful gigs retrieval"""
         mock_response = Mock()
@@ -73,23 +141,335 @@ class TestMX3APIClient:
         assert gigs[0]["band_name"] == "Test Band"
 
 
+class TestResponseCache:
+    """Test conditional requests against the on-disk response cache"""
+    
+    @staticmethod
+    def make_response(status_code, payload=None, headers=None):
+        response = Mock()
+        response.status_code = status_code
+        response.headers = headers or {}
+        response.content = json.dumps(payload).encode() if payload is not None else b""
+        response.json.return_value = payload
+        if status_code >= 400:
+            response.raise_for_status.side_effect = requests.HTTPError(response=response)
+        return response
+    
+    @patch.dict('os.environ', {'CONSUMER_KEY': 'test_key', 'CONSUMER_SECRET': 'test_secret'})
+    def test_revalidates_and_serves_cached_body_on_304(self):
+        """Test that the second request is conditional and a 304 returns the cached body"""
+        payload = {"response": {"status": "Ok", "performances": [{"band_name": "Test Band"}]}}
+        responses = [
+            self.make_response(200, payload, {"ETag": '"v1"', "Last-Modified": "Tue, 02 Sep 2025 10:00:00 GMT"}),
+            self.make_response(304)
+        ]
+        
+        with patch.object(MX3APIClient, '_get_access_token', return_value='test_token'), \
+                patch('requests.Session.get', side_effect=responses) as mock_get:
+            client = MX3APIClient()
+            first = client._make_api_request("gigs", {"state_code": "ZH"})
+            second = client._make_api_request("gigs", {"state_code": "ZH"})
+        
+        assert first == second == payload
+        conditional_headers = mock_get.call_args_list[1].kwargs["headers"]
+        assert conditional_headers["If-None-Match"] == '"v1"'
+        assert conditional_headers["If-Modified-Since"] == "Tue, 02 Sep 2025 10:00:00 GMT"
+        
+        stats = client.cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["bytes_saved"] == len(json.dumps(payload))
+    
+    @patch.dict('os.environ', {'CONSUMER_KEY': 'test_key', 'CONSUMER_SECRET': 'test_secret'})
+    @patch('data_fetcher.time.sleep')
+    def test_serves_cached_body_only_on_transient_failure(self, mock_sleep, tmp_path):
+        """Test fallback to the cached body on 503 but not on 404"""
+        cache = ResponseCache(str(tmp_path / "shared"))
+        payload = {"response": {"status": "Ok", "band": {"id": 1}}}
+        
+        with patch.object(MX3APIClient, '_get_access_token', return_value='test_token'):
+            with patch('requests.Session.get', return_value=self.make_response(200, payload)):
+                MX3APIClient(cache=cache)._make_api_request("bands/1")
+            
+            # A new client (e.g. the next refresh) shares the cache on disk
+            client = MX3APIClient(cache=ResponseCache(cache.cache_dir))
+            with patch('requests.Session.get', return_value=self.make_response(503)):
+                assert client._make_api_request("bands/1") == payload
+            with patch('requests.Session.get', return_value=self.make_response(404)):
+                assert client._make_api_request("bands/1") is None
+        
+        assert client.cache.stats()["stale_hits"] == 1
+
+
+class TestRetries:
+    """Test retry, backoff and adaptive concurrency in the fetcher"""
+    
+    @patch.dict('os.environ', {'CONSUMER_KEY': 'test_key', 'CONSUMER_SECRET': 'test_secret'})
+    @patch('data_fetcher.time.sleep')
+    def test_retries_throttled_request_honoring_retry_after(self, mock_sleep):
+        """Test that a 429 is retried after Retry-After and shrinks the concurrency limit"""
+        payload = {"response": {"status": "Ok", "band": {"id": 1}}}
+        responses = [
+            TestResponseCache.make_response(429, headers={"Retry-After": "2"}),
+            TestResponseCache.make_response(200, payload)
+        ]
+        
+        with patch.object(MX3APIClient, '_get_access_token', return_value='test_token'), \
+                patch('requests.Session.get', side_effect=responses):
+            client = MX3APIClient(pool_size=8)
+            band = client.get_band_details(1)
+        
+        assert band == {"id": 1}
+        mock_sleep.assert_called_once_with(2.0)
+        assert client.concurrency.limit < 4  # Started at half the pool, halved by the 429
+        metrics = client.metrics.summary()
+        assert metrics["requests"] == 2
+        assert metrics["retries"] == 1
+        assert metrics["throttled"] == 1
+    
+    @pytest.mark.parametrize("retry_after", ["86400", "Wed, 21 Oct 2099 07:28:00 GMT"])
+    @patch.dict('os.environ', {'CONSUMER_KEY': 'test_key', 'CONSUMER_SECRET': 'test_secret'})
+    @patch('data_fetcher.time.sleep')
+    def test_retry_after_is_capped(self, mock_sleep, retry_after):
+        """Test that a far-off Retry-After (delta or HTTP date) waits at most RETRY_BACKOFF_MAX"""
+        payload = {"response": {"status": "Ok", "band": {"id": 1}}}
+        responses = [
+            TestResponseCache.make_response(429, headers={"Retry-After": retry_after}),
+            TestResponseCache.make_response(200, payload)
+        ]
+        
+        with patch.object(MX3APIClient, '_get_access_token', return_value='test_token'), \
+                patch('requests.Session.get', side_effect=responses):
+            assert MX3APIClient().get_band_details(1) == {"id": 1}
+        
+        mock_sleep.assert_called_once_with(RETRY_BACKOFF_MAX)
+    
+    @patch.dict('os.environ', {'CONSUMER_KEY': 'test_key', 'CONSUMER_SECRET': 'test_secret'})
+    def test_concurrency_grows_to_pool_size(self):
+        """Test that successful requests raise the concurrency limit from half the pool to all of it"""
+        payload = {"response": {"status": "Ok", "band": {"id": 1}}}
+        with patch.object(MX3APIClient, '_get_access_token', return_value='test_token'), \
+                patch('requests.Session.get', return_value=TestResponseCache.make_response(200, payload)):
+            client = MX3APIClient(pool_size=8)
+            assert client.concurrency.limit == 4
+            for _ in range(40):
+                client.get_band_details(1)
+        
+        assert client.concurrency.limit == 8
+    
+    @patch.dict('os.environ', {'CONSUMER_KEY': 'test_key', 'CONSUMER_SECRET': 'test_secret'})
+    def test_rate_cap_is_opt_in(self):
+        """Test that requests are only rate limited when RATE_LIMIT_PER_SECOND is set"""
+        assert MX3APIClient().rate_limiter is None
+        
+        with patch('data_fetcher.RATE_LIMIT_PER_SECOND', 5):
+            assert MX3APIClient().rate_limiter.rate == 5
+    
+    @patch.dict('os.environ', {'CONSUMER_KEY': 'test_key', 'CONSUMER_SECRET': 'test_secret'})
+    @patch('data_fetcher.time.sleep')
+    def test_persistent_failure_is_reported_not_swallowed(self, mock_sleep):
+        """Test that a canton whose requests keep timing out raises instead of returning no gigs"""
+        with patch.object(MX3APIClient, '_get_access_token', return_value='test_token'), \
+                patch('requests.Session.get', side_effect=requests.Timeout("slow")) as mock_get:
+            client = MX3APIClient(max_retries=2)
+            with pytest.raises(MX3APIError):
+                client.get_gigs_by_canton("ZH")
+        
+        assert mock_get.call_count == 3
+        assert mock_sleep.call_count == 2
+
+
+class TestPagination:
+    """Test paging through gigs with MAX_GIGS_PER_REQUEST"""
+    
+    @staticmethod
+    def paged_response(total, per_page):
+        def fake_request(self, endpoint, params=None):
+            start = (params["page"] - 1) * per_page
+            performances = [{"band_name": f"Band {i}"} for i in range(start, min(start + per_page, total))]
+            return {"response": {"status": "Ok", "performances": performances}}
+        return fake_request
+    
+    @patch.dict('os.environ', {'CONSUMER_KEY': 'test_key', 'CONSUMER_SECRET': 'test_secret'})
+    def test_iter_gigs_pages_until_short_page(self):
+        """Test that all pages are requested and yielded in order"""
+        fake_request = Mock(side_effect=self.paged_response(total=250, per_page=100))
+        with patch.object(MX3APIClient, '_make_api_request', lambda self, *a, **kw: fake_request(self, *a, **kw)):
+            gigs = list(MX3APIClient().iter_gigs("ZH", per_page=100))
+        
+        assert [gig["band_name"] for gig in gigs] == [f"Band {i}" for i in range(250)]
+        assert fake_request.call_count == 3
+    
+    @patch.dict('os.environ', {'CONSUMER_KEY': 'test_key', 'CONSUMER_SECRET': 'test_secret'})
+    def test_iter_gigs_raises_on_failed_later_page(self):
+        """Test that a failed page after a full one raises instead of truncating the canton"""
+        full_page = {"response": {"status": "Ok", "performances": [{"band_name": "Band 0"}, {"band_name": "Band 1"}]}}
+        error_page = {"response": {"status": "Error"}}
+        with patch.object(MX3APIClient, '_make_api_request', side_effect=[full_page, error_page]):
+            gigs = MX3APIClient().iter_gigs("ZH", per_page=2)
+            assert [gig["band_name"] for gig in [next(gigs), next(gigs)]] == ["Band 0", "Band 1"]
+            with pytest.raises(MX3APIError, match="Page 2 of ZH"):
+                next(gigs)
+        
+        with patch.object(MX3APIClient, '_make_api_request', return_value=error_page):
+            assert list(MX3APIClient().iter_gigs("ZH", per_page=2)) == []
+    
+    @patch.dict('os.environ', {'CONSUMER_KEY': 'test_key', 'CONSUMER_SECRET': 'test_secret'})
+    def test_iter_gigs_stops_when_paging_is_ignored(self):
+        """Test that an API returning the same full page again does not loop forever"""
+        same_page = {"response": {"status": "Ok", "performances": [{"band_name": "Band 0"}, {"band_name": "Band 1"}]}}
+        with patch.object(MX3APIClient, '_make_api_request', return_value=same_page):
+            gigs = list(MX3APIClient().iter_gigs("ZH", per_page=2))
+        
+        assert len(gigs) == 2
+    
+    @patch.dict('os.environ', {'CONSUMER_KEY': 'test_key', 'CONSUMER_SECRET': 'test_secret'})
+    def test_iter_swiss_gigs_streams_in_canton_order(self):
+        """Test that concurrently fetched cantons are yielded in canton order and feed process_gigs_data"""
+        def fake_pages(self, canton_code, per_page=100):
+            if canton_code == "BE":
+                raise RuntimeError("boom")
+            yield [{"band_name": f"{canton_code} Band", "location": canton_code, "date": "2024-12-25T20:00:00Z"}]
+            yield [{"band_name": f"{canton_code} Band 2", "location": canton_code, "date": "2024-12-25T20:00:00Z"}]
+        
+        with patch.object(MX3APIClient, 'iter_gig_pages', fake_pages):
+            streamed = list(iter_swiss_gigs(max_workers=4, max_buffered_pages=1))
+        processed = process_gigs_data(streamed)
+        
+        expected_cantons = [canton for canton in SWISS_CANTONS if canton != "BE"]
+        assert [gig["canton"] for gig in streamed] == [canton for canton in expected_cantons for _ in range(2)]
+        assert [gig["band_name"] for gig in streamed[:2]] == [f"{SWISS_CANTONS[0]} Band", f"{SWISS_CANTONS[0]} Band 2"]
+        assert len(processed) == 2 * len(expected_cantons)
+    
+    @patch.dict('os.environ', {'CONSUMER_KEY': 'test_key', 'CONSUMER_SECRET': 'test_secret'})
+    def test_iter_swiss_gigs_flags_partially_failed_canton(self):
+        """Test that a canton failing after its first page is flagged before the stream moves past it"""
+        def fake_pages(self, canton_code, per_page=100):
+            yield [{"band_name": f"{canton_code} Band"}]
+            if canton_code == "BE":
+                raise MX3APIError("429 on page 2")
+            yield [{"band_name": f"{canton_code} Band 2"}]
+        
+        next_canton = SWISS_CANTONS[SWISS_CANTONS.index("BE") + 1]
+        failed_cantons = set()
+        flagged_when_next_canton_starts = None
+        with patch.object(MX3APIClient, 'iter_gig_pages', fake_pages):
+            for gig in iter_swiss_gigs(max_workers=4, failed_cantons=failed_cantons):
+                if gig["canton"] == next_canton and flagged_when_next_canton_starts is None:
+                    flagged_when_next_canton_starts = set(failed_cantons)
+        
+        assert failed_cantons == {"BE"}
+        assert flagged_when_next_canton_starts == {"BE"}
+    
+    @patch.dict('os.environ', {'CONSUMER_KEY': 'test_key', 'CONSUMER_SECRET': 'test_secret'})
+    def test_iter_swiss_gigs_early_close(self):
+        """Test that abandoning the stream does not hang on blocked producers"""
+        def endless_pages(self, canton_code, per_page=100):
+            while True:
+                yield [{"band_name": f"{canton_code} Band"}]
+        
+        with patch.object(MX3APIClient, 'iter_gig_pages', endless_pages):
+            stream = iter_swiss_gigs(max_workers=2, max_buffered_pages=1)
+            first = next(stream)
+            stream.close()
+        
+        assert first["canton"] == SWISS_CANTONS[0]
+
+
+class TestFetchAllSwissGigs:
+    """Test fetching gigs across all cantons"""
+    
+    @staticmethod
+    def fake_gigs_by_canton(self, canton_code):
+        if canton_code == "BE":
+            raise RuntimeError("boom")
+        return [{"band_name": f"{canton_code} Band", "location": canton_code}]
+    
+    @pytest.mark.parametrize("max_workers", [1, 8])
+    @patch.dict('os.environ', {'CONSUMER_KEY': 'test_key', 'CONSUMER_SECRET': 'test_secret'})
+    def test_fetch_all_merges_in_canton_order(self, max_workers):
+        """Test that sequential and concurrent fetches merge identically and skip failed cantons"""
+        fetch_all_swiss_gigs.clear()
+        progress = Mock()
+        with patch.object(MX3APIClient, 'get_gigs_by_canton', self.fake_gigs_by_canton):
+            gigs = fetch_all_swiss_gigs(max_workers=max_workers, progress=progress)
+        
+        expected_cantons = [canton for canton in SWISS_CANTONS if canton != "BE"]
+        assert [gig["canton"] for gig in gigs] == expected_cantons
+        assert gigs[0]["band_name"] == "ZH Band"
+        
+        assert progress.call_count == len(SWISS_CANTONS)
+        assert [call.args[0] for call in progress.call_args_list] == list(range(1, len(SWISS_CANTONS) + 1))
+        failed = [call.args[2] for call in progress.call_args_list if call.args[3] is not None]
+        assert failed == ["BE"]
+    
+    @patch.dict('os.environ', {'CONSUMER_KEY': 'test_key', 'CONSUMER_SECRET': 'test_secret'})
+    def test_fetch_all_is_cached_regardless_of_progress_callback(self):
+        """Test that the headless core memoizes results without keying on the callback"""
+        fetch_all_swiss_gigs.clear()
+        with patch.object(MX3APIClient, 'get_gigs_by_canton', return_value=[]) as mock_fetch:
+            fetch_all_swiss_gigs(max_workers=1, progress=Mock())
+            fetch_all_swiss_gigs(max_workers=1, progress=Mock())
+        
+        assert mock_fetch.call_count == len(SWISS_CANTONS)
+        fetch_all_swiss_gigs.clear()
+    
+    def test_core_does_not_import_streamlit(self):
+        """Test that the fetch/process pipeline can run in a plain worker process"""
+        result = subprocess.run(
+            [sys.executable, "-c", "import sys, preprocess_data; sys.exit('streamlit' in sys.modules)"],
+            capture_output=True
+        )
+        assert result.returncode == 0
+
+
+class TestMemoryCache:
+    """Test the in-process cache backend"""
+    
+    def test_entries_expire_after_ttl(self):
+        cache = MemoryCache()
+        cache.set("ns", ("key",), "value", ttl=60)
+        assert cache.get("ns", ("key",)) == "value"
+        
+        with patch("cache_backend.time.monotonic", return_value=time.monotonic() + 61):
+            assert cache.get("ns", ("key",)) is MISSING
+    
+    def test_clear_drops_only_one_namespace(self):
+        cache = MemoryCache()
+        cache.set("a", (), 1)
+        cache.set("b", (), 2)
+        cache.clear("a")
+        
+        assert cache.get("a", ()) is MISSING
+        assert cache.get("b", ()) == 2
+
+
 class TestMunicipalityNameProcessing:
     """Test municipality name normalization and matching"""
     
     def test_normalize_municipality_name(self):
         """Test municipality name normalization"""
-        assert normalize_municipality_name("Zürich") == "zrich"  # ü gets removed
+        assert normalize_municipality_name("Zürich") == "zurich"  # diacritics are folded
+        assert normalize_municipality_name("Chavannes-près-Renens") == "chavannespresrenens"
         assert normalize_municipality_name("Sankt Gallen") == "sanktgallen"
         assert normalize_municipality_name("Bern-Stadt") == "bernstadt"
+        assert normalize_municipality_name("Straße") == "strasse"
+        assert normalize_municipality_name("Lœrrach Ærø") == "loerrachaero"
         assert normalize_municipality_name("") == ""
         assert normalize_municipality_name(None) == ""
     
+    def test_normalize_many(self):
+        """Test batch normalization matches one-by-one normalization"""
+        names = ["Zürich", None, "Biel/Bienne", "Zürich", ""]
+        assert normalize_many(names) == [normalize_municipality_name(name) for name in names]
+    
     def test_find_municipality_match(self):
         """Test municipality matching logic"""
         municipalities = ["Zürich", "Basel", "Bern", "Sankt Gallen"]
         
-        # Exact matches (considering ü removal)
-        assert find_municipality_match("zrich venue", municipalities) == "Zürich"
+        # Exact matches (with or without diacritics)
+        assert find_municipality_match("zurich venue", municipalities) == "Zürich"
+        assert find_municipality_match("Zürich Rote Fabrik", municipalities) == "Zürich"
         assert find_municipality_match("Basel Concert Hall", municipalities) == "Basel"
         
         # Partial matches
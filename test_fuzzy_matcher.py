@@ -0,0 +1,54 @@
+"""
+Unit tests for fuzzy_matcher module
+"""
+from unittest.mock import patch
+
+import geo_processor
+from fuzzy_matcher import FuzzyMatcher, edit_distance, word_spans
+from geo_processor import match_gig_locations
+
+
+class TestEditDistance:
+    """Test bounded edit distance and word spans"""
+    
+    def test_edit_distance_with_cutoff(self):
+        assert edit_distance("winterthur", "winterhur", 1) == 1
+        assert edit_distance("bern", "bern", 0) == 0
+        assert edit_distance("basel", "zurich", 2) is None
+        assert edit_distance("basel", "baselstadt", 2) is None
+    
+    def test_word_spans(self):
+        assert word_spans("Rapperswil-Jona") == {"rapperswil", "jona", "rapperswiljona"}
+        assert "chavannespresrenens" in word_spans("Route de Chavannes-près-Renens 2")
+
+
+class TestFuzzyMatcher:
+    """Test the trigram-indexed fuzzy fallback"""
+    
+    names = ["Winterthur", "Chavannes-près-Renens", "Schötz", "Schänis", "Rapperswil-Jona", "Bern"]
+    
+    def test_resolves_typos_with_score(self):
+        matcher = FuzzyMatcher(self.names, threshold=0.85)
+        assert matcher.match("Salzhaus Winterhur") == ("Winterthur", 0.9)
+        assert matcher.match("Chavanne pres Renens") == ("Chavannes-près-Renens", 0.947)
+        assert matcher.match("Rapperswil Jonna")[0] == "Rapperswil-Jona"
+    
+    def test_threshold_and_short_names(self):
+        matcher = FuzzyMatcher(self.names, threshold=0.85)
+        assert matcher.match("Schützenmatte") is None  # not a word on its own
+        assert matcher.match("Schitz") is None  # one edit in a 6-letter name
+        assert matcher.match("God da Ravitschana, S-charl") is None
+        assert matcher.match("Berm") is None  # too short to fuzzy-match at all
+        assert matcher.match("Wntrhur") is None
+        assert FuzzyMatcher(self.names, threshold=0.6).match("Wntrhur") == ("Winterthur", 0.7)
+    
+    def test_exact_match_takes_precedence(self):
+        """Test that the fuzzy stage only handles locations without an exact match"""
+        gigs = [{"location": "Bern"}, {"location": "Winterhur"}, {"location": "Nowhere"}]
+        with patch("geo_processor.get_municipality_names", return_value=self.names):
+            assert match_gig_locations(gigs) == ["Bern", "Winterthur", None]
+        
+        geo_processor.get_location_matchers.clear()
+        with patch("geo_processor.get_municipality_names", return_value=self.names), \
+                patch("geo_processor.FUZZY_MATCH_ENABLED", False):
+            assert match_gig_locations(gigs) == ["Bern", None, None]
@@ -0,0 +1,65 @@
+"""
+Unit tests for geo_processor module
+"""
+from shapely.geometry import shape
+
+from geo_processor import FeatureIndex, dissolve_cantons
+
+
+def feature(name, bfs_number, canton="BE"):
+    return {
+        "type": "Feature",
+        "properties": {"gemeinde.NAME": name, "gemeinde.BFS_NUMMER": bfs_number, "kanton.KUERZEL": canton},
+        "geometry": {"type": "Point", "coordinates": [7.4, 46.9]}
+    }
+
+
+class TestFeatureIndex:
+    """Test feature lookup by name and BFS number"""
+    
+    def test_lookup_by_name_and_bfs_number(self):
+        bern, thun = feature("Bern", 351), feature("Thun", 942)
+        index = FeatureIndex({"features": [bern, thun, {"properties": {}}]})
+        
+        assert len(index) == 2
+        assert index.get("Bern") is bern
+        assert index.get_bfs(942) is thun
+        assert index.get_bfs("942") is thun
+        assert index.get("Zürich") is None and index.get_bfs(261) is None
+    
+    def test_first_feature_wins_like_a_scan(self):
+        first, second = feature("Bern", 351), feature("Bern", 351)
+        index = FeatureIndex({"features": [first, second]})
+        assert index.get("Bern") is first
+        assert index.get_bfs(351) is first
+    
+    def test_legacy_property_names(self):
+        legacy = {"properties": {"NAME": "Biel/Bienne", "BFS_NUMMER": 371}, "geometry": None}
+        index = FeatureIndex({"features": [legacy]})
+        assert index.get("Biel/Bienne") is legacy and index.get_bfs(371) is legacy
+
+
+def square(x, y, name, canton):
+    ring = [[x, y], [x + 1, y], [x + 1, y + 1], [x, y + 1], [x, y]]
+    return {"type": "Feature", "properties": {"gemeinde.NAME": name, "kanton.KUERZEL": canton},
+            "geometry": {"type": "Polygon", "coordinates": [ring]}}
+
+
+class TestDissolveCantons:
+    """Test merging municipalities into canton outlines"""
+    
+    def test_neighbours_merge_into_one_polygon(self):
+        """Test that adjacent municipalities of a canton become one polygon"""
+        geo_data = {"features": [square(0, 0, "Bern", "BE"), square(1, 0, "Köniz", "BE"),
+                                 square(5, 0, "Zürich", "ZH")]}
+        
+        cantons = dissolve_cantons(geo_data)
+        assert [canton["properties"] for canton in cantons] == [{"name": "BE"}, {"name": "ZH"}]
+        bern = shape(cantons[0]["geometry"])
+        assert bern.geom_type == "Polygon" and bern.area == 2
+    
+    def test_only_requested_cantons(self):
+        """Test that cantons outside the given set are left out"""
+        geo_data = {"features": [square(0, 0, "Bern", "BE"), square(5, 0, "Zürich", "ZH"), feature("Thun", 942)]}
+        
+        assert [canton["properties"]["name"] for canton in dissolve_cantons(geo_data, {"ZH"})] == ["ZH"]
@@ -0,0 +1,85 @@
+"""
+Unit tests for geometry_simplifier module
+"""
+import math
+
+import numpy as np
+import pytest
+from shapely.geometry import shape
+
+from geometry_simplifier import DOUGLAS_PEUCKER, VISVALINGAM, simplify_geometries, visvalingam_keep
+
+
+def wiggly_ring(lon: float, lat: float, radius: float, vertices: int = 200):
+    ring = []
+    for k in range(vertices):
+        angle = 2 * math.pi * k / vertices
+        r = radius * (1 + 0.05 * math.sin(23 * angle))
+        ring.append([lon + r * math.cos(angle), lat + r * math.sin(angle)])
+    return ring + [ring[0]]
+
+
+POLYGON_WITH_HOLE = {
+    "type": "Polygon",
+    "coordinates": [wiggly_ring(7.0, 46.0, 0.05), wiggly_ring(7.0, 46.0, 0.01)[::-1]]
+}
+MULTIPOLYGON = {
+    "type": "MultiPolygon",
+    "coordinates": [[wiggly_ring(8.0, 47.0, 0.02)], [wiggly_ring(8.2, 47.0, 0.02)]]
+}
+
+
+class TestVisvalingam:
+    """Test the batched Visvalingam-Whyatt vertex selection"""
+    
+    def test_drops_small_triangles_only(self):
+        # A square with a nearly collinear extra vertex on each side
+        coords = np.array([[0, 0], [0.5, 0.001], [1, 0], [1, 1], [0.5, 0.999], [0, 1]], dtype=float)
+        keep = visvalingam_keep(coords, np.zeros(len(coords), dtype=int), min_area=0.01)
+        assert keep.tolist() == [True, False, True, True, False, True]
+    
+    def test_rings_keep_three_vertices(self):
+        coords = np.array([[0, 0], [1, 0], [1, 1], [0, 1], [5, 5], [6, 5], [6, 6]], dtype=float)
+        ring_ids = np.array([0, 0, 0, 0, 1, 1, 1])
+        keep = visvalingam_keep(coords, ring_ids, min_area=100)
+        assert keep[:4].sum() == 3 and keep[4:].all()
+
+
+class TestSimplifyGeometries:
+    """Test batched simplification of GeoJSON geometries"""
+    
+    @pytest.mark.parametrize("method", [DOUGLAS_PEUCKER, VISVALINGAM])
+    def test_reduces_vertices_and_keeps_structure(self, method):
+        geometries, stats = simplify_geometries([POLYGON_WITH_HOLE, MULTIPOLYGON, None], 0.002, method)
+        
+        assert geometries[2] is None
+        assert geometries[0]["type"] == "Polygon" and len(geometries[0]["coordinates"]) == 2
+        assert geometries[1]["type"] == "MultiPolygon" and len(geometries[1]["coordinates"]) == 2
+        assert all(shape(geometry).is_valid for geometry in geometries[:2])
+        assert stats["geometries"] == 2
+        assert stats["vertices_after"] < stats["vertices_before"]
+        assert stats["bytes_after"] < stats["bytes_before"]
+        assert 0 < stats["vertices_reduction"] < 1
+    
+    def test_keeps_z_and_passes_through_points(self):
+        polygon_z = {"type": "Polygon", "coordinates": [[[x, y, 400.5] for x, y in wiggly_ring(7.0, 46.0, 0.05)]]}
+        point = {"type": "Point", "coordinates": [7.0, 46.0]}
+        
+        geometries, _ = simplify_geometries([polygon_z, point], 0.002, VISVALINGAM)
+        assert all(len(coordinate) == 3 for coordinate in geometries[0]["coordinates"][0])
+        assert geometries[1] == {"type": "Point", "coordinates": [7.0, 46.0]}
+    
+    def test_precision_drops_z_and_rounds(self):
+        """Test that a precision strips elevation and rounds coordinates"""
+        polygon_z = {"type": "Polygon", "coordinates": [[[x, y, 376.913750000007] for x, y in wiggly_ring(7.0, 46.0, 0.05)]]}
+        
+        geometries, stats = simplify_geometries([polygon_z], 0.002, DOUGLAS_PEUCKER, precision=5)
+        coordinates = geometries[0]["coordinates"][0]
+        assert all(len(coordinate) == 2 for coordinate in coordinates)
+        assert all(value == round(value, 5) for coordinate in coordinates for value in coordinate)
+        assert stats["precision"] == 5
+        assert stats["bytes_after"] < stats["bytes_before"] / 2
+    
+    def test_unknown_method(self):
+        with pytest.raises(ValueError):
+            simplify_geometries([POLYGON_WITH_HOLE], 0.01, "chaikin")
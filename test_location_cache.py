@@ -0,0 +1,60 @@
+"""
+Unit tests for location_cache module
+"""
+from unittest.mock import Mock
+
+from location_cache import LocationCache
+
+
+def resolution(location):
+    match = "Basel" if "basel" in location else None
+    return {"match": match, "method": "exact" if match else None, "scope": "national", "candidates": []}
+
+
+class TestLocationCache:
+    """Test the persistent location resolution memo"""
+    
+    def test_resolves_each_location_once_including_misses(self, tmp_path):
+        cache = LocationCache(str(tmp_path / "locations.json"), "v1")
+        resolve = Mock(side_effect=resolution)
+        
+        resolutions = cache.resolve_many(["basel", "nowhere", "basel", "", "nowhere"], resolve)
+        
+        assert [entry and entry["match"] for entry in resolutions] == ["Basel", None, "Basel", None, None]
+        assert resolve.call_count == 2
+        summary = cache.summary()
+        assert summary["lookups"] == 4
+        assert summary["hits"] == 2
+        assert summary["newly_resolved"] == 1
+        assert summary["newly_unmatched"] == 1
+        assert summary["hit_rate"] == 0.5
+    
+    def test_persists_per_version(self, tmp_path):
+        path = str(tmp_path / "locations.json")
+        cache = LocationCache.load("v1", path)
+        cache.resolve_many(["basel", "nowhere"], resolution)
+        cache.save()
+        
+        resolve = Mock()
+        reloaded = LocationCache.load("v1", path)
+        assert reloaded.resolve_many(["basel", "nowhere"], resolve) == [resolution("basel"), resolution("nowhere")]
+        resolve.assert_not_called()
+        
+        assert LocationCache.load("v2", path).entries == {}
+    
+    def test_store_many_keeps_known_locations(self, tmp_path):
+        """Test that resolutions made elsewhere are recorded once, without overwriting entries"""
+        cache = LocationCache(str(tmp_path / "locations.json"), "v1")
+        cache.entries["basel"] = {"match": "Basel", "method": "exact"}
+        
+        cache.store_many({
+            "basel": {"match": "Other", "method": "fuzzy"},
+            "bern": {"match": "Bern", "method": "exact"},
+            "": {"match": None, "method": None},
+            "nowhere": {"match": None, "method": None}
+        })
+        
+        assert {location: entry["match"] for location, entry in cache.entries.items()} == {
+            "basel": "Basel", "bern": "Bern", "nowhere": None
+        }
+        assert cache.stats["newly_resolved"] == 1 and cache.stats["newly_unmatched"] == 1
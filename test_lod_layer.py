@@ -0,0 +1,62 @@
+"""
+Unit tests for lod_layer module
+"""
+import json
+
+import folium
+import pytest
+
+import lod_layer
+from lod_layer import LevelOfDetailLayer, level_for_zoom, load_lod_levels
+
+LEVELS = [
+    {"name": "cantons", "object": "cantons", "max_zoom": 7, "tolerance": 0.01},
+    {"name": "coarse", "object": "municipalities", "max_zoom": 9, "tolerance": 0.007},
+    {"name": "fine", "object": "municipalities", "max_zoom": None, "tolerance": 0.001}
+]
+
+
+@pytest.fixture
+def lod_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(lod_layer, "LOD_DIR", str(tmp_path))
+    for level in LEVELS:
+        topology = {"type": "Topology", "objects": {level["object"]: {"type": "GeometryCollection",
+                                                                      "geometries": []}}, "arcs": []}
+        (tmp_path / f"{level['name']}.json").write_text(json.dumps(topology))
+    return tmp_path
+
+
+class TestLevels:
+    """Test choosing and loading the level for a zoom"""
+    
+    @pytest.mark.parametrize("zoom, name", [(5, "cantons"), (7, "cantons"), (8, "coarse"), (9, "coarse"),
+                                            (10, "fine"), (18, "fine")])
+    def test_level_for_zoom(self, zoom, name):
+        """Test that each zoom maps to the first level covering it"""
+        assert level_for_zoom(LEVELS, zoom)["name"] == name
+    
+    def test_only_initial_level_embedded(self, lod_dir):
+        """Test that only the level for the initial zoom carries its topology"""
+        levels = load_lod_levels(8, LEVELS)
+        
+        assert [level["name"] for level in levels] == ["cantons", "coarse", "fine"]
+        assert [("data" in level) for level in levels] == [False, True, False]
+        assert levels[1]["data"]["type"] == "Topology"
+        assert levels[2]["url"].endswith("/fine.json")
+    
+    def test_missing_level_disables_lod(self, lod_dir):
+        """Test that the map falls back when preprocessing did not write every level"""
+        (lod_dir / "fine.json").unlink()
+        
+        assert load_lod_levels(8, LEVELS) is None
+    
+    def test_layer_renders_levels_and_details(self, lod_dir):
+        """Test that the map page embeds the levels, the details and the topojson library"""
+        m = folium.Map()
+        details = {"municipalities": {"Bern": {"style": {"weight": 2}, "tooltip": "<b>Bern</b>", "popup": "Gigs"}}}
+        LevelOfDetailLayer(load_lod_levels(6, LEVELS), details).add_to(m)
+        html = m.get_root().render()
+        
+        assert "topojson.min.js" in html
+        assert "app/static/lod/coarse.json" in html
+        assert '"Bern"' in html and 'map.on("zoomend"' in html
@@ -0,0 +1,123 @@
+"""
+Unit tests for match_report module
+"""
+import json
+
+from fuzzy_matcher import FuzzyMatcher
+from geo_processor import match_gig_locations
+from location_matchers import LocationMatchers
+from match_report import StageTimer, build_match_report, save_match_report
+from municipality_matcher import MunicipalityMatcher
+
+NAMES = ["Buchs (AG)", "Buchs", "Buchs", "Wil", "Uri", "Winterthur", "Genève"]
+ALIASES = {"Genf": "Genève"}
+
+
+def make_matchers(canton_names=None):
+    return LocationMatchers(
+        MunicipalityMatcher(NAMES, aliases=ALIASES),
+        FuzzyMatcher(NAMES, aliases=ALIASES),
+        {canton: (MunicipalityMatcher(names), FuzzyMatcher(names)) for canton, names in (canton_names or {}).items()}
+    )
+
+
+def recorded_resolutions(gigs, matchers):
+    """How matching resolved each location key of gigs, as the report gets it from the location cache"""
+    resolutions = {}
+    match_gig_locations(gigs, matchers=matchers, resolutions=resolutions)
+    return resolutions
+
+
+class TestMatchReport:
+    """Test the match-quality report"""
+    
+    def test_counts_per_canton_and_method(self):
+        gigs = [
+            {"location": "Winterthur", "canton": "ZH"},
+            {"location": "Winterhur", "canton": "ZH"},
+            {"location": "Genf", "canton": "GE"},
+            {"location": "Nowhere", "canton": "GE"},
+            {"location": "Nowhere", "canton": "GE"},
+            {"location": "", "canton": "BE"},
+            {"location": "Winterthur", "canton": "ZH", "venue": "Somewhere"}
+        ]
+        matches = ["Winterthur", "Winterthur", "Genève", None, None, None, "Wil"]
+        
+        report = build_match_report(gigs, matches, recorded_resolutions(gigs, make_matchers()), {"match": 0.5})
+        
+        assert report["per_canton"] == {
+            "BE": {"matched": 0, "unmatched": 1, "fallback": 0},
+            "GE": {"matched": 1, "unmatched": 2, "fallback": 0},
+            "ZH": {"matched": 3, "unmatched": 0, "fallback": 0}
+        }
+        assert report["methods"] == {"exact": 1, "alias": 1, "fuzzy": 1, "venue": 1, "unmatched": 3}
+        assert report["unmatched_locations"] == [{"location": "Nowhere", "gigs": 2}, {"location": "", "gigs": 1}]
+        assert report["totals"]["coverage"] == round(4 / 7, 4)
+        assert report["timing"]["stages"] == {"match": 0.5}
+        assert report["timing"]["exact_pass"]["locations"] == 2
+        assert report["timing"]["fuzzy_pass"]["locations"] == 2
+    
+    def test_reports_ties_between_different_municipalities(self):
+        gigs = [
+            {"location": "Uri Wil", "canton": "SG"},
+            {"location": "Uri-Wil", "canton": "SG"},
+            {"location": "Buchs", "canton": "SG"}
+        ]
+        matchers = make_matchers()
+        matches = [matchers.matcher.match(gig["location"]) for gig in gigs]
+        
+        report = build_match_report(gigs, matches, recorded_resolutions(gigs, matchers))
+        
+        # Duplicate names of one pattern ('Buchs' twice) are not a tie; 'Uri Wil' and 'Uri-Wil' normalize alike
+        assert report["ambiguous"] == [
+            {"location": "Uri Wil", "canton": "SG", "chosen": "Wil", "candidates": ["Wil", "Uri"], "gigs": 2}
+        ]
+    
+    def test_counts_canton_fallbacks(self):
+        gigs = [
+            {"location": "Uri Wil", "canton": "UR"},
+            {"location": "Winterthur", "canton": "UR"},
+            {"location": "Winterthur", "canton": None}
+        ]
+        matchers = make_matchers({"UR": ["Uri"], "ZH": ["Winterthur"]})
+        
+        report = build_match_report(gigs, ["Uri", "Winterthur", "Winterthur"], recorded_resolutions(gigs, matchers))
+        
+        assert report["scopes"] == {"canton": 1, "fallback": 1, "national": 1}
+        assert report["per_canton"]["UR"] == {"matched": 2, "unmatched": 0, "fallback": 1}
+        assert report["totals"]["canton_fallbacks"] == 1
+        assert report["ambiguous"] == []
+    
+    def test_uses_recorded_resolutions(self):
+        """Test that pass timings come from the recorded seconds and unrecorded keys count as unmatched"""
+        gigs = [
+            {"location": "Winterthur", "canton": "ZH"},
+            {"location": "Winterhur", "canton": "ZH"},
+            {"location": "Basel", "canton": "BS"}
+        ]
+        resolutions = {
+            "ZH|winterthur": {"match": "Winterthur", "method": "exact", "scope": "canton",
+                              "candidates": ["Winterthur"], "seconds": 0.25},
+            "ZH|winterhur": {"match": "Winterthur", "method": "fuzzy", "scope": "canton",
+                             "candidates": [], "seconds": 0.5}
+        }
+        
+        report = build_match_report(gigs, ["Winterthur", "Winterthur", None], resolutions)
+        
+        assert report["timing"]["exact_pass"] == {"locations": 1, "seconds": 0.25, "us_per_location": 250000.0}
+        assert report["timing"]["fuzzy_pass"] == {"locations": 2, "seconds": 0.5, "us_per_location": 250000.0}
+        assert report["methods"] == {"exact": 1, "alias": 0, "fuzzy": 1, "venue": 0, "unmatched": 1}
+        assert report["totals"]["distinct_locations"] == 3
+    
+    def test_save_and_stage_timer(self, tmp_path):
+        timer = StageTimer()
+        with timer.stage("match"):
+            pass
+        with timer.stage("match"):
+            pass
+        assert list(timer.summary()) == ["match"]
+        
+        path = tmp_path / "report" / "match_report.json"
+        report = build_match_report([], [], {}, timer.seconds)
+        save_match_report(report, str(path))
+        assert json.loads(path.read_text())["totals"]["gigs"] == 0
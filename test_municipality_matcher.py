@@ -0,0 +1,233 @@
+"""
+Unit tests for municipality_matcher module
+"""
+import json
+import random
+from unittest.mock import patch
+
+import geo_processor
+from fuzzy_matcher import FuzzyMatcher
+from location_cache import LocationCache
+from location_matchers import LocationMatchers
+from municipality_matcher import MunicipalityMatcher, get_matcher
+from normalizer import normalize_municipality_name
+
+
+def linear_match(location_text, municipality_names):
+    """The original longest-match scan the automaton must agree with"""
+    normalized_location = normalize_municipality_name(location_text)
+    best_match, longest = None, 0
+    for municipality in municipality_names:
+        normalized = normalize_municipality_name(municipality)
+        if normalized and normalized in normalized_location and len(normalized) > longest:
+            best_match, longest = municipality, len(normalized)
+    return best_match
+
+
+class TestMunicipalityMatcher:
+    """Test the Aho-Corasick municipality matcher"""
+    
+    def test_prefers_longest_match(self):
+        matcher = MunicipalityMatcher(["Gallen", "Sankt Gallen", "Bern"])
+        assert matcher.match("Sankt Gallen, Palace") == "Sankt Gallen"
+        assert matcher.match("Bern Dachstock") == "Bern"
+        assert matcher.match("Genève") is None
+        assert matcher.match("") is None
+    
+    def test_overlapping_and_nested_patterns(self):
+        """Test matches that end inside other patterns and are only reachable via failure links"""
+        matcher = MunicipalityMatcher(["he", "she", "hers", "his"])
+        assert matcher.match("ushers") == "hers"
+        assert matcher.match("ahishe") == "she"  # as long as "his", but listed first
+    
+    def test_ties_go_to_first_listed(self):
+        assert MunicipalityMatcher(["Wil", "Uri"]).match("Uri und Wil") == "Wil"
+        assert MunicipalityMatcher(["Uri", "Wil"]).match("Wil und Uri") == "Uri"
+        assert MunicipalityMatcher(["Bi-el", "Biel"]).match("biel") == "Bi-el"
+    
+    def test_agrees_with_linear_scan(self):
+        """Test identical results to the linear scan on random names and locations"""
+        rng = random.Random(42)
+        alphabet = "abcé -."
+        names = ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 5))) for _ in range(60)]
+        matcher = MunicipalityMatcher(names)
+        
+        for _ in range(500):
+            location = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 20)))
+            assert matcher.match(location) == linear_match(location, names), location
+    
+    def test_folds_diacritics(self):
+        matcher = MunicipalityMatcher(["Zürich", "Chavannes-près-Renens"])
+        assert matcher.match("ZURICH Kaufleuten") == "Zürich"
+        assert matcher.match("Chavannes-pres-Renens") == "Chavannes-près-Renens"
+    
+    def test_match_many(self):
+        matcher = MunicipalityMatcher(["Basel", "Bern"])
+        assert matcher.match_many(["Basel", None, "", "Bern", "Basel"]) == ["Basel", None, None, "Bern", "Basel"]
+    
+    def test_get_matcher_is_shared_per_list(self):
+        names = ["Basel", "Bern"]
+        assert get_matcher(names) is get_matcher(list(names))
+        assert get_matcher(names) is not get_matcher(["Basel"])
+    
+    def test_get_matcher_skips_hashing_for_the_same_list(self):
+        """Test that repeated calls with the same list object do not rebuild the lookup key"""
+        names = ["Basel", "Bern"]
+        matcher = get_matcher(names)
+        with patch("municipality_matcher._matcher_for") as matcher_for:
+            assert get_matcher(names) is matcher
+            matcher_for.assert_not_called()
+            get_matcher(list(names))
+            matcher_for.assert_called_once()
+    
+    def test_location_matchers_are_built_once(self):
+        """Test that get_location_matchers hands every caller the same object"""
+        geo_data = {"features": [{"properties": {"gemeinde.NAME": "Lyss", "kanton.KUERZEL": "BE"}}]}
+        with patch("geo_processor.load_swiss_municipalities", return_value=geo_data), \
+                patch("geo_processor.get_municipality_aliases", return_value={}):
+            matchers = geo_processor.get_location_matchers()
+            assert geo_processor.get_location_matchers() is matchers
+            assert matchers.canton_matchers["BE"][0].match("Lyss") == "Lyss"
+
+
+class TestMunicipalityAliases:
+    """Test alias resolution through BFS numbers"""
+    
+    geo_data = {"features": [
+        {"properties": {"gemeinde.NAME": "Genève", "gemeinde.BFS_NUMMER": 6621}},
+        {"properties": {"gemeinde.NAME": "Biel/Bienne", "gemeinde.BFS_NUMMER": 371}},
+        {"properties": {"gemeinde.NAME": "Gen", "gemeinde.BFS_NUMMER": 9999}}
+    ]}
+    
+    def test_matcher_resolves_aliases(self):
+        matcher = MunicipalityMatcher(["Genève", "Biel/Bienne"], {"Genf": "Genève", "Bienne": "Biel/Bienne"})
+        assert matcher.match("Genf, Usine") == "Genève"
+        assert matcher.match("Bienne Coupole") == "Biel/Bienne"
+        assert matcher.match("Biel/Bienne") == "Biel/Bienne"
+    
+    def test_names_win_ties_against_aliases(self):
+        matcher = MunicipalityMatcher(["Sion", "Sitten"], {"Sion": "Sitten"})
+        assert matcher.match("Sion") == "Sion"
+    
+    def test_shipped_aliases_do_not_match_inside_other_words(self):
+        """Test that no shipped alias is contained in common venue or place words (aliases only, no names)"""
+        by_bfs = {351: "Bern", 3340: "Rapperswil-Jona", 3762: "Scuol"}
+        aliases = {alias: by_bfs[bfs_number] for alias, bfs_number in geo_processor.load_municipality_aliases().items()
+                   if bfs_number in by_bfs}
+        matcher = MunicipalityMatcher([], aliases)
+        
+        for location in ("San Bernardino", "Bar Jonas", "Guardaval", "Piz Guarda"):
+            assert matcher.match(location) is None, location
+        assert matcher.match("Berne, Dampfzentrale") == "Bern"
+    
+    def test_alias_table_is_resolved_by_bfs_number(self, tmp_path):
+        path = tmp_path / "aliases.json"
+        path.write_text(json.dumps({"Genf": 6621, "Bienne": 371, "Old Village": 1}), encoding="utf-8")
+        aliases = geo_processor.load_municipality_aliases(str(path))
+        
+        with patch("geo_processor.load_swiss_municipalities", return_value=self.geo_data), \
+                patch("geo_processor.load_municipality_aliases", return_value=aliases):
+            geo_processor.get_municipalities_by_bfs.clear()
+            geo_processor.get_municipality_aliases.clear()
+            assert geo_processor.get_municipalities_by_bfs()[6621] == "Genève"
+            # Aliases of municipalities that are not in the GeoJSON are dropped
+            assert geo_processor.get_municipality_aliases() == {"Genf": "Genève", "Bienne": "Biel/Bienne"}
+        
+        geo_processor.get_municipalities_by_bfs.clear()
+        geo_processor.get_municipality_aliases.clear()
+
+
+class TestCantonMatching:
+    """Test matching within the gig's canton first, with the national index as fallback"""
+    
+    geo_data = {"features": [
+        {"properties": {"gemeinde.NAME": "Laax", "kanton.KUERZEL": "GR"}},
+        {"properties": {"gemeinde.NAME": "Lyss", "kanton.KUERZEL": "BE"}}
+    ]}
+    gigs = [
+        {"location": "Laax / Lyss", "canton": "BE"},
+        {"location": "Laax / Lyss", "canton": "GR"},
+        {"location": "Laax / Lyss", "canton": None},
+        {"location": "Laax", "canton": "BE"}
+    ]
+    
+    def match(self, **kwargs):
+        with patch("geo_processor.load_swiss_municipalities", return_value=self.geo_data), \
+                patch("geo_processor.get_municipality_aliases", return_value={}):
+            geo_processor.get_municipality_names.clear()
+            geo_processor.get_municipality_cantons.clear()
+            geo_processor.get_location_matchers.clear()
+            try:
+                return geo_processor.match_gig_locations(self.gigs, **kwargs)
+            finally:
+                geo_processor.get_municipality_names.clear()
+                geo_processor.get_municipality_cantons.clear()
+    
+    def test_own_canton_first_then_national(self):
+        # Without a canton the tie goes to the first listed name; out-of-canton places still match
+        assert self.match() == ["Lyss", "Laax", "Laax", "Laax"]
+        
+        with patch("geo_processor.CANTON_MATCHING_ENABLED", False):
+            assert self.match() == ["Laax", "Laax", "Laax", "Laax"]
+    
+    def test_cache_is_keyed_by_canton(self, tmp_path):
+        cache = LocationCache(str(tmp_path / "locations.json"), "v1")
+        assert self.match(location_cache=cache) == ["Lyss", "Laax", "Laax", "Laax"]
+        assert {key: entry["match"] for key, entry in cache.entries.items()} == {
+            "BE|laaxlyss": "Lyss", "GR|laaxlyss": "Laax", "|laaxlyss": "Laax", "BE|laax": "Laax"
+        }
+        assert cache.entries["GR|laaxlyss"]["scope"] == "canton"
+    
+    def test_location_resolutions_fill_in_missing_keys(self, tmp_path):
+        """Test that keys missing from the cache (e.g. of reused cantons) are resolved and stored"""
+        cache = LocationCache(str(tmp_path / "locations.json"), "v1")
+        self.match(location_cache=cache)
+        del cache.entries["BE|laax"]
+        
+        with patch("geo_processor.load_swiss_municipalities", return_value=self.geo_data), \
+                patch("geo_processor.get_municipality_aliases", return_value={}):
+            geo_processor.get_municipality_names.clear()
+            geo_processor.get_municipality_cantons.clear()
+            geo_processor.get_location_matchers.clear()
+            try:
+                resolutions = geo_processor.location_resolutions(self.gigs, cache)
+            finally:
+                geo_processor.get_municipality_names.clear()
+                geo_processor.get_municipality_cantons.clear()
+        
+        assert list(resolutions) == ["BE|laaxlyss", "GR|laaxlyss", "|laaxlyss", "BE|laax"]
+        assert resolutions["BE|laax"]["method"] == "exact" and resolutions["BE|laax"] is cache.entries["BE|laax"]
+        assert resolutions["BE|laaxlyss"]["match"] == "Lyss"
+    
+    def test_match_report_only_written_to_a_given_path(self, tmp_path, monkeypatch):
+        """Test that match_gigs_to_municipalities writes no report unless it is given a path"""
+        monkeypatch.chdir(tmp_path)
+        with patch("geo_processor.load_swiss_municipalities", return_value=self.geo_data), \
+                patch("geo_processor.get_municipality_aliases", return_value={}):
+            geo_processor.get_municipality_names.clear()
+            geo_processor.get_municipality_cantons.clear()
+            geo_processor.get_location_matchers.clear()
+            try:
+                municipality_gigs = geo_processor.match_gigs_to_municipalities(self.gigs)
+                assert list(tmp_path.iterdir()) == []
+                geo_processor.match_gigs_to_municipalities(self.gigs, str(tmp_path / "report.json"))
+            finally:
+                geo_processor.get_municipality_names.clear()
+                geo_processor.get_municipality_cantons.clear()
+        
+        assert {name: len(gigs) for name, gigs in municipality_gigs.items()} == {"Lyss": 1, "Laax": 3}
+        report = json.loads((tmp_path / "report.json").read_text())
+        assert report["methods"]["exact"] == 4
+    
+    def test_fuzzy_matches_stay_within_the_canton(self):
+        def matchers_for(names):
+            return MunicipalityMatcher(names), FuzzyMatcher(names)
+        
+        matchers = LocationMatchers(*matchers_for(["Selzach", "Winterthur"]), {
+            "SO": matchers_for(["Selzach"]),
+            "ZH": matchers_for(["Winterthur"])
+        })
+        assert matchers.resolve("Selzah", "selzah", "SO") == ("Selzach", "canton")
+        assert matchers.resolve("Selzach", "selzach", "ZH") == ("Selzach", "fallback")
+        assert matchers.resolve("Selzah", "selzah", "ZH") == (None, None)
+        assert matchers.resolve("Selzah", "selzah", None) == ("Selzach", "national")
@@ -0,0 +1,51 @@
+"""
+Unit tests for parallel_processing module
+"""
+import multiprocessing
+from unittest.mock import patch
+
+from geo_processor import match_gig_locations
+from location_cache import LocationCache
+from parallel_processing import process_and_match_gigs
+
+
+def raw_gig(i: int) -> dict:
+    return {
+        "date": f"2025-0{1 + i % 3}-0{1 + i % 2}T20:00:00Z",
+        "band_name": f"Band {i % 4}",
+        "band": {"id": i, "categories": [{"name": "Rock"}]},
+        "stage_name": f"Venue {i}",
+        "location": ["Basel", "Bern, Dachstock", "Zürich", "Nowhere", "Genf"][i % 5],
+        "canton": "BE"
+    }
+
+
+class TestProcessAndMatchGigs:
+    """Test the process-pool map-reduce against the in-process path"""
+    
+    def test_pool_matches_in_process_result(self):
+        raw_gigs = [raw_gig(i) for i in range(23)]
+        expected_gigs, expected_matches = process_and_match_gigs(raw_gigs, min_parallel_gigs=10**9)
+        
+        gigs, matches = process_and_match_gigs(raw_gigs, max_workers=2, min_parallel_gigs=1, shard_size=5)
+        
+        # Ties on (date, band) keep their input order, exactly as with one stable sort
+        assert [gig["venue"] for gig in gigs] == [gig["venue"] for gig in expected_gigs]
+        assert gigs == expected_gigs
+        assert matches == expected_matches
+        assert "Basel" in matches and None in matches
+    
+    def test_pool_never_forks_and_fills_location_cache(self, tmp_path):
+        """Test that workers start without fork and their resolutions land in the location cache"""
+        raw_gigs = [raw_gig(i) for i in range(23)]
+        cache = LocationCache(str(tmp_path / "locations.json"), "v1")
+        
+        with patch("parallel_processing.multiprocessing.get_context", wraps=multiprocessing.get_context) as context:
+            gigs, matches = process_and_match_gigs(raw_gigs, cache, max_workers=2, min_parallel_gigs=1, shard_size=5)
+        
+        assert context.call_args.args[0] in ("forkserver", "spawn")
+        assert cache.stats["newly_resolved"] == 4 and cache.stats["newly_unmatched"] == 1
+        
+        # The in-process path now answers every location from the cache
+        assert match_gig_locations(gigs, cache) == matches
+        assert cache.stats["hits"] == len(gigs) and cache.stats["newly_resolved"] == 4
@@ -0,0 +1,155 @@
+"""
+Unit tests for preprocess_data module
+"""
+import json
+from unittest.mock import Mock, patch
+
+import pytest
+
+from location_cache import LocationCache
+from match_report import StageTimer
+from parallel_processing import process_and_match_gigs
+import lod_layer
+from band_enrichment import enrich_gigs_with_band_details
+from config import SIMPLIFY_TOLERANCE
+from preprocess_data import (
+    build_lod_topologies, build_municipality_topology, build_vector_tiles, merge_canton_results,
+    process_canton_stream
+)
+from refresh_state import RefreshState
+
+
+def raw_gig(canton: str, band_name: str, location: str) -> dict:
+    return {"date": "2025-01-01T20:00:00Z", "band_name": band_name, "band": {"id": 1},
+            "location": location, "canton": canton}
+
+
+@pytest.fixture
+def state_path(tmp_path):
+    return str(tmp_path / "refresh_state.json")
+
+
+def run(stream, state_path, failed_cantons=frozenset()):
+    """One refresh over the stream, against the state saved by the previous one"""
+    state = RefreshState.load(state_path, "v1")
+    with patch("preprocess_data.process_and_match_gigs", wraps=process_and_match_gigs) as process:
+        gigs, matches = process_canton_stream(iter(stream), set(failed_cantons), state,
+                                              LocationCache("unused.json", "v1"), StageTimer())
+    state.save()
+    return gigs, matches, state, process
+
+
+class TestProcessCantonStream:
+    """Test the per-canton reuse loop of a refresh"""
+    
+    STREAM = [raw_gig("BE", "A", "Bern"), raw_gig("BE", "B", "Thun"), raw_gig("ZH", "C", "Winterthur")]
+    
+    def test_unchanged_cantons_are_reused(self, state_path):
+        """Test that a second refresh over the same payloads processes nothing and returns the same result"""
+        first = run(self.STREAM, state_path)
+        gigs, matches, state, process = run(self.STREAM, state_path)
+        
+        assert process.call_count == 0
+        assert state.stats["cantons_reused"] == 2
+        assert [gig["band_name"] for gig in gigs] == [gig["band_name"] for gig in first[0]]
+        assert matches == first[1] == ["Bern", "Thun", "Winterthur"]
+    
+    def test_changed_canton_is_reprocessed(self, state_path):
+        """Test that only the canton whose payload changed is processed again"""
+        run(self.STREAM, state_path)
+        changed = self.STREAM[:2] + [raw_gig("ZH", "C", "Zürich")]
+        gigs, matches, state, process = run(changed, state_path)
+        
+        assert process.call_count == 1
+        assert {gig["canton"] for gig in process.call_args.args[0]} == {"ZH"}
+        assert matches == ["Bern", "Thun", "Zürich"]
+    
+    def test_removed_canton_is_dropped(self, state_path):
+        """Test that a canton without gigs in this refresh is forgotten"""
+        run(self.STREAM, state_path)
+        *_, state, _ = run(self.STREAM[:2], state_path)
+        
+        assert set(state.cantons) == {"BE"}
+    
+    def test_failed_canton_keeps_previous_results(self, state_path):
+        """Test that a failed canton's partial gigs are discarded for its last complete results"""
+        run(self.STREAM, state_path)
+        gigs, matches, state, process = run(self.STREAM[:1] + self.STREAM[2:], state_path, failed_cantons={"BE"})
+        
+        assert process.call_count == 0
+        assert sorted(gig["band_name"] for gig in gigs) == ["A", "B", "C"]
+        assert set(state.cantons) == {"BE", "ZH"}
+        assert state.cantons["BE"]["matches"] == ["Bern", "Thun"]
+    
+    
+    def test_band_details_stay_out_of_the_state(self, state_path):
+        """Test that band details follow the current lookup on a reused canton, and are never saved"""
+        client = Mock()
+        client.get_band_details.return_value = {"city": "Bern"}
+        
+        def refresh():
+            gigs, matches, state, _ = run(self.STREAM, state_path)
+            gigs, matches = merge_canton_results(gigs, matches)
+            # A band cache that never hits, so every refresh looks the bands up again
+            enrich_gigs_with_band_details(gigs, client, Mock(lookup=Mock(return_value=None)))
+            state.save()
+            return gigs, state
+        
+        gigs, _ = refresh()
+        assert [gig["band_details"] for gig in gigs] == [{"city": "Bern"}] * 3
+        
+        client.get_band_details.return_value = None
+        gigs, state = refresh()
+        assert state.stats["cantons_reused"] == 2
+        assert not any("band_details" in gig for gig in gigs)
+        with open(state_path) as f:
+            assert "band_details" not in f.read()
+
+
+class TestLodTopologies:
+    """Test writing the level-of-detail topologies"""
+    
+    def test_level_at_simplify_tolerance_reuses_the_topology(self, tmp_path, monkeypatch):
+        """Test that the level at SIMPLIFY_TOLERANCE is the given topology, not a rebuilt one"""
+        monkeypatch.setattr(lod_layer, "LOD_DIR", str(tmp_path))
+        monkeypatch.setattr("preprocess_data.LOD_DIR", str(tmp_path))
+        monkeypatch.setattr("preprocess_data.LOD_LEVELS", [
+            {"name": "coarse", "object": "municipalities", "max_zoom": 9, "tolerance": SIMPLIFY_TOLERANCE},
+            {"name": "fine", "object": "municipalities", "max_zoom": None, "tolerance": 0.001}
+        ])
+        feature_index = {"Bern": {
+            "geometry": {"type": "Polygon", "coordinates": [[[7.3, 46.9], [7.5, 46.9], [7.5, 47.0], [7.3, 46.9]]]},
+            "properties": {"gemeinde.BFS_NUMMER": 351, "kanton.KUERZEL": "BE"}
+        }}
+        municipality_gigs = {"Bern": [{"canton": "BE"}]}
+        topology, stats = build_municipality_topology(municipality_gigs, feature_index)
+        
+        with patch("preprocess_data.build_municipality_topology", wraps=build_municipality_topology) as build:
+            lod_stats = build_lod_topologies(municipality_gigs, feature_index, {}, (topology, stats))
+        
+        assert [call.args[2] for call in build.call_args_list] == [0.001]
+        assert json.loads((tmp_path / "coarse.json").read_text()) == json.loads(json.dumps(topology))
+        assert lod_stats["coarse"]["arcs"] == stats["arcs"]
+
+
+class TestVectorTiles:
+    """Test which boundary source the vector tiles are built from"""
+    
+    GEO_DATA = {"features": [{
+        "geometry": {"type": "Polygon", "coordinates": [[[7.3, 46.9], [7.5, 46.9], [7.5, 47.0], [7.3, 46.9]]]},
+        "properties": {"gemeinde.NAME": "Bern", "gemeinde.BFS_NUMMER": 351, "kanton.KUERZEL": "BE"}
+    }]}
+    
+    def test_tiles_only_from_the_full_boundary_file(self, tmp_path, monkeypatch):
+        """Test that tiles are built from gemeinden.geojson, and old tiles removed without it"""
+        tiles_dir = tmp_path / "tiles"
+        monkeypatch.setattr("preprocess_data.TILES_DIR", str(tiles_dir))
+        monkeypatch.setattr("preprocess_data.TILES_ENABLED", True)
+        
+        stats = build_vector_tiles(dict(self.GEO_DATA, source="data/gemeinden.geojson"), {"Bern": [{}]})
+        assert stats["source"] == "data/gemeinden.geojson" and stats["features"] == 1
+        assert (tiles_dir / "metadata.json").exists()
+        
+        assert build_vector_tiles(dict(self.GEO_DATA, source="data/simplified_geo.json"), {"Bern": [{}]}) is None
+        assert not tiles_dir.exists()
+        assert build_vector_tiles(self.GEO_DATA, {"Bern": [{}]}) is None
@@ -0,0 +1,131 @@
+"""
+Unit tests for refresh_state module
+"""
+from datetime import datetime
+
+from refresh_state import RefreshState, payload_digest, state_version
+
+
+def gig(band_name: str) -> dict:
+    return {"band_name": band_name, "parsed_date": datetime(2025, 1, 1, 20, 0)}
+
+
+RAW_BE = [{"band_name": "A", "location": "Bern"}, {"band_name": "B", "location": "Thun"}]
+
+
+def saved_state(path: str, version: str = "v1") -> RefreshState:
+    state = RefreshState(path, version)
+    state.put_canton("BE", payload_digest(RAW_BE), [gig("A"), gig("B")], ["Bern", "Thun"])
+    state.put_canton("ZH", payload_digest([]), [], [])
+    state.save()
+    return state
+
+
+class TestVersions:
+    """Test payload digests and state versions"""
+    
+    def test_payload_digest_is_stable(self):
+        """Test that equal payloads hash equally regardless of key order, and changes show"""
+        reordered = [{"location": "Bern", "band_name": "A"}, {"location": "Thun", "band_name": "B"}]
+        
+        assert payload_digest(RAW_BE) == payload_digest(reordered)
+        assert payload_digest(RAW_BE) != payload_digest(RAW_BE[:1])
+    
+    def test_state_version_tracks_names_and_settings(self):
+        """Test that the version changes with the municipality list or matching settings, not name order"""
+        version = state_version(["Bern", "Thun"], {"fuzzy": True})
+        
+        assert version == state_version(["Thun", "Bern"], {"fuzzy": True})
+        assert version != state_version(["Bern", "Thun", "Biel"], {"fuzzy": True})
+        assert version != state_version(["Bern", "Thun"], {"fuzzy": False})
+
+
+class TestCantonReuse:
+    """Test reusing per-canton results between refreshes"""
+    
+    def test_unchanged_digest_reuses_results(self, tmp_path):
+        """Test that a canton with the same payload gets its stored gigs and matches back"""
+        path = str(tmp_path / "refresh_state.json")
+        saved_state(path)
+        
+        state = RefreshState.load(path, "v1")
+        gigs, matches = state.get_canton("BE", payload_digest(RAW_BE))
+        
+        assert gigs == [gig("A"), gig("B")]
+        assert isinstance(gigs[0]["parsed_date"], datetime)
+        assert matches == ["Bern", "Thun"]
+        assert state.stats["cantons_reused"] == 1 and state.stats["cantons_reprocessed"] == 0
+    
+    def test_changed_digest_reprocesses(self, tmp_path):
+        """Test that a canton whose payload changed is reprocessed and its new results stored"""
+        path = str(tmp_path / "refresh_state.json")
+        saved_state(path)
+        changed = RAW_BE + [{"band_name": "C", "location": "Biel"}]
+        
+        state = RefreshState.load(path, "v1")
+        assert state.get_canton("BE", payload_digest(changed)) is None
+        assert state.stats["cantons_reprocessed"] == 1
+        
+        state.put_canton("BE", payload_digest(changed), [gig("A"), gig("B"), gig("C")], ["Bern", "Thun", "Biel"])
+        state.save()
+        assert RefreshState.load(path, "v1").get_canton("BE", payload_digest(changed))[1] == ["Bern", "Thun", "Biel"]
+    
+    def test_version_bump_invalidates_state(self, tmp_path):
+        """Test that a state saved under another version starts empty"""
+        path = str(tmp_path / "refresh_state.json")
+        saved_state(path)
+        
+        state = RefreshState.load(path, "v2")
+        
+        assert state.cantons == {}
+        assert state.get_canton("BE", payload_digest(RAW_BE)) is None
+    
+    def test_retain_cantons_drops_removed_cantons(self, tmp_path):
+        """Test that cantons missing from a refresh are forgotten, and the rest kept"""
+        path = str(tmp_path / "refresh_state.json")
+        state = saved_state(path)
+        
+        state.retain_cantons({"BE"})
+        state.save()
+        
+        assert set(RefreshState.load(path, "v1").cantons) == {"BE"}
+
+
+class TestFailedCantons:
+    """Test keeping a canton's previous results when its fetch fails"""
+    
+    def test_failed_canton_keeps_last_complete_results(self, tmp_path):
+        """Test that a failed canton gets its stored results, whatever its partial payload hashes to"""
+        path = str(tmp_path / "refresh_state.json")
+        state = RefreshState(path, "v1")
+        state.put_canton("BE", payload_digest([{"band_name": "A"}]), [gig("A")], ["Bern"])
+        state.save()
+        
+        reloaded = RefreshState.load(path, "v1")
+        gigs, matches = reloaded.get_failed_canton("BE")
+        
+        assert gigs == [gig("A")] and matches == ["Bern"]
+        assert reloaded.get_failed_canton("ZH") is None
+        assert reloaded.stats["cantons_failed"] == 2
+
+
+class TestGeometryReuse:
+    """Test reusing simplified geometries between refreshes"""
+    
+    SETTINGS = {"method": "douglas-peucker", "tolerance": 0.007, "precision": 5}
+    SOURCE = {"type": "Polygon", "coordinates": [[[7.3, 46.9], [7.5, 46.9], [7.5, 47.0], [7.3, 46.9]]]}
+    SIMPLIFIED = {"type": "Polygon", "coordinates": [[[7.3, 46.9], [7.5, 47.0], [7.3, 46.9]]]}
+    
+    def test_reused_only_for_same_settings_and_source(self, tmp_path):
+        """Test that changed settings or a changed source boundary (same name) are simplified again"""
+        path = str(tmp_path / "refresh_state.json")
+        state = RefreshState(path, "v1")
+        state.put_geometry("Bern", self.SETTINGS, payload_digest(self.SOURCE), self.SIMPLIFIED)
+        state.save()
+        
+        state = RefreshState.load(path, "v1")
+        moved = {"type": "Polygon", "coordinates": [[[7.3, 46.9], [7.6, 46.9], [7.5, 47.0], [7.3, 46.9]]]}
+        assert state.get_geometry("Bern", self.SETTINGS, payload_digest(self.SOURCE)) == self.SIMPLIFIED
+        assert state.get_geometry("Bern", self.SETTINGS, payload_digest(moved)) is None
+        assert state.get_geometry("Bern", dict(self.SETTINGS, tolerance=0.001), payload_digest(self.SOURCE)) is None
+        assert state.stats["geometries_reused"] == 1
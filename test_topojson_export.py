@@ -0,0 +1,103 @@
+"""
+Unit tests for topojson_export module
+"""
+import math
+
+from shapely.geometry import shape
+
+from topojson_export import TOPOJSON_OBJECT, build_topology, topology_features
+
+
+def feature(name: str, geometry: dict) -> dict:
+    return {"type": "Feature", "properties": {"name": name}, "geometry": geometry}
+
+
+def wiggly_border(steps: int = 200):
+    """Points from (10, 0) up to (10, 10), wiggling around x = 10"""
+    return [[10 + 0.3 * math.sin(k * 0.7), 10 * k / steps] for k in range(steps + 1)]
+
+
+def neighbours():
+    """Two polygons sharing a detailed border: west of it [0, 10] x [0, 10], east of it up to x = 20"""
+    border = wiggly_border()
+    west = [[0, 0]] + border + [[0, 10], [0, 0]]
+    east = border[::-1] + [[20, 0], [20, 10]]
+    east = east[-1:] + east  # Start elsewhere than the shared border, and close the ring
+    return [
+        feature("West", {"type": "Polygon", "coordinates": [west]}),
+        feature("East", {"type": "Polygon", "coordinates": [east]})
+    ]
+
+
+class TestBuildTopology:
+    """Test arc extraction, deduplication and encoding"""
+    
+    def test_shared_border_stored_once(self):
+        """Test that a border between two polygons becomes one arc, used reversed by one side"""
+        topology, stats = build_topology(neighbours())
+        
+        # West's outer edge, East's outer edge and the border between them
+        assert stats["arcs"] == 3
+        assert stats["shared_arcs"] == 1
+        west, east = (geometry["arcs"][0] for geometry in topology["objects"][TOPOJSON_OBJECT]["geometries"])
+        shared = set(west) & {~arc for arc in east}
+        assert len(shared) == 1
+        assert stats["arc_points"] < stats["ring_points"]
+    
+    def test_round_trip_on_grid(self):
+        """Test that decoding gives back polygons whose coordinates lie on the grid"""
+        # Integer coordinates over [0, 20] x [0, 10] with 21 grid steps per axis land exactly on the grid
+        square = [[0, 0], [10, 0], [10, 10], [0, 10], [0, 0]]
+        right = [[10, 0], [20, 0], [20, 10], [10, 10], [10, 0]]
+        features = [feature("Left", {"type": "Polygon", "coordinates": [square]}),
+                    feature("Right", {"type": "MultiPolygon", "coordinates": [[right]]})]
+        topology, _ = build_topology(features, quantization=21)
+        
+        decoded = topology_features(topology)
+        assert [f["properties"] for f in decoded] == [{"name": "Left"}, {"name": "Right"}]
+        for original, result in zip(features, decoded):
+            assert result["geometry"]["type"] == original["geometry"]["type"]
+            assert shape(result["geometry"]).equals(shape(original["geometry"]))
+    
+    def test_arcs_are_delta_encoded(self):
+        """Test that arcs store one absolute point followed by deltas"""
+        topology, _ = build_topology(neighbours(), quantization=1001)
+        
+        # The first point is absolute on the grid; along the detailed border each step is small
+        assert all(0 <= value <= 1000 for arc in topology["arcs"] for value in arc[0])
+        border = max(topology["arcs"], key=len)
+        assert max(abs(delta) for step in border[1:] for delta in step) <= 35
+    
+    def test_enclave_shares_the_hole(self):
+        """Test that an enclave and the hole around it share one closed arc"""
+        outer = [[0, 0], [10, 0], [10, 10], [0, 10], [0, 0]]
+        hole = [[4, 4], [4, 6], [6, 6], [6, 4], [4, 4]]
+        features = [feature("Around", {"type": "Polygon", "coordinates": [outer, hole]}),
+                    feature("Enclave", {"type": "Polygon", "coordinates": [hole[::-1]]})]
+        _, stats = build_topology(features)
+        
+        assert stats["arcs"] == 2
+        assert stats["shared_arcs"] == 1
+    
+    def test_simplified_border_has_no_gaps_or_overlaps(self):
+        """Test that neighbours simplified through shared arcs still fit together"""
+        topology, stats = build_topology(neighbours(), tolerance=1.0)
+        west, east = (shape(f["geometry"]) for f in topology_features(topology))
+        
+        assert stats["arc_points"] == 10  # Border down to its two junctions
+        assert west.is_valid and east.is_valid
+        assert west.intersection(east).area < 1e-9
+        assert math.isclose(west.union(east).area, 200, rel_tol=1e-3)
+    
+    def test_z_dropped_and_non_polygons_kept_empty(self):
+        """Test that Z values are dropped and geometries without polygons have no type"""
+        ring = [[0, 0, 400], [1, 0, 410], [1, 1, 420], [0, 0, 400]]
+        features = [feature("Hill", {"type": "Polygon", "coordinates": [ring]}),
+                    feature("Nowhere", None),
+                    feature("Spot", {"type": "Point", "coordinates": [0.5, 0.5]})]
+        topology, _ = build_topology(features)
+        
+        assert all(len(point) == 2 for arc in topology["arcs"] for point in arc)
+        geometries = topology["objects"][TOPOJSON_OBJECT]["geometries"]
+        assert [geometry["type"] for geometry in geometries] == ["Polygon", None, None]
+        assert topology_features(topology)[1]["geometry"] is None
@@ -0,0 +1,38 @@
+"""
+Unit tests for vector_tile_layer module
+"""
+import json
+
+import folium
+
+from vector_tile_layer import VectorTileLayer, load_tile_metadata
+
+
+class TestVectorTileLayer:
+    """Test the vector tile map layer"""
+    
+    def test_metadata_missing_until_preprocessed(self, tmp_path):
+        """Test that the layer is unavailable without tiles and reads their metadata"""
+        assert load_tile_metadata(str(tmp_path)) is None
+        
+        (tmp_path / "metadata.json").write_text(json.dumps({"min_zoom": 6, "max_zoom": 12}))
+        assert load_tile_metadata(str(tmp_path))["max_zoom"] == 12
+    
+    def test_layer_renders(self):
+        """Test that the map page loads VectorGrid and embeds the tile URL, zooms and details"""
+        m = folium.Map()
+        metadata = {"layer": "municipalities", "min_zoom": 6, "max_zoom": 12, "bounds": [[45.8, 5.9], [47.8, 10.5]]}
+        details = {"Bern": {"style": {"weight": 2}, "tooltip": "<b>Bern</b>", "popup": "Gigs"}}
+        VectorTileLayer(metadata, details, "<b>{name}</b>", url="http://tiles.test/{z}/{x}/{y}.pbf").add_to(m)
+        html = m.get_root().render()
+        
+        assert "Leaflet.VectorGrid.bundled.js" in html
+        assert "http://tiles.test/{z}/{x}/{y}.pbf" in html
+        assert '"max_zoom": 12' in html and '"Bern"' in html
+        assert "L.vectorGrid.protobuf" in html
+    
+    def test_default_url_is_same_origin(self):
+        """Test that tiles come from the app's static files unless TILE_URL says otherwise"""
+        layer = VectorTileLayer({"min_zoom": 6, "max_zoom": 12}, {}, "{name}")
+        
+        assert layer.url == "app/static/tiles/{z}/{x}/{y}.pbf"
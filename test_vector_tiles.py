@@ -0,0 +1,109 @@
+"""
+Unit tests for vector_tiles module
+"""
+import json
+
+import numpy as np
+
+from vector_tiles import cut_tiles, decode_tile, encode_geometry, encode_tile, write_tiles
+
+
+def square(x0, y0, x1, y1, name="A", bfs=1, gig_count=0):
+    return {
+        "geometry": {"type": "Polygon", "coordinates": [[[x0, y0], [x1, y0], [x1, y1], [x0, y1], [x0, y0]]]},
+        "properties": {"name": name, "bfs": bfs, "canton": "BE", "gig_count": gig_count}
+    }
+
+
+def signed_area(ring):
+    """Shoelace area in tile coordinates (y down): positive for exterior rings"""
+    ring = np.array(ring + ring[:1], dtype=float)
+    return float(np.sum(ring[:-1, 0] * ring[1:, 1] - ring[1:, 0] * ring[:-1, 1]) / 2)
+
+
+class TestEncoding:
+    """Test encoding tiles and decoding them back"""
+    
+    def test_geometry_commands(self):
+        """Test MoveTo, LineTo and ClosePath with zigzag deltas"""
+        commands = encode_geometry([np.array([[2, 2], [4, 2], [4, 4]])])
+        
+        # MoveTo(1) +2,+2; LineTo(2) +2,0 0,+2; ClosePath(1)
+        assert commands == [9, 4, 4, 18, 4, 0, 0, 4, 15]
+    
+    def test_round_trip(self):
+        """Test that layer, extent, ids, properties and rings survive encoding"""
+        features = [
+            {"id": 351, "rings": [np.array([[0, 0], [10, 0], [10, 10], [0, 10]])],
+             "properties": {"name": "Bern", "gig_count": 3, "share": 0.5, "capital": True, "canton": None}},
+            {"id": None, "rings": [np.array([[20, 20], [30, 20], [30, 30]])],
+             "properties": {"name": "Köniz", "gig_count": -1}}
+        ]
+        layer = decode_tile(encode_tile(features, "municipalities", 4096))["municipalities"]
+        
+        assert layer["extent"] == 4096
+        first, second = layer["features"]
+        assert first["id"] == 351 and second["id"] is None
+        assert first["properties"] == {"name": "Bern", "gig_count": 3, "share": 0.5, "capital": True}
+        assert second["properties"] == {"name": "Köniz", "gig_count": -1}
+        assert first["rings"] == [[[0, 0], [10, 0], [10, 10], [0, 10]]]
+
+
+class TestCutting:
+    """Test cutting features into tiles"""
+    
+    def test_feature_lands_in_its_tiles(self):
+        """Test that a feature across the zoom 1 tile border is cut into both tiles"""
+        tiles = cut_tiles([square(-20, 10, 20, 20)], zoom=1, extent=4096, buffer=0)
+        
+        assert sorted(tiles) == [(0, 0), (1, 0)]
+        for (x, y), features in tiles.items():
+            assert features[0]["id"] == 1
+            for ring in features[0]["rings"]:
+                assert np.all((ring >= 0) & (ring <= 4096))
+    
+    def test_clipped_to_buffer(self):
+        """Test that geometry beyond the tile is clipped at the buffer"""
+        tiles = cut_tiles([square(-20, 10, 20, 20)], zoom=1, extent=4096, buffer=64)
+        
+        ring = tiles[(0, 0)][0]["rings"][0]
+        assert ring[:, 0].max() == 4096 + 64
+    
+    def test_exterior_rings_wind_clockwise(self):
+        """Test that exterior rings have positive area in tile coordinates, holes negative"""
+        feature = square(5, 45, 10, 50)
+        feature["geometry"]["coordinates"].append([[7, 47], [8, 47], [8, 48], [7, 48], [7, 47]])
+        tiles = cut_tiles([feature], zoom=2)
+        
+        (features,) = tiles.values()
+        rings = decode_tile(encode_tile(features))["municipalities"]["features"][0]["rings"]
+        assert [signed_area(ring) > 0 for ring in rings] == [True, False]
+    
+    def test_more_tiles_per_zoom(self):
+        """Test that a feature covers more tiles at deeper zooms and none outside it"""
+        counts = [len(cut_tiles([square(6, 46, 8, 47)], zoom=zoom)) for zoom in (6, 8, 10)]
+        
+        assert counts[0] < counts[1] < counts[2]
+        assert cut_tiles([{"geometry": None, "properties": {}}], zoom=6) == {}
+
+
+class TestWriteTiles:
+    """Test writing a tile set"""
+    
+    def test_tiles_and_metadata(self, tmp_path):
+        """Test the {z}/{x}/{y}.pbf layout and metadata, and that a rerun replaces old tiles"""
+        directory = tmp_path / "tiles"
+        (directory / "9").mkdir(parents=True)
+        features = [square(7.0, 46.5, 7.5, 47.0, "Bern", 351, 3), square(7.5, 46.5, 8.0, 47.0, "Thun", 942)]
+        stats = write_tiles(features, str(directory), 6, 7)
+        
+        metadata = json.loads((directory / "metadata.json").read_text())
+        assert metadata["min_zoom"] == 6 and metadata["max_zoom"] == 7
+        assert metadata["bounds"] == [[46.5, 7.0], [47.0, 8.0]]
+        assert not (directory / "9").exists()
+        
+        tile_paths = sorted(directory.glob("*/*/*.pbf"))
+        assert len(tile_paths) == sum(zoom["tiles"] for zoom in stats["zooms"].values())
+        layer = decode_tile((directory / "6" / "33" / "22.pbf").read_bytes())["municipalities"]
+        assert {feature["properties"]["name"]: feature["properties"]["gig_count"]
+                for feature in layer["features"]} == {"Bern": 3, "Thun": 0}
@@ -0,0 +1,58 @@
+"""
+Unit tests for venue_locator module
+"""
+from unittest.mock import Mock
+
+from venue_locator import MunicipalityLocator, locate_gig_venues, venue_key
+
+
+def square(x: float, y: float) -> dict:
+    return {"type": "Polygon", "coordinates": [[[x, y], [x + 1, y], [x + 1, y + 1], [x, y + 1], [x, y]]]}
+
+
+GEO_DATA = {"features": [
+    {"properties": {"gemeinde.NAME": "Westdorf"}, "geometry": square(0, 0)},
+    {"properties": {"gemeinde.NAME": "Ostdorf"}, "geometry": square(1, 0)}
+]}
+
+
+class TestMunicipalityLocator:
+    """Test STRtree point-in-polygon lookup"""
+    
+    def test_locate_many(self):
+        locator = MunicipalityLocator(GEO_DATA)
+        assert locator.locate_many([(0.5, 0.5), (1.5, 0.2), (5, 5)]) == ["Westdorf", "Ostdorf", None]
+        assert locator.locate_many([]) == []
+    
+    def test_point_on_shared_border_goes_to_first_polygon(self):
+        """Test that points on a border or corner are located, in the first municipality listed"""
+        locator = MunicipalityLocator(GEO_DATA)
+        assert locator.locate_many([(1, 0.5), (0, 0), (2, 1)]) == ["Westdorf", "Westdorf", "Ostdorf"]
+
+
+class TestLocateGigVenues:
+    """Test venue-based reassignment of gigs"""
+    
+    gigs = [
+        {"venue": "Kulturhaus", "location": "Westdorf Ost"},
+        {"venue": "Kulturhaus", "location": "Westdorf Ost"},
+        {"venue": "Scheune", "location": "Irgendwo"},
+        {"venue": "Unbekannt", "location": "Ostdorf"}
+    ]
+    
+    def test_venue_table_overrides_name_matches(self):
+        table = {venue_key("Kulturhaus"): (1.5, 0.5), venue_key("Scheune", "Irgendwo"): (0.5, 0.5)}
+        matches, stats = locate_gig_venues(self.gigs, ["Westdorf", "Westdorf", None, "Ostdorf"],
+                                           locator=MunicipalityLocator(GEO_DATA), venue_coordinates=table)
+        
+        assert matches == ["Ostdorf", "Ostdorf", "Westdorf", "Ostdorf"]
+        assert stats["venues"] == 3
+        assert stats["with_coordinates"] == 2
+        assert stats["gigs_assigned"] == 3
+        assert stats["gigs_changed"] == 3
+    
+    def test_locator_is_not_built_without_coordinates(self):
+        locator = Mock()
+        matches, _ = locate_gig_venues(self.gigs, ["A", "A", None, "B"], locator=locator, venue_coordinates={})
+        assert matches == ["A", "A", None, "B"]
+        locator.locate_many.assert_not_called()
@@ -0,0 +1,92 @@
+"""
+File-backed OAuth token store shared by every process that talks to the MX3 API
+"""
+import hashlib
+import json
+import logging
+import os
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to unlocked access
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class TokenStore:
+    """
+    Persists access tokens with their expiry, keyed by consumer key.
+    An exclusive file lock is held while a token is read and (if needed) refreshed,
+    so concurrent processes wait for one refresh instead of each fetching a token.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.lock_path = f"{path}.lock"
+    
+    @staticmethod
+    def _key(consumer_key: str) -> str:
+        # Never write the consumer key itself to disk
+        return hashlib.sha256(consumer_key.encode()).hexdigest()[:16]
+    
+    @contextmanager
+    def locked(self):
+        """Hold the store's exclusive lock"""
+        directory = os.path.dirname(self.lock_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        with open(self.lock_path, "a") as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+    
+    def _read_all(self) -> Dict:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable token store {self.path}: {e}")
+            return {}
+    
+    def load(self, consumer_key: str) -> Optional[Tuple[str, datetime, datetime]]:
+        """
+        Return (token, expires_at, refresh_at) for consumer_key, or None; call while holding the lock.
+        Tokens stored without a refresh time are refreshed once they expire.
+        """
+        entry = self._read_all().get(self._key(consumer_key))
+        if not entry:
+            return None
+        try:
+            expires_at = datetime.fromisoformat(entry["expires_at"])
+            refresh_at = datetime.fromisoformat(entry["refresh_at"]) if entry.get("refresh_at") else expires_at
+            return entry["access_token"], expires_at, refresh_at
+        except (KeyError, ValueError):
+            return None
+    
+    def save(self, consumer_key: str, access_token: str, expires_at: datetime,
+             refresh_at: Optional[datetime] = None) -> None:
+        """Persist a token, with when it should be refreshed proactively; call while holding the lock"""
+        tokens = self._read_all()
+        tokens[self._key(consumer_key)] = {
+            "access_token": access_token,
+            "expires_at": expires_at.isoformat(),
+            "refresh_at": (refresh_at or expires_at).isoformat()
+        }
+        
+        tmp_path = f"{self.path}.tmp"
+        # Tokens are credentials: keep the file private to the current user
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(tokens, f)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,233 @@
+"""
+TopoJSON export: municipality borders as shared arcs, each stored, simplified and encoded once
+"""
+import json
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import shapely
+
+from config import TOPOJSON_QUANTIZATION
+
+logger = logging.getLogger(__name__)
+
+TOPOJSON_OBJECT = "municipalities"
+_KEY_BITS = 32  # Quantized x and y packed into one int64 point key
+
+
+def _polygons(geometry: Optional[Dict]) -> List[List]:
+    """Polygon coordinate lists of a (Multi)Polygon geometry; nothing for other types"""
+    if not geometry:
+        return []
+    if geometry.get("type") == "Polygon":
+        return [geometry["coordinates"]]
+    if geometry.get("type") == "MultiPolygon":
+        return list(geometry["coordinates"])
+    return []
+
+
+def _junctions(rings: List[np.ndarray]) -> np.ndarray:
+    """
+    Point keys where borders meet or part: points that occur with more than one distinct
+    pair of neighbours across all rings
+    """
+    keys, low, high = [], [], []
+    for ring in rings:
+        previous, following = np.roll(ring, 1), np.roll(ring, -1)
+        keys.append(ring)
+        low.append(np.minimum(previous, following))
+        high.append(np.maximum(previous, following))
+    if not keys:
+        return np.empty(0, dtype=np.int64)
+    
+    neighbours = np.unique(np.stack([np.concatenate(keys), np.concatenate(low), np.concatenate(high)]), axis=1)
+    point_keys, counts = np.unique(neighbours[0], return_counts=True)
+    return point_keys[counts > 1]
+
+
+def _cut(ring: np.ndarray, junctions: np.ndarray) -> List[np.ndarray]:
+    """Split an open ring into closed-off arcs between its junctions (one closed arc if it has none)"""
+    positions = np.flatnonzero(np.isin(ring, junctions))
+    if not len(positions):
+        # Start at the smallest point, so the same ring in two polygons (an enclave and its hole) matches
+        start = int(np.argmin(ring))
+        rotated = np.roll(ring, -start)
+        return [np.append(rotated, rotated[0])]
+    
+    rotated = np.roll(ring, -positions[0])
+    cuts = list(positions - positions[0]) + [len(ring)]
+    closed = np.append(rotated, rotated[0])
+    return [closed[start:end + 1] for start, end in zip(cuts[:-1], cuts[1:])]
+
+
+class _ArcTable:
+    """Distinct arcs; a ring refers to an arc by index, or by ~index when it runs the other way"""
+    
+    def __init__(self):
+        self.arcs: List[np.ndarray] = []
+        self.index: Dict[bytes, int] = {}
+        self.references: List[int] = []
+    
+    def add(self, arc: np.ndarray) -> int:
+        key = arc.tobytes()
+        if key in self.index:
+            self.references[self.index[key]] += 1
+            return self.index[key]
+        reversed_key = arc[::-1].tobytes()
+        if reversed_key in self.index:
+            self.references[self.index[reversed_key]] += 1
+            return ~self.index[reversed_key]
+        
+        self.index[key] = len(self.arcs)
+        self.arcs.append(arc)
+        self.references.append(1)
+        return len(self.arcs) - 1
+
+
+def _simplify_arcs(arcs: List[np.ndarray], scale: np.ndarray, translate: np.ndarray,
+                   tolerance: float) -> List[np.ndarray]:
+    """
+    Douglas-Peucker on every arc in one batch, in map units. Arc ends (junctions) always stay,
+    so neighbouring polygons keep sharing exactly the same simplified border.
+    """
+    lengths = np.array([len(arc) for arc in arcs])
+    points = np.concatenate(arcs)
+    coords = np.column_stack([points >> _KEY_BITS, points & ((1 << _KEY_BITS) - 1)]) * scale + translate
+    lines = shapely.linestrings(coords, indices=np.repeat(np.arange(len(arcs)), lengths))
+    
+    simplified = shapely.simplify(lines, tolerance, preserve_topology=False)
+    kept, arc_ids = shapely.get_coordinates(simplified, return_index=True)
+    quantized = np.rint((kept - translate) / scale).astype(np.int64)
+    kept_keys = (quantized[:, 0] << _KEY_BITS) | quantized[:, 1]
+    bounds = np.searchsorted(arc_ids, np.arange(len(arcs) + 1))
+    return [kept_keys[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+
+
+def build_topology(features: List[Dict], quantization: int = TOPOJSON_QUANTIZATION,
+                   tolerance: Optional[float] = None, object_name: str = TOPOJSON_OBJECT) -> Tuple[Dict, Dict]:
+    """
+    Quantized TopoJSON topology of the (Multi)Polygon features, plus stats.
+    Coordinates are snapped to a quantization x quantization grid over the features' extent;
+    borders shared by neighbouring polygons become one arc, which is simplified once (with a
+    tolerance, in coordinate units) and delta-encoded. Z values are dropped.
+    Rings that simplification would leave without area keep their arcs unsimplified.
+    Each geometry carries its feature's properties.
+    """
+    feature_polygons = [_polygons(feature.get("geometry")) for feature in features]
+    all_coords = [
+        np.asarray(ring, dtype=float)[:, :2]
+        for polygons in feature_polygons for polygon in polygons for ring in polygon if len(ring)
+    ]
+    if all_coords:
+        stacked = np.concatenate(all_coords)
+        translate = stacked.min(axis=0)
+        extent = stacked.max(axis=0) - translate
+        scale = np.where(extent > 0, extent / (quantization - 1), 1.0)
+    else:
+        translate, scale = np.zeros(2), np.ones(2)
+    
+    def quantize(ring: List) -> np.ndarray:
+        """Open ring of point keys, without the consecutive duplicates snapping produces"""
+        grid = np.rint((np.asarray(ring, dtype=float)[:, :2] - translate) / scale).astype(np.int64)
+        keys = (grid[:, 0] << _KEY_BITS) | grid[:, 1]
+        keys = keys[np.r_[True, keys[1:] != keys[:-1]]]
+        if len(keys) > 1 and keys[0] == keys[-1]:
+            keys = keys[:-1]
+        return keys
+    
+    # Per feature, per polygon: open rings with at least three distinct points
+    quantized = [
+        [[ring for ring in map(quantize, polygon) if len(ring) >= 3] for polygon in polygons]
+        for polygons in feature_polygons
+    ]
+    rings = [ring for polygons in quantized for polygon in polygons for ring in polygon]
+    junctions = _junctions(rings)
+    
+    table = _ArcTable()
+    ring_arcs = [[[[table.add(arc) for arc in _cut(ring, junctions)] for ring in polygon] for polygon in polygons]
+                 for polygons in quantized]
+    
+    arcs = table.arcs
+    if tolerance and arcs:
+        simplified = _simplify_arcs(arcs, scale, translate, tolerance)
+        # A ring needs three distinct points; the arcs of rings that would collapse stay as they are
+        for polygons in ring_arcs:
+            for polygon in polygons:
+                for ring in polygon:
+                    points = sum(len(simplified[arc if arc >= 0 else ~arc]) - 1 for arc in ring)
+                    if points < 3:
+                        for arc in ring:
+                            simplified[arc if arc >= 0 else ~arc] = arcs[arc if arc >= 0 else ~arc]
+        arcs = simplified
+    
+    encoded_arcs = []
+    for arc in arcs:
+        grid = np.column_stack([arc >> _KEY_BITS, arc & ((1 << _KEY_BITS) - 1)])
+        encoded_arcs.append(np.vstack([grid[:1], np.diff(grid, axis=0)]).tolist())
+    
+    geometries = []
+    for feature, polygons in zip(features, ring_arcs):
+        polygons = [polygon for polygon in polygons if polygon]
+        geometry = {"properties": feature.get("properties", {})}
+        if not polygons:
+            geometry["type"] = None
+        elif feature["geometry"]["type"] == "Polygon":
+            geometry.update(type="Polygon", arcs=polygons[0])
+        else:
+            geometry.update(type="MultiPolygon", arcs=polygons)
+        geometries.append(geometry)
+    
+    topology = {
+        "type": "Topology",
+        "transform": {"scale": scale.tolist(), "translate": translate.tolist()},
+        "objects": {object_name: {"type": "GeometryCollection", "geometries": geometries}},
+        "arcs": encoded_arcs
+    }
+    stats = {
+        "arcs": len(arcs),
+        "shared_arcs": sum(1 for references in table.references if references > 1),
+        "ring_points": sum(len(ring) + 1 for ring in rings),  # as GeoJSON stores them, closing point included
+        "arc_points": sum(len(arc) for arc in arcs),
+        "bytes": len(json.dumps(topology, separators=(",", ":")))
+    }
+    return topology, stats
+
+
+def topology_features(topology: Dict, object_name: str = TOPOJSON_OBJECT) -> List[Dict]:
+    """
+    Decode a topology from build_topology back into GeoJSON features (what topojson.feature
+    does in the browser)
+    """
+    scale = topology["transform"]["scale"]
+    translate = topology["transform"]["translate"]
+    arcs = []
+    for arc in topology["arcs"]:
+        grid = np.cumsum(np.asarray(arc, dtype=float).reshape(-1, 2), axis=0)
+        arcs.append((grid * scale + translate).tolist())
+    
+    def ring(arc_indices: List[int]) -> List:
+        coords = []
+        for arc in arc_indices:
+            points = arcs[arc] if arc >= 0 else arcs[~arc][::-1]
+            coords.extend(points[1:] if coords else points)
+        return coords
+    
+    features = []
+    for geometry in topology["objects"][object_name]["geometries"]:
+        if geometry.get("type") == "Polygon":
+            decoded = {"type": "Polygon", "coordinates": [ring(arc_indices) for arc_indices in geometry["arcs"]]}
+        elif geometry.get("type") == "MultiPolygon":
+            decoded = {"type": "MultiPolygon", "coordinates": [
+                [ring(arc_indices) for arc_indices in polygon] for polygon in geometry["arcs"]
+            ]}
+        else:
+            decoded = None
+        features.append({"type": "Feature", "properties": geometry.get("properties", {}), "geometry": decoded})
+    return features
+
+
+def save_topology(topology: Dict, path: str) -> None:
+    """Write compact JSON (the browser receives it as is)"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(topology, f, separators=(",", ":"), ensure_ascii=False)
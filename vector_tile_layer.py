@@ -0,0 +1,108 @@
+"""
+Vector tile map layer: the municipalities as MVT tiles (see vector_tiles), fetched from the
+static dir only for the part of the map in view
+"""
+import json
+import logging
+import os
+from typing import Dict, Optional
+
+from branca.element import MacroElement
+from folium.elements import JSCSSMixin
+from folium.template import Template
+
+from config import TILE_LAYER, TILE_URL, TILES_DIR
+
+logger = logging.getLogger(__name__)
+
+# Municipalities without gigs: outlined only, so the map stays readable
+EMPTY_STYLE = {"fill": True, "fillColor": "#cccccc", "fillOpacity": 0.1, "color": "#999999", "weight": 0.5}
+
+
+def load_tile_metadata(directory: str = TILES_DIR) -> Optional[Dict]:
+    """The metadata.json written with the tiles (zooms, bounds, layer), None until preprocessed"""
+    path = os.path.join(directory, "metadata.json")
+    if not os.path.exists(path):
+        return None
+    
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+class VectorTileLayer(JSCSSMixin, MacroElement):
+    """
+    Draws the municipality tiles from url ({z}/{x}/{y}.pbf) with Leaflet.VectorGrid. Beyond the
+    deepest zoom in the metadata the tiles are scaled up, and outside its bounds none are requested.
+    Municipalities listed in details (name -> {"style", "tooltip", "popup"}) get their style,
+    tooltip and popup; all others are drawn with empty_style and the empty_tooltip template,
+    whose "{name}" is replaced by the municipality's name.
+    """
+    
+    _template = Template(
+        """
+        {% macro script(this, kwargs) %}
+        (function() {
+            var map = {{ this._parent.get_name() }};
+            var metadata = {{ this.metadata|tojson }};
+            var details = {{ this.details|tojson }};
+            var emptyStyle = {{ this.empty_style|tojson }};
+            var emptyTooltip = {{ this.empty_tooltip|tojson }};
+            var tooltip = L.tooltip({sticky: true});
+            
+            function detailFor(properties) {
+                return Object.prototype.hasOwnProperty.call(details, properties.name) ? details[properties.name] : null;
+            }
+            
+            var styles = {};
+            styles[metadata.layer] = function(properties) {
+                var detail = detailFor(properties);
+                return detail ? Object.assign({fill: true}, detail.style) : emptyStyle;
+            };
+            
+            var options = {
+                rendererFactory: L.canvas.tile,
+                vectorTileLayerStyles: styles,
+                interactive: true,
+                minNativeZoom: metadata.min_zoom,
+                maxNativeZoom: metadata.max_zoom
+            };
+            if (metadata.bounds) options.bounds = L.latLngBounds(metadata.bounds);
+            var layer = L.vectorGrid.protobuf({{ this.url|tojson }}, options);
+            
+            layer.on("mouseover mousemove", function(e) {
+                var detail = detailFor(e.layer.properties);
+                var content = detail ? detail.tooltip : emptyTooltip.replace("{name}", e.layer.properties.name);
+                tooltip.setLatLng(e.latlng).setContent(content);
+                if (!map.hasLayer(tooltip)) map.openTooltip(tooltip);
+            });
+            layer.on("mouseout", function() { map.closeTooltip(tooltip); });
+            layer.on("click", function(e) {
+                var detail = detailFor(e.layer.properties);
+                if (detail && detail.popup) {
+                    L.popup({maxWidth: 250}).setLatLng(e.latlng).setContent(detail.popup).openOn(map);
+                }
+            });
+            layer.addTo(map);
+        })();
+        {% endmacro %}
+        """
+    )
+    
+    default_js = [
+        ("vectorgrid", "https://unpkg.com/leaflet.vectorgrid@1.3.0/dist/Leaflet.VectorGrid.bundled.js"),
+    ]
+    
+    def __init__(self, metadata: Dict, details: Dict[str, Dict], empty_tooltip: str,
+                 url: str = TILE_URL, empty_style: Dict = EMPTY_STYLE):
+        super().__init__()
+        self._name = "VectorTileLayer"
+        self.metadata = {
+            "layer": metadata.get("layer", TILE_LAYER),
+            "min_zoom": metadata["min_zoom"],
+            "max_zoom": metadata["max_zoom"],
+            "bounds": metadata.get("bounds")
+        }
+        self.details = details
+        self.empty_tooltip = empty_tooltip
+        self.url = url
+        self.empty_style = empty_style
@@ -0,0 +1,369 @@
+"""
+Mapbox Vector Tiles (MVT 2.1) for municipality polygons: cut per zoom level, encoded without
+a protobuf dependency
+"""
+import json
+import logging
+import os
+import shutil
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import shapely
+
+from config import TILE_BUFFER, TILE_EXTENT, TILE_LAYER
+from geometry_simplifier import parse_geometry
+
+logger = logging.getLogger(__name__)
+
+MOVE_TO, LINE_TO, CLOSE_PATH = 1, 2, 7
+POLYGON = 3  # Feature.GeomType
+_VARINT, _FIXED64, _LENGTH_DELIMITED, _FIXED32 = 0, 1, 2, 5
+
+
+def to_world(geometries: np.ndarray) -> np.ndarray:
+    """2D lon/lat geometries to Web Mercator world coordinates in [0, 1], y pointing down"""
+    def project(coords: np.ndarray) -> np.ndarray:
+        lat = np.radians(np.clip(coords[:, 1], -85.0511, 85.0511))
+        x = (coords[:, 0] + 180.0) / 360.0
+        y = 0.5 - np.log(np.tan(np.pi / 4 + lat / 2)) / (2 * np.pi)
+        return np.column_stack([x, y])
+    
+    return shapely.transform(shapely.force_2d(geometries), project)
+
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _key(field: int, wire_type: int) -> bytes:
+    return _varint((field << 3) | wire_type)
+
+
+def _bytes_field(field: int, payload: bytes) -> bytes:
+    return _key(field, _LENGTH_DELIMITED) + _varint(len(payload)) + payload
+
+
+def _packed_field(field: int, values: List[int]) -> bytes:
+    return _bytes_field(field, b"".join(_varint(value) for value in values))
+
+
+def _zigzag(values: np.ndarray) -> np.ndarray:
+    return (values << 1) ^ (values >> 63)
+
+
+def _value(value) -> bytes:
+    """Layer value message: string, bool, integer or double"""
+    if isinstance(value, str):
+        return _bytes_field(1, value.encode("utf-8"))
+    if isinstance(value, bool):
+        return _key(7, _VARINT) + _varint(int(value))
+    if isinstance(value, int):
+        if value >= 0:
+            return _key(5, _VARINT) + _varint(value)
+        return _key(6, _VARINT) + _varint(int(_zigzag(np.int64(value))))
+    return _key(3, _FIXED64) + np.float64(value).tobytes()
+
+
+def _ring(coords: np.ndarray, exterior: bool) -> Optional[np.ndarray]:
+    """
+    Open ring of integer tile coordinates, or None when nothing with an area is left.
+    Exterior rings get a positive surveyor's-formula area (clockwise with y down), holes a negative one.
+    """
+    ring = np.rint(coords).astype(np.int64)
+    ring = ring[np.r_[True, np.any(ring[1:] != ring[:-1], axis=1)]]
+    if len(ring) > 1 and np.array_equal(ring[0], ring[-1]):
+        ring = ring[:-1]
+    if len(ring) < 3:
+        return None
+    
+    x, y = ring[:, 0], ring[:, 1]
+    area = int(np.dot(x, np.roll(y, -1)) - np.dot(np.roll(x, -1), y))
+    if area == 0:
+        return None
+    return ring if (area > 0) == exterior else ring[::-1]
+
+
+def polygon_rings(geometry: shapely.Geometry, origin: np.ndarray, scale: float) -> List[np.ndarray]:
+    """
+    Rings of a (Multi)Polygon in tile coordinates, in MVT order: each exterior ring followed
+    by its holes. Polygons whose exterior collapses are dropped with their holes.
+    """
+    rings = []
+    for polygon in shapely.get_parts(geometry):
+        if not isinstance(polygon, shapely.Polygon) or polygon.is_empty:
+            continue
+        exterior = _ring((shapely.get_coordinates(polygon.exterior) - origin) * scale, exterior=True)
+        if exterior is None:
+            continue
+        rings.append(exterior)
+        for interior in polygon.interiors:
+            hole = _ring((shapely.get_coordinates(interior) - origin) * scale, exterior=False)
+            if hole is not None:
+                rings.append(hole)
+    return rings
+
+
+def encode_geometry(rings: List[np.ndarray]) -> List[int]:
+    """MoveTo / LineTo / ClosePath commands with zigzag-encoded deltas from the cursor"""
+    commands = []
+    cursor = np.zeros(2, dtype=np.int64)
+    for ring in rings:
+        deltas = _zigzag(np.diff(np.vstack([cursor, ring]), axis=0))
+        cursor = ring[-1]
+        commands.append((1 << 3) | MOVE_TO)
+        commands.extend(deltas[0].tolist())
+        commands.append(((len(ring) - 1) << 3) | LINE_TO)
+        commands.extend(deltas[1:].ravel().tolist())
+        commands.append((1 << 3) | CLOSE_PATH)
+    return commands
+
+
+def encode_tile(features: List[Dict], layer_name: str = TILE_LAYER, extent: int = TILE_EXTENT) -> bytes:
+    """
+    One-layer tile of polygon features, each {"id": int or None, "rings": polygon_rings(...),
+    "properties": {...}}. Keys and values are shared across the layer's features.
+    """
+    keys: Dict[str, int] = {}
+    values: Dict[Tuple[type, object], int] = {}
+    encoded_features = []
+    for feature in features:
+        tags = []
+        for key, value in feature["properties"].items():
+            if value is None:
+                continue
+            tags.append(keys.setdefault(key, len(keys)))
+            tags.append(values.setdefault((type(value), value), len(values)))
+        
+        message = b""
+        if feature.get("id") is not None:
+            message += _key(1, _VARINT) + _varint(int(feature["id"]))
+        message += _packed_field(2, tags)
+        message += _key(3, _VARINT) + _varint(POLYGON)
+        message += _packed_field(4, encode_geometry(feature["rings"]))
+        encoded_features.append(message)
+    
+    layer = _key(15, _VARINT) + _varint(2) + _bytes_field(1, layer_name.encode("utf-8"))
+    layer += b"".join(_bytes_field(2, message) for message in encoded_features)
+    layer += b"".join(_bytes_field(3, key.encode("utf-8")) for key in keys)
+    layer += b"".join(_bytes_field(4, _value(value)) for _, value in values)
+    layer += _key(5, _VARINT) + _varint(extent)
+    return _bytes_field(3, layer)
+
+
+def _read_varint(data: bytes, position: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            return value, position
+
+
+def _fields(data: bytes) -> Iterator[Tuple[int, object]]:
+    """(field number, int or bytes) for each field of a protobuf message"""
+    position = 0
+    while position < len(data):
+        key, position = _read_varint(data, position)
+        field, wire_type = key >> 3, key & 0x7
+        if wire_type == _VARINT:
+            value, position = _read_varint(data, position)
+        elif wire_type == _LENGTH_DELIMITED:
+            length, position = _read_varint(data, position)
+            value, position = data[position:position + length], position + length
+        elif wire_type == _FIXED64:
+            value, position = data[position:position + 8], position + 8
+        elif wire_type == _FIXED32:
+            value, position = data[position:position + 4], position + 4
+        else:
+            raise ValueError(f"Unsupported protobuf wire type {wire_type}")
+        yield field, value
+
+
+def _packed(data: bytes) -> List[int]:
+    values, position = [], 0
+    while position < len(data):
+        value, position = _read_varint(data, position)
+        values.append(value)
+    return values
+
+
+def _decode_value(data: bytes):
+    for field, value in _fields(data):
+        if field == 1:
+            return value.decode("utf-8")
+        if field == 2:
+            return float(np.frombuffer(value, dtype=np.float32)[0])
+        if field == 3:
+            return float(np.frombuffer(value, dtype=np.float64)[0])
+        if field in (4, 5):
+            return value
+        if field == 6:
+            return (value >> 1) ^ -(value & 1)
+        if field == 7:
+            return bool(value)
+    return None
+
+
+def _decode_rings(commands: List[int]) -> List[List[List[int]]]:
+    rings, ring = [], []
+    x = y = 0
+    position = 0
+    while position < len(commands):
+        command, count = commands[position] & 0x7, commands[position] >> 3
+        position += 1
+        if command == CLOSE_PATH:
+            rings.append(ring)
+            continue
+        for _ in range(count):
+            dx, dy = commands[position], commands[position + 1]
+            position += 2
+            x += (dx >> 1) ^ -(dx & 1)
+            y += (dy >> 1) ^ -(dy & 1)
+            if command == MOVE_TO:
+                ring = []
+            ring.append([x, y])
+    return rings
+
+
+def decode_tile(data: bytes) -> Dict[str, Dict]:
+    """Layers of an MVT tile as {name: {"extent", "features": [{"id", "properties", "rings"}]}}"""
+    layers = {}
+    for field, layer_data in _fields(data):
+        if field != 3:
+            continue
+        name, extent, raw_features, keys, values = None, 4096, [], [], []
+        for layer_field, value in _fields(layer_data):
+            if layer_field == 1:
+                name = value.decode("utf-8")
+            elif layer_field == 2:
+                raw_features.append(value)
+            elif layer_field == 3:
+                keys.append(value.decode("utf-8"))
+            elif layer_field == 4:
+                values.append(_decode_value(value))
+            elif layer_field == 5:
+                extent = value
+        
+        features = []
+        for raw_feature in raw_features:
+            feature = {"id": None, "properties": {}, "rings": []}
+            for feature_field, value in _fields(raw_feature):
+                if feature_field == 1:
+                    feature["id"] = value
+                elif feature_field == 2:
+                    tags = _packed(value)
+                    feature["properties"] = {keys[k]: values[v] for k, v in zip(tags[::2], tags[1::2])}
+                elif feature_field == 4:
+                    feature["rings"] = _decode_rings(_packed(value))
+            features.append(feature)
+        layers[name] = {"extent": extent, "features": features}
+    return layers
+
+
+def cut_tiles(features: List[Dict], zoom: int, extent: int = TILE_EXTENT,
+              buffer: int = TILE_BUFFER) -> Dict[Tuple[int, int], List[Dict]]:
+    """
+    Features per (x, y) tile at one zoom level, ready for encode_tile. Geometries are simplified
+    to about a pixel at that zoom, clipped to each tile plus buffer (in tile units) and
+    quantized to the tile extent. Feature ids are the "bfs" property, when set.
+    """
+    geometries = np.empty(len(features), dtype=object)
+    for i, feature in enumerate(features):
+        if feature.get("geometry"):
+            geometries[i] = parse_geometry(feature["geometry"])
+    present = np.flatnonzero(shapely.is_geometry(geometries))
+    if not len(present):
+        return {}
+    
+    tiles_per_axis = 2 ** zoom
+    scale = tiles_per_axis * extent  # World units to tile units
+    world = shapely.simplify(to_world(geometries[present]), 1 / (tiles_per_axis * 256), preserve_topology=True)
+    
+    # Every (feature, tile) pair whose tile the feature's bounds touch
+    bounds = shapely.bounds(world)
+    margin = buffer / extent
+    first = np.clip(np.floor(bounds[:, :2] * tiles_per_axis - margin), 0, tiles_per_axis - 1).astype(np.int64)
+    last = np.clip(np.floor(bounds[:, 2:] * tiles_per_axis + margin), 0, tiles_per_axis - 1).astype(np.int64)
+    spans = (last - first + 1)
+    counts = spans[:, 0] * spans[:, 1]
+    pair_feature = np.repeat(np.arange(len(world)), counts)
+    offset = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    tile_x = first[pair_feature, 0] + offset % spans[pair_feature, 0]
+    tile_y = first[pair_feature, 1] + offset // spans[pair_feature, 0]
+    
+    # Clipped one tile at a time: clip_by_rect is fast and, unlike intersection, tolerates invalid input
+    tile_ids = tile_y * tiles_per_axis + tile_x
+    order = np.argsort(tile_ids, kind="stable")
+    starts = np.r_[np.flatnonzero(np.r_[True, tile_ids[order][1:] != tile_ids[order][:-1]]), len(order)]
+    
+    tiles: Dict[Tuple[int, int], List[Dict]] = {}
+    for start, end in zip(starts[:-1], starts[1:]):
+        pairs = order[start:end]
+        x, y = int(tile_x[pairs[0]]), int(tile_y[pairs[0]])
+        clipped = shapely.clip_by_rect(
+            world[pair_feature[pairs]],
+            (x - margin) / tiles_per_axis, (y - margin) / tiles_per_axis,
+            (x + 1 + margin) / tiles_per_axis, (y + 1 + margin) / tiles_per_axis
+        )
+        
+        origin = np.array([x, y]) / tiles_per_axis
+        for pair, geometry in zip(pairs, clipped):
+            rings = polygon_rings(geometry, origin, scale) if not shapely.is_empty(geometry) else []
+            if not rings:
+                continue
+            
+            properties = features[present[pair_feature[pair]]].get("properties", {})
+            tiles.setdefault((x, y), []).append({
+                "id": properties.get("bfs"),
+                "rings": rings,
+                "properties": properties
+            })
+    return tiles
+
+
+def write_tiles(features: List[Dict], directory: str, min_zoom: int, max_zoom: int,
+                layer_name: str = TILE_LAYER, extent: int = TILE_EXTENT, buffer: int = TILE_BUFFER) -> Dict:
+    """
+    Write {directory}/{z}/{x}/{y}.pbf for every zoom level and tile with features, plus
+    {directory}/metadata.json (zooms, bounds, layer, tile counts and bytes). The tiles are
+    built next to the directory and swapped in at the end, so no stale tiles remain.
+    """
+    build_directory = f"{directory}.build"
+    shutil.rmtree(build_directory, ignore_errors=True)
+    
+    stats = {"layer": layer_name, "min_zoom": min_zoom, "max_zoom": max_zoom, "extent": extent,
+             "features": len(features), "zooms": {}}
+    for zoom in range(min_zoom, max_zoom + 1):
+        tiles = cut_tiles(features, zoom, extent, buffer)
+        tile_bytes = 0
+        for (x, y), tile_features in tiles.items():
+            path = os.path.join(build_directory, str(zoom), str(x), f"{y}.pbf")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            data = encode_tile(tile_features, layer_name, extent)
+            with open(path, "wb") as f:
+                f.write(data)
+            tile_bytes += len(data)
+        stats["zooms"][zoom] = {"tiles": len(tiles), "bytes": tile_bytes}
+        logger.info(f"Zoom {zoom}: {len(tiles)} tiles, {tile_bytes} bytes")
+    
+    geometries = [parse_geometry(feature["geometry"]) for feature in features if feature.get("geometry")]
+    if geometries:
+        west, south, east, north = shapely.total_bounds(np.array(geometries, dtype=object)).tolist()
+        stats["bounds"] = [[south, west], [north, east]]
+    
+    os.makedirs(build_directory, exist_ok=True)
+    with open(os.path.join(build_directory, "metadata.json"), "w") as f:
+        json.dump(stats, f, indent=2)
+    
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(build_directory, directory)
+    return stats
+
@@ -0,0 +1,131 @@
+"""
+Assign gigs to municipalities by venue coordinates, with a point-in-polygon test over an STRtree
+"""
+import json
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import shapely
+from shapely.geometry import shape
+
+from cache_backend import cached
+from config import VENUE_COORDINATES_PATH
+from geo_processor import load_swiss_municipalities
+from normalizer import normalize_municipality_name
+
+logger = logging.getLogger(__name__)
+
+Coordinates = Tuple[float, float]  # (lon, lat)
+
+
+def venue_key(venue: Optional[str], location: Optional[str] = None) -> str:
+    """Lookup key for a venue, optionally qualified by its location text"""
+    return f"{normalize_municipality_name(venue)}|{normalize_municipality_name(location)}"
+
+
+class MunicipalityLocator:
+    """Finds the municipality containing each point; the STRtree over all polygons is built once"""
+    
+    def __init__(self, geo_data: Dict):
+        self.names: List[str] = []
+        geometries = []
+        for feature in geo_data.get("features", []):
+            props = feature.get("properties", {})
+            name = props.get("gemeinde.NAME") or props.get("NAME") or props.get("name")
+            if not name or not feature.get("geometry"):
+                continue
+            try:
+                geometries.append(shape(feature["geometry"]))
+            except Exception as e:
+                logger.warning(f"Skipping invalid geometry for {name}: {e}")
+                continue
+            self.names.append(name)
+        
+        self.tree = shapely.STRtree(geometries)
+    
+    def locate_many(self, points: List[Coordinates]) -> List[Optional[str]]:
+        """Municipality name per (lon, lat) point, None outside every municipality; one vectorized query"""
+        if not points or not self.names:
+            return [None] * len(points)
+        
+        # covered_by, not within: a point on a border is within neither polygon, but covered by both
+        point_indices, polygon_indices = self.tree.query(shapely.points(np.asarray(points)), predicate="covered_by")
+        # Points on a shared border are covered by two polygons: keep the first listed
+        first: Dict[int, int] = {}
+        for point_index, polygon_index in zip(point_indices.tolist(), polygon_indices.tolist()):
+            if polygon_index < first.get(point_index, len(self.names)):
+                first[point_index] = polygon_index
+        return [self.names[first[i]] if i in first else None for i in range(len(points))]
+
+
+@cached()
+def get_municipality_locator() -> MunicipalityLocator:
+    return MunicipalityLocator(load_swiss_municipalities())
+
+
+def load_venue_coordinates(path: str = VENUE_COORDINATES_PATH) -> Dict[str, Coordinates]:
+    """
+    Venue coordinate table as venue key -> (lon, lat).
+    Entries without a location apply to the venue wherever it is listed.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        logger.error(f"Failed to load venue coordinates from {path}: {e}")
+        return {}
+    
+    return {
+        venue_key(entry["venue"], entry.get("location")): (float(entry["lon"]), float(entry["lat"]))
+        for entry in entries
+    }
+
+
+def locate_gig_venues(gigs: List[Dict], matches: List[Optional[str]],
+                      locator: Optional[MunicipalityLocator] = None,
+                      venue_coordinates: Optional[Dict[str, Coordinates]] = None) -> Tuple[List[Optional[str]], Dict]:
+    """
+    Reassign gigs whose venue has known coordinates (in the venue table) to the municipality
+    containing it; each distinct venue is looked up once. Gigs without coordinates, or whose
+    point lies outside every municipality, keep their name-based match.
+    The locator (by default the shared one over all municipalities) is only built if needed.
+    Returns the updated matches and per-run stats.
+    """
+    venue_coordinates = venue_coordinates if venue_coordinates is not None else load_venue_coordinates()
+    
+    def coordinates_for(venue: Optional[str], location: Optional[str]) -> Optional[Coordinates]:
+        return venue_coordinates.get(venue_key(venue, location)) or venue_coordinates.get(venue_key(venue))
+    
+    venues: Dict[Tuple[Optional[str], Optional[str]], Optional[Coordinates]] = {}
+    for gig in gigs:
+        venue = (gig.get("venue"), gig.get("location"))
+        if venue not in venues:
+            venues[venue] = coordinates_for(*venue)
+    
+    located_venues = [venue for venue, point in venues.items() if point]
+    municipality_by_venue = {}
+    if located_venues:
+        locator = locator or get_municipality_locator()
+        located = locator.locate_many([venues[venue] for venue in located_venues])
+        municipality_by_venue = dict(zip(located_venues, located))
+    
+    updated = list(matches)
+    stats = {
+        "venues": len(venues),
+        "with_coordinates": len(located_venues),
+        "gigs_assigned": 0,
+        "gigs_changed": 0
+    }
+    for i, gig in enumerate(gigs):
+        municipality = municipality_by_venue.get((gig.get("venue"), gig.get("location")))
+        if municipality:
+            stats["gigs_assigned"] += 1
+            stats["gigs_changed"] += int(municipality != updated[i])
+            updated[i] = municipality
+    
+    logger.info(f"Located {len(located_venues)} of {len(venues)} venues by coordinates; "
+                f"{stats['gigs_changed']} gigs reassigned")
+    return updated, stats